@@ -0,0 +1,41 @@
+# ---------------------------------------------------------------------------- #
+
+import time
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+
+def measure(func: Callable[[], Any]) -> Tuple[Any, float, int]:
+    """
+    Call a function and return its result, the elapsed time in seconds and
+    the peak of traced memory allocations in bytes. The function is called
+    twice, since tracing the allocations distorts the timing.
+    """
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+# ---------------------------------------------------------------------------- #
+
+
+def report(name: str, elapsed: float, peak: int | None = None) -> None:
+    """
+    Print a single benchmark line.
+    """
+    line = f"{name:<48} {elapsed * 1000:>10.1f} ms"
+    if peak is not None:
+        line += f" {peak / 1024 / 1024:>10.1f} MiB"
+    print(line)
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,98 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import asyncio
+import datetime
+import os
+import time
+from typing import Any
+from unittest import mock
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.schemas as schemas
+from mrkr.providers.aws import AwsSession, get_aws_session
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_client(latency: float) -> Any:
+    """
+    Create a stand-in for AwsSession._create_client that blocks for the given
+    latency (simulating STS round trips and client construction).
+    """
+    sts = mock.Mock()
+    sts.assume_role.return_value = {
+        "Credentials": {
+            "AccessKeyId": "key",
+            "SecretAccessKey": "secret",
+            "SessionToken": "token",
+            "Expiration": datetime.datetime.now(tz=datetime.timezone.utc) +
+            datetime.timedelta(hours=1)
+        }
+    }
+
+    def create(service_name: str, credentials: Any = None) -> Any:
+        time.sleep(latency)
+        return sts if service_name == "sts" else mock.Mock()
+
+    return create
+
+
+# ---------------------------------------------------------------------------- #
+
+
+async def run(requests: int, shared: bool) -> None:
+    """
+    Get an S3 client for a number of requests, either from a new session per
+    request (the previous behaviour) or from the shared session.
+    """
+    config = schemas.AwsConfigSchema(
+        aws_access_key_id="key",
+        aws_account_id="123456789012",
+        aws_region_name="eu-central-1",
+        aws_role_name="role",
+        aws_secret_access_key="secret"
+    )
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        if shared:
+            session = get_aws_session(config=config)
+        else:
+            session = AwsSession(config=config)
+        await session.get_client(service_name="s3")
+    elapsed = time.perf_counter() - start
+
+    report(f"{'shared' if shared else 'new'} session, {requests} requests",
+           elapsed)
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Compare the latency of getting AWS clients with a new session per request
+    and with the process-wide session registry.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    arguments = parser.parse_args()
+
+    with mock.patch.object(
+            AwsSession, "_create_client",
+            side_effect=create_client(arguments.latency)):
+        for shared in (False, True):
+            asyncio.run(run(requests=arguments.requests, shared=shared))
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
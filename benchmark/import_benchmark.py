@@ -0,0 +1,100 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+os.environ.setdefault("LOGGING", "logging.dev.json")
+
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+STATEMENTS = {
+    "import mrkr": "import mrkr",
+    "import mrkr.providers": "import mrkr.providers",
+    "create_app()": "from mrkr.core import create_app; create_app()",
+}
+
+# Third-party packages that only some providers need.
+HEAVY_PACKAGES = ("boto3", "botocore", "pytesseract", "numpy", "pdf2image",
+                  "PIL")
+
+# ---------------------------------------------------------------------------- #
+
+
+def import_times(statement: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Run a statement in a new interpreter with -X importtime and return the
+    total import time and the cumulative import time of every imported
+    top-level package (in seconds).
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        # import time: <self [us]> | <cumulative [us]> | <indented name>
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        seconds = int(cumulative) / 1_000_000
+        if "." not in name:
+            packages[name.strip()] = packages.get(name.strip(), 0.0) + seconds
+
+        # Nested imports are indented, only direct imports count.
+        if not name.startswith("  "):
+            total += seconds
+
+    return total, packages
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Measure the import time of mrkr and the startup of the application with
+    -X importtime, and show which optional heavy packages are imported.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    for name, statement in STATEMENTS.items():
+        totals: List[float] = []
+        heavy: Dict[str, List[float]] = {}
+        for _ in range(arguments.repeat):
+            total, packages = import_times(statement)
+            totals.append(total)
+            for package in HEAVY_PACKAGES:
+                if package in packages:
+                    heavy.setdefault(package, []).append(packages[package])
+
+        report(name, statistics.median(totals))
+        for package, times in heavy.items():
+            report(f"  {package}", statistics.median(times))
+        if not heavy:
+            print("  no optional heavy packages imported")
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
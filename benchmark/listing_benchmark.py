@@ -0,0 +1,113 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import asyncio
+import os
+import pathlib
+import tempfile
+import time
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_files(directory: str, files: int, per_folder: int) -> None:
+    """
+    Create empty files in nested folders (a third of them with an extension
+    that is filtered out).
+    """
+    for index in range(files):
+        folder = pathlib.Path(
+            directory, f"{index // per_folder // 10:04}",
+            f"{index // per_folder:06}")
+        if index % per_folder == 0:
+            folder.mkdir(parents=True, exist_ok=True)
+        extension = ".txt" if index % 3 == 0 else ".pdf"
+        (folder / f"{index:08}{extension}").touch()
+
+# ---------------------------------------------------------------------------- #
+
+
+async def list_files(directory: str) -> None:
+    """
+    List the files while a ticker task measures how long the event loop is
+    blocked at most.
+    """
+    provider = providers.LocalFileProvider(
+        config=schemas.FileProviderLocalConfigSchema(path=directory))
+
+    stall = 0.0
+    running = True
+
+    async def tick() -> None:
+        nonlocal stall
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, time.perf_counter() - start - 0.001)
+
+    ticker = asyncio.create_task(tick())
+
+    count = 0
+    first = None
+    start = time.perf_counter()
+    async with provider("/") as folder:
+        async for _ in folder.list():
+            if first is None:
+                first = time.perf_counter() - start
+            count += 1
+    elapsed = time.perf_counter() - start
+
+    running = False
+    await ticker
+
+    print(f"{count} files listed")
+    report("list (recursive, filtered)", elapsed)
+    report("  time to first file", first or 0.0)
+    report("  longest event loop stall", stall)
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Measure the recursive listing of a local folder with many files. Pass
+    --path to list an existing folder (e.g. on a network drive).
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--per-folder", type=int, default=500)
+    parser.add_argument("--path", type=str, default=None)
+    arguments = parser.parse_args()
+
+    if arguments.path:
+        asyncio.run(list_files(directory=arguments.path))
+        return
+
+    # The local file provider resolves paths relative to the working
+    # directory.
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        start = time.perf_counter()
+        create_files(
+            directory=directory,
+            files=arguments.files,
+            per_folder=arguments.per_folder
+        )
+        report(f"create {arguments.files} files", time.perf_counter() - start)
+
+        asyncio.run(list_files(directory=directory))
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,113 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import os
+from typing import Any, Dict, List
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+from mrkr.core import scan
+from mrkr.providers.ocr.tesseract import TesseractResult
+from benchmark._utils import measure, report
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_tesseract_output(
+    page: int,
+    blocks: int = 8,
+    paragraphs: int = 3,
+    lines: int = 4,
+    words: int = 10
+) -> Dict[str, List[Any]]:
+    """
+    Create a synthetic pytesseract.image_to_data output for one page.
+    """
+    columns: Dict[str, List[Any]] = {
+        key: [] for key in (
+            "level", "page_num", "block_num", "par_num", "line_num",
+            "word_num", "left", "top", "width", "height", "conf", "text")
+    }
+
+    def add(level: int, b: int, p: int, l: int, w: int, text: str) -> None:
+        for key, value in (
+            ("level", level), ("page_num", page), ("block_num", b),
+            ("par_num", p), ("line_num", l), ("word_num", w),
+            ("left", 10 * w), ("top", 10 * l), ("width", 40),
+            ("height", 12), ("conf", 95 if level == 5 else -1),
+            ("text", text)
+        ):
+            columns[key].append(value)
+
+    add(1, 0, 0, 0, 0, "")
+    for b in range(1, blocks + 1):
+        add(2, b, 0, 0, 0, "")
+        for p in range(1, paragraphs + 1):
+            add(3, b, p, 0, 0, "")
+            for l in range(1, lines + 1):
+                add(4, b, p, l, 0, "")
+                for w in range(1, words + 1):
+                    add(5, b, p, l, w, f"word{(b * w) % 97}")
+
+    return columns
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Compare the compact OCR result with the OcrResultSchema (the previous
+    internal representation) for a synthetic multi-page document.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    arguments = parser.parse_args()
+
+    provider = providers.TesseractOcrProvider(
+        config=schemas.OcrProviderTesseractConfigSchema())
+
+    outputs = [
+        TesseractResult(**create_tesseract_output(page=page + 1))
+        for page in range(arguments.pages)
+    ]
+
+    def build_compact() -> providers.OcrResult:
+        builder = providers.OcrResultBuilder()
+        for page, output in enumerate(outputs):
+            provider._convert_result(
+                result=output,
+                dimensions=(1000, 1400),
+                page=page + 1,
+                builder=builder
+            )
+        return builder.build()
+
+    compact, elapsed, peak = measure(build_compact)
+    print(f"{arguments.pages} pages, {len(compact)} OCR items")
+    report("build compact result", elapsed, peak)
+
+    schema, elapsed, peak = measure(compact.to_schema)
+    report("build OcrResultSchema", elapsed, peak)
+
+    _, elapsed, peak = measure(
+        lambda: providers.OcrResult.from_schema(schema))
+    report("convert OcrResultSchema to compact result", elapsed, peak)
+
+    _, elapsed, peak = measure(
+        lambda: scan._initialize_label_pages(ocr_result=compact))
+    report("build label data from compact result", elapsed, peak)
+
+    print(f"compact result column size: "
+          f"{compact.nbytes / 1024 / 1024:.1f} MiB")
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
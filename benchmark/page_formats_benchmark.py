@@ -0,0 +1,76 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import io
+import os
+import time
+from PIL import Image, ImageDraw
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.providers as providers
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_page(dpi: int) -> bytes:
+    """
+    Create an A4 page with text, encoded as the viewer receives it by
+    default (JPEG at PIL's default quality).
+    """
+    width, height = round(8.27 * dpi), round(11.69 * dpi)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(height // 30 - 4):
+        draw.text((60, 60 + line * 30),
+                  f"Line {line + 1}: lorem ipsum dolor sit amet, consectetur "
+                  f"adipiscing elit, sed do eiusmod tempor", fill="black")
+
+    data = io.BytesIO()
+    image.save(data, format="JPEG")
+    return data.getvalue()
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Measure the time and the size of the page variants that are sent to the
+    viewer, for each format and profile.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--preview-size", type=int, default=1600)
+    arguments = parser.parse_args()
+
+    page = create_page(dpi=arguments.dpi)
+    print(f"rendered page: {len(page) / 1024:.0f} KiB")
+
+    for max_size in (None, arguments.preview_size):
+        profile = "full" if max_size is None else "preview"
+        for format in ("JPEG", "WEBP", "AVIF"):
+            if not providers.can_save(format):
+                print(f"{format} is not supported by PIL")
+                continue
+
+            start = time.perf_counter()
+            data = providers.convert_image(
+                data=page,
+                format=format,
+                quality=arguments.quality,
+                max_size=max_size
+            ) or page
+            report(f"{profile} {format} ({len(data) / 1024:.0f} KiB)",
+                   time.perf_counter() - start)
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,157 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import os
+import statistics
+import time
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+from typing import Dict, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.schemas as schemas
+from mrkr.providers.ocr.preprocessing import preprocess_image
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog invoice total amount date "
+    "customer number payment address contract period signature"
+).split()
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_page(page: int, size: Tuple[int, int] = (1654, 2339)) -> Image.Image:
+    """
+    Create a synthetic scanned page (A4 at 200 dpi) with text lines, a dark
+    scanner border and a slight rotation.
+    """
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=28)
+
+    for line in range(55):
+        text = " ".join(
+            WORDS[(page * 7 + line * 3 + word) % len(WORDS)]
+            for word in range(9))
+        draw.text((150, 180 + line * 36), text, fill=(20, 20, 20), font=font)
+
+    draw.rectangle((0, 0, size[0], 25), fill="black")
+
+    return image.rotate(
+        1.5 if page % 2 else -1.0, resample=Image.Resampling.BILINEAR,
+        fillcolor="white")
+
+# ---------------------------------------------------------------------------- #
+
+
+def image_bytes(image: Image.Image) -> int:
+    """
+    Return the size of the pixel data of an image.
+    """
+    if image.mode == "1":
+        return (image.width + 7) // 8 * image.height
+    return image.width * image.height * len(image.getbands())
+
+# ---------------------------------------------------------------------------- #
+
+
+def run_tesseract(image: Image.Image) -> Tuple[float, float]:
+    """
+    Run Tesseract on an image and return the elapsed time and the mean word
+    confidence.
+    """
+    start = time.perf_counter()
+    output = pytesseract.image_to_data(
+        image=image,
+        output_type=pytesseract.Output.DICT,
+        config="--psm 1"
+    )
+    elapsed = time.perf_counter() - start
+
+    confidences = [float(conf) for conf, text in zip(
+        output["conf"], output["text"]) if text.strip() and float(conf) >= 0]
+
+    return elapsed, statistics.mean(confidences) if confidences else 0.0
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Compare the memory, throughput and (if Tesseract is installed) the OCR
+    runtime and confidence of pages with and without preprocessing.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--x-height", type=int, default=20)
+    arguments = parser.parse_args()
+
+    pages = [create_page(page=page) for page in range(arguments.pages)]
+
+    configs: Dict[str, schemas.OcrPreprocessingSchema | None] = {
+        "original (RGB)": None,
+        "grayscale": schemas.OcrPreprocessingSchema(
+            enabled=True,
+            deskew=False,
+            crop_borders=False
+        ),
+        "grayscale, deskew, crop": schemas.OcrPreprocessingSchema(
+            enabled=True
+        ),
+        "binary, deskew, crop, x-height": schemas.OcrPreprocessingSchema(
+            enabled=True,
+            mode=schemas.OcrPreprocessingMode.binary,
+            target_x_height=arguments.x_height
+        ),
+    }
+
+    try:
+        pytesseract.get_tesseract_version()
+        tesseract = True
+    except Exception:
+        print("Tesseract is not installed, skipping the OCR comparison.")
+        tesseract = False
+
+    print(f"{arguments.pages} pages")
+
+    for name, config in configs.items():
+        images: List[Image.Image] = []
+        timings: Dict[str, float] = {}
+
+        start = time.perf_counter()
+        for page in pages:
+            if config is None:
+                images.append(page)
+                continue
+            image, transform = preprocess_image(image=page, config=config)
+            images.append(image)
+            for stage, duration in transform.timings.items():
+                timings[stage] = timings.get(stage, 0.0) + duration
+        elapsed = time.perf_counter() - start
+
+        memory = sum(image_bytes(image) for image in images) / len(images)
+        print(f"{name}: {memory / 1024 / 1024:.2f} MiB per page")
+        report("  preprocessing per page", elapsed / len(pages))
+        for stage, duration in timings.items():
+            report(f"    {stage}", duration / len(pages))
+
+        if tesseract:
+            results = [run_tesseract(image) for image in images]
+            report("  tesseract per page",
+                   statistics.mean(result[0] for result in results))
+            print(f"  mean word confidence: "
+                  f"{statistics.mean(result[1] for result in results):.1f}")
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,109 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from PIL import Image, ImageDraw
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_pdf(path: str, pages: int) -> None:
+    """
+    Create a PDF file with A4 pages (at 100 dpi) that contain some text.
+    """
+    images = []
+    for page in range(pages):
+        image = Image.new("RGB", (827, 1169), "white")
+        draw = ImageDraw.Draw(image)
+        for line in range(40):
+            draw.text((60, 60 + line * 26),
+                      f"Page {page + 1}, line {line + 1}: lorem ipsum dolor "
+                      f"sit amet, consectetur adipiscing elit", fill="black")
+        images.append(image)
+
+    images[0].save(path, save_all=True, append_images=images[1:],
+                   resolution=100)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def render(directory: str, processes: int, dpi: int) -> None:
+    """
+    Render all pages of the PDF file and report the total time and the time
+    to the first page.
+    """
+    provider = providers.LocalFileProvider(
+        config=schemas.FileProviderLocalConfigSchema(
+            path=directory,
+            pdf_dpi=dpi,
+            render_processes=processes
+        )
+    )
+
+    count = 0
+    first = None
+    start = time.perf_counter()
+    async with provider("document.pdf") as file:
+        async for _ in file.iterate_images():
+            if first is None:
+                first = time.perf_counter() - start
+            count += 1
+    elapsed = time.perf_counter() - start
+
+    report(f"render {count} pages ({processes} processes)", elapsed)
+    report("  time to first page", first or 0.0)
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Measure the rendering of a large PDF file with one and several poppler
+    processes (requires poppler).
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=120)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=[1, 2, 4, 8])
+    arguments = parser.parse_args()
+
+    if shutil.which("pdftoppm") is None:
+        print("poppler (pdftoppm) is not installed")
+        return
+
+    print(f"CPU budget: {providers.cpu_budget.size} jobs")
+
+    # The local file provider resolves paths relative to the working
+    # directory.
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        start = time.perf_counter()
+        create_pdf(os.path.join(directory, "document.pdf"), arguments.pages)
+        report(f"create {arguments.pages} pages", time.perf_counter() - start)
+
+        for processes in arguments.processes:
+            asyncio.run(render(
+                directory=directory,
+                processes=processes,
+                dpi=arguments.dpi
+            ))
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,150 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import asyncio
+import io
+import os
+import time
+import tracemalloc
+from typing import Any, Dict
+from unittest import mock
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+from benchmark._utils import report
+
+# ---------------------------------------------------------------------------- #
+
+
+class FakeS3Client:
+    """
+    A stand-in for an S3 client that serves one object with a latency per
+    request, a bandwidth per connection and a slow request every now and
+    then.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        latency: float,
+        bandwidth: float,
+        slow_every: int
+    ) -> None:
+        self.content = os.urandom(size)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.slow_every = slow_every
+        self.requests = 0
+
+    def get_object(
+        self,
+        Range: str | None = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        self.requests += 1
+        start, end = 0, len(self.content) - 1
+        if Range is not None:
+            start, end = map(int, Range.removeprefix("bytes=").split("-"))
+            end = min(end, len(self.content) - 1)
+        data = self.content[start:end + 1]
+
+        delay = self.latency + len(data) / self.bandwidth
+        if self.slow_every and self.requests % self.slow_every == 0:
+            delay *= 10
+        time.sleep(delay)
+
+        return {
+            "Body": io.BytesIO(data),
+            "ContentType": "application/pdf",
+            "ETag": "etag",
+            "ContentLength": len(data),
+            "ContentRange": f"bytes {start}-{end}/{len(self.content)}",
+        }
+
+# ---------------------------------------------------------------------------- #
+
+
+async def read(client: FakeS3Client, **kwargs: Any) -> None:
+    """
+    Read the object and report the total time, the time to the first chunk
+    and the peak memory.
+    """
+    provider = providers.S3FileProvider(
+        config=schemas.FileProviderS3ConfigSchema(
+            aws_access_key_id="key",
+            aws_account_id="123456789012",
+            aws_region_name="eu-central-1",
+            aws_role_name="role",
+            aws_secret_access_key="secret",
+            aws_bucket_name="bucket",
+            path="documents",
+            metadata_ttl=0,
+            **kwargs
+        )
+    )
+    provider._session = mock.Mock(
+        get_client=mock.AsyncMock(return_value=client))
+
+    client.requests = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    size = 0
+    try:
+        async with provider("large.pdf") as file:
+            async for chunk in file.read():
+                if first is None:
+                    first = time.perf_counter() - start
+                size += len(chunk)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert size == len(client.content)
+
+    name = ", ".join(f"{key}={value}" for key, value in kwargs.items())
+    report(f"read ({name}, {client.requests} requests)", elapsed, peak)
+    report("  time to first chunk", first or 0.0)
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Compare reads of a large S3 object in a single request with parallel
+    ranged reads (with and without hedging), against a local stand-in for S3.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--bandwidth", type=float, default=100 * 1024 * 1024)
+    parser.add_argument("--slow-every", type=int, default=5)
+    arguments = parser.parse_args()
+
+    client = FakeS3Client(
+        size=arguments.size,
+        latency=arguments.latency,
+        bandwidth=arguments.bandwidth,
+        slow_every=arguments.slow_every
+    )
+
+    for kwargs in (
+        {"part_size": arguments.size},
+        {"download_concurrency": 1},
+        {"download_concurrency": 4},
+        {"download_concurrency": 4, "hedge_after": 0.2},
+    ):
+        asyncio.run(read(client, **kwargs))
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
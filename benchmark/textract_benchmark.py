@@ -0,0 +1,99 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import asyncio
+import os
+import time
+from PIL import Image
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.schemas as schemas
+from mrkr.providers.ocr.textract import TextractOcrProvider
+from benchmark._utils import report
+from test._textract import FakeTextractClient, create_fake_session
+
+# ---------------------------------------------------------------------------- #
+
+
+async def run(
+    pages: int,
+    latency: float,
+    tps: float,
+    requests_per_second: float,
+    max_concurrency: int
+) -> None:
+    """
+    Analyze a synthetic document with the Textract provider against a local
+    Textract stand-in and report the elapsed time and the throttled calls.
+    """
+    client = FakeTextractClient(latency=latency, tps=tps, lines=20, words=8)
+
+    provider = TextractOcrProvider(
+        config=schemas.OcrProviderTextractConfigSchema(
+            aws_access_key_id="key",
+            aws_account_id="123456789012",
+            aws_region_name="eu-central-1",
+            aws_role_name="role",
+            aws_secret_access_key="secret",
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency,
+            max_retries=20
+        )
+    )
+    provider._session = create_fake_session(client)
+
+    images = [Image.new("RGB", (100, 140)) for _ in range(pages)]
+
+    start = time.perf_counter()
+    async with provider(images=images) as ocr_provider:
+        await ocr_provider.ocr()
+    elapsed = time.perf_counter() - start
+
+    report(
+        f"concurrency {max_concurrency:>2}, {requests_per_second:>4.1f} req/s "
+        f"({client.throttled} throttled)",
+        elapsed
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Compare sequential and concurrent page analysis with Textract. The
+    stand-in simulates the latency of the service and throttles requests
+    above the TPS quota.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--tps", type=float, default=5)
+    arguments = parser.parse_args()
+
+    print(f"{arguments.pages} pages, {arguments.latency}s latency, "
+          f"{arguments.tps} TPS quota")
+
+    for requests_per_second, max_concurrency in (
+        (arguments.tps, 1),
+        (arguments.tps, 4),
+        (arguments.tps, 8),
+        (arguments.tps * 4, 8),
+    ):
+        asyncio.run(run(
+            pages=arguments.pages,
+            latency=arguments.latency,
+            tps=arguments.tps,
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency
+        ))
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
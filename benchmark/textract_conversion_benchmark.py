@@ -0,0 +1,75 @@
+# ---------------------------------------------------------------------------- #
+
+import argparse
+import json
+import os
+from typing import Dict
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+from mrkr.core import scan
+from mrkr.providers.ocr.textract import TextractOcrProvider
+from benchmark._utils import measure, report
+from test._textract import create_textract_response
+
+# ---------------------------------------------------------------------------- #
+
+
+def main() -> None:
+    """
+    Measure the conversion of an analyze_document response into the compact
+    OCR result. Pass a recorded response (the JSON returned by Textract) or
+    use a synthetic response with about 3,000 blocks.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--response", type=str, default=None,
+                        help="path to a recorded analyze_document response")
+    parser.add_argument("--repeat", type=int, default=10)
+    arguments = parser.parse_args()
+
+    response: Dict
+    if arguments.response:
+        with open(arguments.response, "r") as file:
+            response = json.load(file)
+    else:
+        response = create_textract_response(lines=142, words=20)
+
+    blocks = response["Blocks"]
+
+    provider = TextractOcrProvider(
+        config=schemas.OcrProviderTextractConfigSchema(
+            aws_access_key_id="key",
+            aws_account_id="123456789012",
+            aws_region_name="eu-central-1",
+            aws_role_name="role",
+            aws_secret_access_key="secret"
+        )
+    )
+
+    def convert() -> providers.OcrResult:
+        builder = providers.OcrResultBuilder()
+        for _ in range(arguments.repeat):
+            provider._convert_result(blocks=blocks, page=1, builder=builder)
+        return builder.build()
+
+    result, elapsed, peak = measure(convert)
+    print(f"{len(blocks)} blocks, {arguments.repeat} repetitions")
+    report("convert response to compact result", elapsed / arguments.repeat,
+           peak)
+
+    _, elapsed, peak = measure(
+        lambda: scan._initialize_label_pages(ocr_result=result))
+    report("build label data from compact result",
+           elapsed / arguments.repeat, peak)
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    main()
+
+# ---------------------------------------------------------------------------- #
@@ -7,6 +7,16 @@ interface DocumentViewerAttributes {
 
 /* -------------------------------------------------------------------------- */
 
+// The aspect ratio of pages with an unknown size (A4 portrait).
+const DEFAULT_ASPECT_RATIO = 1 / Math.SQRT2;
+
+// The zoom range (1 fits the pages to the width of the viewer) and the
+// factor of a zoom step with the mouse wheel (while Ctrl is pressed).
+const MAX_ZOOM = 8;
+const ZOOM_STEP = 1.25;
+
+/* -------------------------------------------------------------------------- */
+
 export interface PagesCreatedEvent {
     // ...
 }
@@ -31,14 +41,23 @@ export interface HighlightClickedEvent {
 
 /* -------------------------------------------------------------------------- */
 
-interface PageContentSchema {
-    content: string; // Base64 encoded image content
+interface PageSizeSchema {
     page: number;
     width: number;
     height: number;
-    aspect_ratio: number;
-    format: string; // Image format (e.g., JPEG, PNG)
-    mode: string; // Color mode (e.g., RGB, L)
+}
+
+interface FileInfoSchema {
+    pages: number;
+    sizes: PageSizeSchema[]; // Sizes of the rendered pages (if known)
+}
+
+interface TilePyramidSchema {
+    page: number;
+    width: number; // Width of the rendered page (level 0)
+    height: number;
+    tile_size: number;
+    levels: number; // Each level halves the width and height
 }
 
 /* -------------------------------------------------------------------------- */
@@ -46,6 +65,12 @@ interface PageContentSchema {
 export class DocumentViewer extends HTMLElement implements DocumentViewerAttributes {
     private _url: string = '';
     private _pages: { [page: number]: HTMLButtonElement } = {};
+    private _zoom: number = 1;
+    private _pyramids: { [page: number]: Promise<TilePyramidSchema | null> } = {};
+    private _tileLayers: { [page: number]: HTMLDivElement } = {};
+    private _tilesScheduled: boolean = false;
+    private _onWheelListener = this._onWheel.bind(this);
+    private _onScrollListener = this._scheduleTiles.bind(this);
 
     get url(): string {
         return this.getAttribute('url') || '';
@@ -55,6 +80,24 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
         this.setAttribute('url', value || '');
     }
 
+    get zoom(): number {
+        return this._zoom;
+    }
+
+    set zoom(value: number) {
+        const zoom = Math.min(MAX_ZOOM, Math.max(1, value));
+        const ratio = zoom / this._zoom;
+
+        this._zoom = zoom;
+        this.style.setProperty('--document-viewer-zoom', `${zoom}`);
+
+        // Keep the center of the viewer in place.
+        this.scrollLeft = (this.scrollLeft + this.clientWidth / 2) * ratio - this.clientWidth / 2;
+        this.scrollTop = (this.scrollTop + this.clientHeight / 2) * ratio - this.clientHeight / 2;
+
+        this._scheduleTiles();
+    }
+
     constructor() {
         super();
         this.attachShadow({ mode: 'open' });
@@ -77,11 +120,13 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
     }
 
     connectedCallback() {
-        // ...
+        this.addEventListener('wheel', this._onWheelListener, { passive: false });
+        this.addEventListener('scroll', this._onScrollListener, { passive: true });
     }
 
     disconnectedCallback() {
-        // ...
+        this.removeEventListener('wheel', this._onWheelListener);
+        this.removeEventListener('scroll', this._onScrollListener);
     }
 
     private _populateShadowRoot() {
@@ -100,7 +145,7 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
                 grid-auto-rows: min-content;
                 grid-template-columns: 1fr;
                 height: 100%;
-                overflow-y: auto;
+                overflow: auto;
                 padding: 2rem;
                 scrollbar-color: var(--document-viewer-scrollbar-color, inherit);
                 scrollbar-gutter: stable;
@@ -117,7 +162,7 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
                 padding: 0;
                 position: relative;
                 user-select: none;
-                width: 100%;
+                width: calc(100% * var(--document-viewer-zoom, 1));
             }
 
             .page > img {
@@ -126,6 +171,19 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
                 z-index: 1;
             }
 
+            .tiles {
+                inset: 0;
+                overflow: hidden;
+                pointer-events: none;
+                position: absolute;
+                z-index: 1;
+            }
+
+            .tiles > img {
+                display: block;
+                position: absolute;
+            }
+
             .highlight {
                 background-color: var(--document-viewer-highlight-background-color, transparent);
                 border: none;
@@ -211,15 +269,21 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
         this.classList.remove('error');
         this.classList.add('loading');
         this._pages = {};
+        this._pyramids = {};
+        this._tileLayers = {};
     }
 
     private _addPages() {
-        this._queryContent()
-            .then((content: PageContentSchema[]) => {
+        this._queryPages()
+            .then((info: FileInfoSchema) => {
                 this.classList.remove('loading');
-                content.forEach((pageContent) => {
-                    this._addPage(pageContent.page, pageContent.aspect_ratio, pageContent.format, pageContent.content);
-                });
+
+                const sizes = new Map(info.sizes.map((size) => [size.page, size]));
+                for (let page = 1; page <= info.pages; page++) {
+                    const size = sizes.get(page);
+                    const aspectRatio = size ? size.width / size.height : DEFAULT_ASPECT_RATIO;
+                    this._addPage(page, aspectRatio, `${this._url}/${page}/image?profile=preview`);
+                }
 
                 this._dispatchPagesCreatedEvent();
 
@@ -247,7 +311,7 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
         }));
     }
 
-    private _addPage(page: number, aspect_ratio: number, format: string, content: string) {
+    private _addPage(page: number, aspect_ratio: number, url: string) {
         if (!this.shadowRoot) {
             throw new Error("Shadow Root is not initialized.");
         }
@@ -257,12 +321,15 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
         pageElement.style.gridRow = `${page}`;
         pageElement.title = `Page ${page}`;
 
-        const mime = this._getMimeFromFormat(format);
-
+        // The browser loads (and caches) the pages when they are scrolled
+        // into view, in the best format it accepts.
         const imageElement = document.createElement('img');
-        imageElement.src = `data:${mime};base64,${content}`;
+        imageElement.src = url;
+        imageElement.loading = 'lazy';
+        imageElement.decoding = 'async';
         imageElement.style.aspectRatio = `${aspect_ratio}`;
         imageElement.alt = `Page ${page}`;
+        imageElement.addEventListener('load', this._onScrollListener);
 
         pageElement.appendChild(imageElement);
 
@@ -276,6 +343,126 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
         this.shadowRoot.appendChild(pageElement);
     }
 
+    private _onWheel(event: WheelEvent) {
+        if (!event.ctrlKey && !event.metaKey) {
+            return;
+        }
+
+        event.preventDefault();
+        this.zoom = event.deltaY < 0 ? this._zoom * ZOOM_STEP : this._zoom / ZOOM_STEP;
+    }
+
+    private _scheduleTiles() {
+        if (this._tilesScheduled) {
+            return;
+        }
+
+        this._tilesScheduled = true;
+        requestAnimationFrame(() => {
+            this._tilesScheduled = false;
+            this._updateTiles();
+        });
+    }
+
+    private _updateTiles() {
+        const viewport = this.getBoundingClientRect();
+
+        for (const [key, pageElement] of Object.entries(this._pages)) {
+            const page = Number(key);
+            const bounds = pageElement.getBoundingClientRect();
+            const image = pageElement.querySelector('img');
+
+            const visible = bounds.bottom > viewport.top && bounds.top < viewport.bottom &&
+                bounds.right > viewport.left && bounds.left < viewport.right;
+
+            // Tiles are only loaded for visible pages that are displayed
+            // larger than their preview image.
+            const needed = image !== null && image.naturalWidth > 0 &&
+                bounds.width * window.devicePixelRatio > image.naturalWidth;
+
+            if (!visible || !needed) {
+                this._tileLayers[page]?.remove();
+                delete this._tileLayers[page];
+                continue;
+            }
+
+            this._queryPyramid(page).then((pyramid) => {
+                if (pyramid && this._pages[page] === pageElement) {
+                    this._addTiles(page, pyramid);
+                }
+            });
+        }
+    }
+
+    private _addTiles(page: number, pyramid: TilePyramidSchema) {
+        const pageElement = this._pages[page];
+        const bounds = pageElement.getBoundingClientRect();
+        const viewport = this.getBoundingClientRect();
+
+        // The level whose resolution is closest to (but not below) the
+        // displayed size of the page.
+        const resolution = bounds.width * window.devicePixelRatio;
+        const level = Math.max(0, Math.min(pyramid.levels - 1, Math.floor(Math.log2(pyramid.width / resolution))));
+
+        const size = pyramid.tile_size;
+        const width = Math.ceil(pyramid.width / 2 ** level);
+        const height = Math.ceil(pyramid.height / 2 ** level);
+
+        // The visible part of the page in pixels of the level.
+        const left = Math.max(0, (viewport.left - bounds.left) / bounds.width) * width;
+        const right = Math.min(1, (viewport.right - bounds.left) / bounds.width) * width;
+        const top = Math.max(0, (viewport.top - bounds.top) / bounds.height) * height;
+        const bottom = Math.min(1, (viewport.bottom - bounds.top) / bounds.height) * height;
+
+        let layer = this._tileLayers[page];
+        if (!layer) {
+            layer = document.createElement('div');
+            layer.classList.add('tiles');
+            pageElement.appendChild(layer);
+            this._tileLayers[page] = layer;
+        }
+
+        const visibleTiles = new Set<string>();
+        for (let y = Math.floor(top / size); y < Math.ceil(bottom / size); y++) {
+            for (let x = Math.floor(left / size); x < Math.ceil(right / size); x++) {
+                visibleTiles.add(`${level}/${x}/${y}`);
+            }
+        }
+
+        // Tiles of other levels and tiles that were scrolled out of view are
+        // removed, so that only the visible tiles are held in memory.
+        for (const tile of Array.from(layer.querySelectorAll('img'))) {
+            if (!visibleTiles.delete(tile.dataset.tile || '')) {
+                tile.remove();
+            }
+        }
+
+        for (const id of visibleTiles) {
+            const [x, y] = id.split('/').slice(1).map(Number);
+
+            const tile = document.createElement('img');
+            tile.dataset.tile = id;
+            tile.src = `${this._url}/${page}/tile/${id}`;
+            tile.alt = '';
+            tile.style.left = `${x * size / width * 100}%`;
+            tile.style.top = `${y * size / height * 100}%`;
+            tile.style.width = `${Math.min(size, width - x * size) / width * 100}%`;
+            tile.style.height = `${Math.min(size, height - y * size) / height * 100}%`;
+
+            layer.appendChild(tile);
+        }
+    }
+
+    private _queryPyramid(page: number): Promise<TilePyramidSchema | null> {
+        if (!(page in this._pyramids)) {
+            this._pyramids[page] = fetch(`${this._url}/${page}/tiles`)
+                .then((response) => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+
+        return this._pyramids[page];
+    }
+
     public getPage(page: number): HTMLButtonElement | undefined {
         return this._pages[page];
     }
@@ -332,23 +519,7 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
         }));
     }
 
-    private _getMimeFromFormat(format: string): string {
-        switch (format.toLowerCase()) {
-            case 'jpeg':
-            case 'jpg':
-                return 'image/jpeg';
-            case 'png':
-                return 'image/png';
-            case 'gif':
-                return 'image/gif';
-            case 'webp':
-                return 'image/webp';
-            default:
-                throw new Error(`Unsupported image format: ${format}`);
-        }
-    }
-
-    private async _queryContent(): Promise<PageContentSchema[]> {
+    private async _queryPages(): Promise<FileInfoSchema> {
         if (!this._url) {
             throw new Error("URL is not set for DocumentViewer");
         }
@@ -358,13 +529,13 @@ export class DocumentViewer extends HTMLElement implements DocumentViewerAttribu
             throw new Error(`Response status: ${response.status}`);
         }
 
-        const content: PageContentSchema[] | null = await response.json();
+        const info: FileInfoSchema | null = await response.json();
 
-        if (!content) {
-            throw new Error(`Failed to fetch document content`);
+        if (!info) {
+            throw new Error(`Failed to fetch document pages`);
         }
 
-        return content;
+        return info;
     }
 
 }
@@ -34,6 +34,12 @@ export interface SelectionChangedEvent {
 
 /* -------------------------------------------------------------------------- */
 
+export interface ContentLoadedEvent {
+    rowIds: string[];
+}
+
+/* -------------------------------------------------------------------------- */
+
 export interface TableRenderErrorEvent {
     message: string;
     error: string;
@@ -283,6 +289,17 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
                 opacity: var(--filtered-table-sort-icon-opacity, 0.5);
             }
 
+            td > img {
+                display: block;
+                height: var(--filtered-table-image-size, 3rem);
+                object-fit: contain;
+                width: var(--filtered-table-image-size, 3rem);
+            }
+
+            td > img:not([src]) {
+                visibility: hidden;
+            }
+
             .chip {
                 border-radius: var(--filtered-table-chip-border-radius, 1rem);
                 display: inline-block;
@@ -347,6 +364,7 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
             } else {
                 this._addHeaders();
                 this._addData(content);
+                this._dispatchContentLoaded();
             }
         }).catch(error => {
             this.clearContent();
@@ -382,6 +400,13 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
             span.textContent = this._configParsed.headers[key];
             th.style.gridArea = 'header';
             div.appendChild(span);
+            th.appendChild(div);
+            tr.appendChild(th);
+
+            // Images (e.g. thumbnails) can not be sorted.
+            if (this._configParsed?.display?.[key] === 'image') {
+                continue;
+            }
 
             const sortButton = new IconButton();
             sortButton.img = this._sortImg || '';
@@ -395,9 +420,6 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
             sortButton.style.gridArea = 'sort';
             sortButton.display = 'inline-block';
             div.appendChild(sortButton);
-
-            th.appendChild(div);
-            tr.appendChild(th);
         }
 
         this._tableElement.appendChild(tr)
@@ -447,10 +469,19 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
                 const td = document.createElement('td');
                 td.addEventListener('click', this._onRowClickedEvent(tr.id));
 
-                const display: 'text' | 'chip' = this._configParsed?.display?.[key] || 'text';
+                const display: 'text' | 'chip' | 'image' = this._configParsed?.display?.[key] || 'text';
 
                 if (display === 'text') {
                     td.textContent = item[key] || '';
+                } else if (display === 'image') {
+                    // The image can be set later on (see setImage).
+                    const imgElement = document.createElement('img');
+                    imgElement.alt = '';
+                    imgElement.dataset.key = key;
+                    if (item[key]) {
+                        imgElement.src = item[key];
+                    }
+                    td.appendChild(imgElement);
                 } else {
                     const divElement = document.createElement('div');
                     divElement.classList.add('chip');
@@ -507,6 +538,17 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
         }
     }
 
+    private _dispatchContentLoaded() {
+        const rows = Array.from(this._tableElement.querySelectorAll('tr[id]')) as HTMLElement[];
+        this.dispatchEvent(new CustomEvent<ContentLoadedEvent>('content-loaded', {
+            detail: {
+                rowIds: rows.map(row => row.id)
+            },
+            bubbles: true,
+            composed: true
+        }));
+    }
+
     private _dispatchError(message: string, error: Error) {
         this.dispatchEvent(new CustomEvent<TableRenderErrorEvent>('table-render-error', {
             detail: {
@@ -518,6 +560,13 @@ export class FilteredTable extends HTMLElement implements FilteredTableAttribute
         }));
     }
 
+    public setImage(rowId: string, key: string, src: string) {
+        const imgElement = this._tableElement.querySelector(`tr[id="${CSS.escape(rowId)}"] img[data-key="${CSS.escape(key)}"]`) as HTMLImageElement | null;
+        if (imgElement) {
+            imgElement.src = src;
+        }
+    }
+
     public getSelectedRows(): HTMLElement[] {
         const checkboxes = Array.from(this._tableElement.querySelectorAll('input[type="checkbox"][name="select-row"]')) as HTMLInputElement[];
         return checkboxes.filter(checkbox => checkbox.checked).map(checkbox => checkbox.parentElement?.parentElement || checkbox);
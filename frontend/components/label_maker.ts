@@ -77,6 +77,7 @@ interface PageLabelDataSchema {
     labels: LabelSchema[]
     label_status: 'done' | 'open'
     blocks: BlockLabelDataSchema[]
+    ocr_failed?: boolean
 }
 
 /* -------------------------------------------------------------------------- */
@@ -3,7 +3,7 @@
 import { ListBasedContent, ListBasedContentAttributes } from './list_based_content.js';
 import { MessageBox } from './base/message_box.js';
 import { StyledButton } from './base/styled_button.js';
-import { RowClickedEvent, SelectionChangedEvent } from './base/filtered_table.js';
+import { ContentLoadedEvent, RowClickedEvent, SelectionChangedEvent } from './base/filtered_table.js';
 import { CheckboxDialog } from './base/checkbox_dialog.js';
 
 /* -------------------------------------------------------------------------- */
@@ -15,6 +15,7 @@ interface ProjectContentAttributes extends ListBasedContentAttributes {
     updateAssignToUrl?: string
     updateReviewByUrl?: string
     updateMarkAsUrl?: string
+    thumbnailsUrl?: string
 }
 
 /* -------------------------------------------------------------------------- */
@@ -26,6 +27,7 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
     private _updateAssignToUrl: string = '';
     private _updateReviewByUrl: string = '';
     private _updateMarkAsUrl: string = '';
+    private _thumbnailsUrl: string = '';
 
     private _assignToButton: StyledButton = new StyledButton();
     private _reviewByButton: StyledButton = new StyledButton();
@@ -83,6 +85,14 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
         this.setAttribute('update-mark-as-url', value);
     }
 
+    get thumbnailsUrl() {
+        return this._thumbnailsUrl;
+    }
+
+    set thumbnailsUrl(value: string) {
+        this.setAttribute('thumbnails-url', value);
+    }
+
     constructor() {
         super();
 
@@ -90,7 +100,7 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
     }
 
     static get observedAttributes() {
-        return [...super.observedAttributes, 'label-gui-url', 'list-users-url', 'list-statuses-url', 'update-assign-to-url', 'update-review-by-url', 'update-mark-as-url'];
+        return [...super.observedAttributes, 'label-gui-url', 'list-users-url', 'list-statuses-url', 'update-assign-to-url', 'update-review-by-url', 'update-mark-as-url', 'thumbnails-url'];
     }
 
     attributeChangedCallback(propertyName: string, oldValue: string | null, newValue: string | null) {
@@ -111,6 +121,8 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
             this._updateReviewByUrl = newValue || '';
         } else if (propertyName === 'update-mark-as-url') {
             this._updateMarkAsUrl = newValue || '';
+        } else if (propertyName === 'thumbnails-url') {
+            this._thumbnailsUrl = newValue || '';
         }
     }
 
@@ -119,6 +131,7 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
         this._assignToButton.addEventListener('click', (event: Event) => this._onAssignToButtonClick(event));
         this._reviewByButton.addEventListener('click', (event: Event) => this._onReviewByButtonClick(event));
         this._markAsButton.addEventListener('click', (event: Event) => this._onMarkAsButtonClick(event));
+        this.shadowRoot?.addEventListener('content-loaded', (event: Event) => this._onContentLoaded(event as CustomEvent<ContentLoadedEvent>));
     }
 
     disconnectedCallback() {
@@ -126,10 +139,11 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
         this._assignToButton.removeEventListener('click', (event: Event) => this._onAssignToButtonClick(event));
         this._reviewByButton.removeEventListener('click', (event: Event) => this._onReviewByButtonClick(event));
         this._markAsButton.removeEventListener('click', (event: Event) => this._onMarkAsButtonClick(event));
+        this.shadowRoot?.removeEventListener('content-loaded', (event: Event) => this._onContentLoaded(event as CustomEvent<ContentLoadedEvent>));
     }
 
     protected _getTableConfig() {
-        return '{"idColumn": "id", "headers": {"id": "ID", "path": "Path", "status": "Status", "assignee_name": "Assignee", "reviewer_name": "Reviewer", "created": "Created at", "updated": "Updated at"}, "filterElement": "filter", "display": {"status": "chip"}}';
+        return '{"idColumn": "id", "headers": {"thumbnail": "Preview", "id": "ID", "path": "Path", "status": "Status", "assignee_name": "Assignee", "reviewer_name": "Reviewer", "created": "Created at", "updated": "Updated at"}, "filterElement": "filter", "display": {"thumbnail": "image", "status": "chip"}}';
     }
 
     private _populateChildShadowRoot() {
@@ -189,6 +203,37 @@ export class ProjectContent extends ListBasedContent implements ProjectContentAt
         this._markAsButton.disabled = detail.none;
     }
 
+    private _onContentLoaded(event: CustomEvent<ContentLoadedEvent>) {
+        const rowIds = event.detail.rowIds;
+        if (!this._thumbnailsUrl || rowIds.length === 0) {
+            return;
+        }
+
+        // The thumbnails of all rows of the table are loaded in one request.
+        const url = new URL(this._thumbnailsUrl);
+        for (const rowId of rowIds) {
+            url.searchParams.append('document_id', rowId);
+        }
+
+        fetch(url.toString()).then(response => {
+            if (!response.ok) {
+                throw new Error(`Response status: ${response.status}`);
+            }
+            return response.json();
+        }).then((thumbnails: any[]) => {
+            for (const thumbnail of thumbnails) {
+                this._table.setImage(
+                    String(thumbnail.document_id),
+                    'thumbnail',
+                    `data:image/${thumbnail.format.toLowerCase()};base64,${thumbnail.content}`
+                );
+            }
+        }).catch(error => {
+            // The table can be used without thumbnails.
+            console.warn(`Unable to load thumbnails: ${error.message}`);
+        });
+    }
+
     private _onAssignToConfirm(userId: string) {
         const messageBox = document.querySelector('message-box') as MessageBox | null;
         const selectedDocuments = this._table.getSelectedRows().map(row => row.id);
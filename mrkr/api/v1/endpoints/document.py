@@ -1,7 +1,12 @@
 # ---------------------------------------------------------------------------- #
 
+import asyncio
+import base64
 import fastapi
-from typing import Dict, List
+import functools
+import hashlib
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, \
+    Optional, Tuple, TypeVar
 
 # ---------------------------------------------------------------------------- #
 
@@ -18,6 +23,18 @@ import mrkr.core as core
 
 router = fastapi.APIRouter(prefix="/document", tags=[schemas.Tags.document])
 
+T = TypeVar("T")
+
+# The (non-standard) status of requests whose clients disconnected before
+# the response was ready. It is only logged, the client does not receive it.
+_CLIENT_CLOSED_REQUEST = 499
+
+# ---------------------------------------------------------------------------- #
+
+# The maximum number of documents whose thumbnails are returned at once (one
+# page of the document table).
+_MAX_THUMBNAILS = 100
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -36,6 +53,39 @@ async def list_statuses(
 # ---------------------------------------------------------------------------- #
 
 
+@router.get("/thumbnails", summary="Get Document Thumbnails")
+async def get_document_thumbnails(
+    session: database.DatabaseDependency,
+    document_id: List[int] = fastapi.Query(
+        ...,
+        description="The unique identifiers of the documents (e.g. of a page "
+                    "of the document table).",
+        max_length=_MAX_THUMBNAILS,
+        examples=[[1, 2, 3]]
+    )
+) -> List[schemas.ThumbnailSchema]:
+    """
+    Return the thumbnails of the first pages of several documents in one
+    request. Documents without a thumbnail (e.g. that are not scanned yet)
+    are left out.
+    """
+    thumbnails = crud.get_document_thumbnails(
+        session=session,
+        document_ids=document_id
+    )
+
+    return [
+        schemas.ThumbnailSchema(
+            document_id=thumbnail.document_id,
+            content=base64.b64encode(thumbnail.data).decode("ascii"),
+            format=thumbnail.format
+        )
+        for thumbnail in thumbnails
+    ]
+
+# ---------------------------------------------------------------------------- #
+
+
 @router.get("/{document_id}",
             summary="Get Document")
 async def get_document(
@@ -68,6 +118,9 @@ async def get_document(
             summary="Get Page Content")
 async def get_document_content(
     session: database.DatabaseDependency,
+    page_cache: services.PageCacheDependency,
+    single_flight: services.SingleFlightDependency,
+    request: fastapi.Request,
     document_id: int = fastapi.Path(
         ...,
         description="The unique identifier for the document (as an integer).",
@@ -76,7 +129,303 @@ async def get_document_content(
 ) -> List[schemas.PageContentSchema]:
     """
     Return the content of the document as a json containing the images data
-    as a base64 encoded byte strings.
+    as a base64 encoded byte strings. Pages that were rendered before (e.g.
+    during the scan) are read from the page cache. Concurrent requests for
+    the same document share one rendering.
+    """
+    document = crud.get_document(session=session, id=document_id)
+
+    if not document:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    file_provider = providers.get_file_provider(
+        project_config=document.project.config)
+
+    return await _coalesce(
+        request=request,
+        single_flight=single_flight,
+        key=("content", document_id),
+        file_provider=file_provider,
+        path=document.path,
+        func=functools.partial(core.get_page_contents, cache=page_cache)
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/{document_id}/content/stream",
+            summary="Stream Page Content",
+            response_class=fastapi.responses.StreamingResponse,
+            responses={
+                200: {"content": {"application/x-ndjson": {}},
+                      "description": "One page content (JSON) per line."}
+            })
+async def stream_document_content(
+    session: database.DatabaseDependency,
+    page_cache: services.PageCacheDependency,
+    document_id: int = fastapi.Path(
+        ...,
+        description="The unique identifier for the document (as an integer).",
+        examples=[1]
+    )
+) -> fastapi.responses.StreamingResponse:
+    """
+    Return the content of the document as newline-delimited JSON, with one
+    page per line in the format of the content endpoint. Each page is sent
+    as soon as it is read from the page cache or rendered, so the first
+    pages arrive before the whole document is rendered.
+    """
+    document = crud.get_document(session=session, id=document_id)
+
+    if not document:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    file_provider = providers.get_file_provider(
+        project_config=document.project.config)
+
+    async def stream(path: str) -> AsyncGenerator[bytes, None]:
+        # The response cancels the stream if the client disconnects, which
+        # abandons the pages that are still being rendered.
+        try:
+            async with file_provider(path) as provider:
+                async for content in core.iterate_page_contents(
+                    provider=provider,
+                    cache=page_cache
+                ):
+                    yield content.model_dump_json().encode("utf-8") + b"\n"
+        except asyncio.CancelledError:
+            providers.wasted_work.add(cancelled_requests=1)
+            raise
+
+    return fastapi.responses.StreamingResponse(
+        stream(document.path),
+        media_type="application/x-ndjson"
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/{document_id}/page",
+            summary="Get Pages")
+async def get_document_pages(
+    session: database.DatabaseDependency,
+    page_cache: services.PageCacheDependency,
+    single_flight: services.SingleFlightDependency,
+    request: fastapi.Request,
+    document_id: int = fastapi.Path(
+        ...,
+        description="The unique identifier for the document (as an integer).",
+        examples=[1]
+    )
+) -> schemas.FileInfoSchema:
+    """
+    Return the number of pages of the document and their sizes, without
+    rendering them. The pages are loaded from the image endpoint.
+    """
+    document = crud.get_document(session=session, id=document_id)
+
+    if not document:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    file_provider = providers.get_file_provider(
+        project_config=document.project.config)
+
+    return await _coalesce(
+        request=request,
+        single_flight=single_flight,
+        key=("info", document_id),
+        file_provider=file_provider,
+        path=document.path,
+        func=functools.partial(core.get_file_info, cache=page_cache)
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/{document_id}/page/{page}/image",
+            summary="Get Page Image",
+            response_class=fastapi.Response,
+            responses={
+                200: {"content": {"image/jpeg": {}, "image/png": {},
+                                  "image/webp": {}, "image/avif": {}},
+                      "description": "The rendered page."},
+                206: {"description": "A byte range of the rendered page."},
+                304: {"description": "The page has not changed."},
+                416: {"description": "The byte range is not satisfiable."}
+            })
+async def get_document_page_image(
+    session: database.DatabaseDependency,
+    page_cache: services.PageCacheDependency,
+    single_flight: services.SingleFlightDependency,
+    request: fastapi.Request,
+    document_id: int = fastapi.Path(
+        ...,
+        description="The unique identifier for the document (as an integer).",
+        examples=[1]
+    ),
+    page: int = fastapi.Path(
+        ...,
+        description="The page number in the document (starting from 1).",
+        examples=[1],
+        ge=1
+    ),
+    profile: schemas.PageProfile = fastapi.Query(
+        default=schemas.PageProfile.full,
+        description="The output profile: 'preview' downscales the page to "
+                    "the preview size of the project, 'full' keeps the "
+                    "render resolution.",
+        examples=[schemas.PageProfile.preview]
+    ),
+    accept: Optional[str] = fastapi.Header(
+        default=None,
+        description="The image formats that the browser can display."
+    ),
+    if_none_match: Optional[str] = fastapi.Header(
+        default=None,
+        description="The entity tags of cached versions of the page."
+    ),
+    range: Optional[str] = fastapi.Header(
+        default=None,
+        description="A single byte range of the page (e.g. 'bytes=0-1023')."
+    ),
+    if_range: Optional[str] = fastapi.Header(
+        default=None,
+        description="The range is only sent if the page still has this "
+                    "entity tag."
+    )
+) -> fastapi.Response:
+    """
+    Return a page of the document as an image, in the best format that the
+    browser accepts (e.g. WebP or AVIF). The entity tag of the page is
+    derived from the version of the file, so unchanged pages are confirmed
+    with 304 Not Modified before they are read from the page cache or
+    rendered. Concurrent requests for the same page, profile and format
+    share one rendering.
+    """
+    document = crud.get_document(session=session, id=document_id)
+
+    if not document:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    file_provider = providers.get_file_provider(
+        project_config=document.project.config)
+
+    config = services.get_configuration()
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"private, max-age={config.page_cache.max_age}",
+        "Vary": "Accept"
+    }
+
+    async with file_provider(document.path) as provider:
+        format = _negotiate_format(accept, provider.config.image_formats)
+        max_size = provider.config.preview_size \
+            if profile == schemas.PageProfile.preview else None
+
+        fingerprint = await provider.fingerprint()
+
+        if fingerprint is not None:
+            headers["ETag"] = core.get_page_etag(
+                fingerprint, page, provider.config, format, max_size)
+            if _matches_etag(if_none_match, headers["ETag"]):
+                return fastapi.Response(
+                    status_code=fastapi.status.HTTP_304_NOT_MODIFIED,
+                    headers=headers
+                )
+
+    image = await _coalesce(
+        request=request,
+        single_flight=single_flight,
+        key=("image", document_id, page, profile, format, fingerprint),
+        file_provider=file_provider,
+        path=document.path,
+        func=functools.partial(
+            core.get_page_image,
+            cache=page_cache,
+            page=page,
+            fingerprint=fingerprint,
+            format=format,
+            max_size=max_size
+        )
+    )
+
+    if image is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Page not found"
+        )
+
+    data, format = image
+    media_type = f"image/{format.lower()}"
+
+    # Without the version of the file, the entity tag is derived from the
+    # rendered page.
+    if "ETag" not in headers:
+        headers["ETag"] = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+        if _matches_etag(if_none_match, headers["ETag"]):
+            return fastapi.Response(
+                status_code=fastapi.status.HTTP_304_NOT_MODIFIED,
+                headers=headers
+            )
+
+    if range is None or (if_range is not None and
+                         if_range.strip() != headers["ETag"]):
+        return fastapi.Response(
+            content=data, media_type=media_type, headers=headers)
+
+    byte_range = _get_byte_range(range, len(data))
+    if byte_range is None:
+        return fastapi.Response(
+            content=data, media_type=media_type, headers=headers)
+
+    first, last = byte_range
+    headers["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+
+    return fastapi.Response(
+        content=data[first:last + 1],
+        status_code=fastapi.status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/{document_id}/page/{page}/tiles",
+            summary="Get Page Tiles")
+async def get_document_page_tiles(
+    session: database.DatabaseDependency,
+    page_cache: services.PageCacheDependency,
+    single_flight: services.SingleFlightDependency,
+    request: fastapi.Request,
+    document_id: int = fastapi.Path(
+        ...,
+        description="The unique identifier for the document (as an integer).",
+        examples=[1]
+    ),
+    page: int = fastapi.Path(
+        ...,
+        description="The page number in the document (starting from 1).",
+        examples=[1],
+        ge=1
+    )
+) -> schemas.TilePyramidSchema:
+    """
+    Return the zoom levels of a page, whose tiles are loaded from the tile
+    endpoint.
     """
     document = crud.get_document(session=session, id=document_id)
 
@@ -89,10 +438,162 @@ async def get_document_content(
     file_provider = providers.get_file_provider(
         project_config=document.project.config)
 
+    pyramid = await _coalesce(
+        request=request,
+        single_flight=single_flight,
+        key=("tiles", document_id, page),
+        file_provider=file_provider,
+        path=document.path,
+        func=functools.partial(
+            core.get_tile_pyramid, cache=page_cache, page=page)
+    )
+
+    if pyramid is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Page not found"
+        )
+
+    return pyramid
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/{document_id}/page/{page}/tile/{level}/{x}/{y}",
+            summary="Get Page Tile",
+            response_class=fastapi.Response,
+            responses={
+                200: {"content": {"image/jpeg": {}, "image/png": {},
+                                  "image/webp": {}, "image/avif": {}},
+                      "description": "The tile of the page."},
+                304: {"description": "The tile has not changed."}
+            })
+async def get_document_page_tile(
+    session: database.DatabaseDependency,
+    page_cache: services.PageCacheDependency,
+    single_flight: services.SingleFlightDependency,
+    request: fastapi.Request,
+    document_id: int = fastapi.Path(
+        ...,
+        description="The unique identifier for the document (as an integer).",
+        examples=[1]
+    ),
+    page: int = fastapi.Path(
+        ...,
+        description="The page number in the document (starting from 1).",
+        examples=[1],
+        ge=1
+    ),
+    level: int = fastapi.Path(
+        ...,
+        description="The zoom level (0 is the full render resolution).",
+        examples=[0],
+        ge=0
+    ),
+    x: int = fastapi.Path(
+        ...,
+        description="The column of the tile (starting from 0).",
+        examples=[0],
+        ge=0
+    ),
+    y: int = fastapi.Path(
+        ...,
+        description="The row of the tile (starting from 0).",
+        examples=[0],
+        ge=0
+    ),
+    accept: Optional[str] = fastapi.Header(
+        default=None,
+        description="The image formats that the browser can display."
+    ),
+    if_none_match: Optional[str] = fastapi.Header(
+        default=None,
+        description="The entity tags of cached versions of the tile."
+    )
+) -> fastapi.Response:
+    """
+    Return a tile of a zoom level of a page as an image, in the best format
+    that the browser accepts. All tiles of a level are created (and cached)
+    when the first of them is requested, concurrent requests for tiles of
+    the same level share the creation.
+    """
+    document = crud.get_document(session=session, id=document_id)
+
+    if not document:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    file_provider = providers.get_file_provider(
+        project_config=document.project.config)
+
+    config = services.get_configuration()
+
+    headers = {
+        "Cache-Control": f"private, max-age={config.page_cache.max_age}",
+        "Vary": "Accept"
+    }
+
     async with file_provider(document.path) as provider:
-        images = await provider.read_as_base64_images()
+        format = _negotiate_format(accept, provider.config.image_formats)
+
+        fingerprint = await provider.fingerprint()
+
+        if fingerprint is not None:
+            headers["ETag"] = core.get_tile_etag(
+                fingerprint, page, provider.config, level, x, y, format)
+            if _matches_etag(if_none_match, headers["ETag"]):
+                return fastapi.Response(
+                    status_code=fastapi.status.HTTP_304_NOT_MODIFIED,
+                    headers=headers
+                )
+
+        tile = await core.get_cached_tile(
+            provider=provider,
+            cache=page_cache,
+            page=page,
+            level=level,
+            x=x,
+            y=y,
+            fingerprint=fingerprint,
+            format=format
+        )
 
-    return images
+    if tile is None:
+        # The requests for the tiles of a level share a single creation of
+        # the level, each takes its tile from the result.
+        tiles = await _coalesce(
+            request=request,
+            single_flight=single_flight,
+            key=("tile-level", document_id, page, level, format, fingerprint),
+            file_provider=file_provider,
+            path=document.path,
+            func=functools.partial(
+                core.get_page_tiles,
+                cache=page_cache,
+                page=page,
+                level=level,
+                fingerprint=fingerprint,
+                format=format
+            )
+        )
+        if tiles is not None and (x, y) in tiles[0]:
+            tile = tiles[0][(x, y)], tiles[1]
+
+    if tile is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Tile not found"
+        )
+
+    data, format = tile
+
+    return fastapi.Response(
+        content=data,
+        media_type=f"image/{format.lower()}",
+        headers=headers
+    )
 
 # ---------------------------------------------------------------------------- #
 
@@ -303,3 +804,144 @@ async def update_status(
     }
 
 # ---------------------------------------------------------------------------- #
+
+
+async def _coalesce(
+    request: fastapi.Request,
+    single_flight: services.SingleFlight,
+    key: Tuple[Any, ...],
+    file_provider: providers.BaseFileProvider,
+    path: str,
+    func: Callable[[providers.BaseFileProvider], Awaitable[T]]
+) -> T:
+    """
+    Call func with the provider of a file, or share the result of a
+    concurrent request with the same key, so that the file is read and
+    rendered only once. The provider is opened for the shared call, so it
+    stays open if the request that started it is cancelled. If the client
+    disconnects first, the request stops waiting (and the call is cancelled
+    if no other request waits for it).
+    """
+    async def run() -> T:
+        async with file_provider(path) as provider:
+            return await func(provider)
+
+    result = asyncio.ensure_future(single_flight.run(key, run))
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait(
+            {result, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        result.cancel()
+
+    if not result.done():
+        providers.wasted_work.add(cancelled_requests=1)
+        raise fastapi.HTTPException(
+            status_code=_CLIENT_CLOSED_REQUEST,
+            detail="Client disconnected"
+        )
+
+    return result.result()
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _wait_for_disconnect(request: fastapi.Request) -> None:
+    """
+    Returns when the client of a request disconnects.
+    """
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+# ---------------------------------------------------------------------------- #
+
+
+def _matches_etag(header: Optional[str], etag: str) -> bool:
+    """
+    Returns whether an If-None-Match header matches an entity tag (weak
+    comparison, as for conditional GET requests).
+    """
+    if header is None:
+        return False
+
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+# ---------------------------------------------------------------------------- #
+
+
+def _negotiate_format(
+    header: Optional[str],
+    formats: List[str]
+) -> str | None:
+    """
+    Returns the first of the given image formats that an Accept header
+    explicitly allows (wildcards do not count, as browsers send them for
+    formats they can not display), or None to keep the rendered format.
+    """
+    if header is None:
+        return None
+
+    accepted = set()
+    for media_range in header.split(","):
+        media_type, *parameters = media_range.split(";")
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(media_type.strip().lower())
+
+    for format in formats:
+        if f"image/{format.lower()}" not in accepted:
+            continue
+        if providers.can_save(format):
+            return format.upper()
+
+    return None
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_byte_range(header: str, size: int) -> Tuple[int, int] | None:
+    """
+    Returns the first and last byte of a single byte range. Returns None if
+    the header is invalid or asks for several ranges (the whole page is
+    sent then) and raises 416 if the range is not satisfiable.
+    """
+    unit, _, ranges = header.partition("=")
+    first, separator, last = ranges.strip().partition("-")
+
+    if unit.strip().lower() != "bytes" or "," in ranges or not separator:
+        return None
+
+    try:
+        if not first:
+            # A suffix range (the last bytes of the page).
+            byte_range = (max(0, size - int(last)), size - 1)
+            satisfiable = int(last) > 0
+        else:
+            byte_range = (int(first), min(int(last or size - 1), size - 1))
+            satisfiable = int(first) < size
+            if last and int(last) < int(first):
+                return None
+    except ValueError:
+        return None
+
+    if not satisfiable or size == 0:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    return byte_range
+
+# ---------------------------------------------------------------------------- #
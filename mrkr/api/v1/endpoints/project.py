@@ -232,6 +232,40 @@ async def scan_project(
 # ---------------------------------------------------------------------------- #
 
 
+@router.post("/{project_id}/rebuild", summary="Rebuild Label Data")
+async def rebuild_project_data(
+    session: database.DatabaseDependency,
+    worker: services.WorkerPoolDependency,
+    project_id: int = fastapi.Path(
+        ...,
+        description="The unique identifier for the project (as an integer).",
+        examples=[1]
+    )
+) -> Dict:
+    """
+    Rebuild the label data of all documents in a project from their stored
+    OCR results. Existing labels are kept where the block ids match.
+    """
+    project = crud.get_project(session=session, id=project_id)
+
+    if not project:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    worker.submit(
+        core.rebuild_project_data,
+        project_id=project.id
+    )
+
+    return {
+        "message": f"Rebuild scheduled for project {project_id}."
+    }
+
+# ---------------------------------------------------------------------------- #
+
+
 @router.get("/{project_id}/list-documents", summary="List Documents")
 async def list_project_documents(
     session: database.DatabaseDependency,
@@ -4,7 +4,9 @@ import fastapi
 
 # ---------------------------------------------------------------------------- #
 
+import mrkr.providers as providers
 import mrkr.schemas as schemas
+import mrkr.services as services
 
 # ---------------------------------------------------------------------------- #
 
@@ -25,3 +27,20 @@ async def utils_health() -> schemas.HealthSchema:
     )
 
 # ---------------------------------------------------------------------------- #
+
+
+@router.get("/metrics", summary="Metrics")
+async def utils_metrics(
+    page_cache: services.PageCacheDependency,
+    single_flight: services.SingleFlightDependency
+) -> schemas.MetricsSchema:
+    """
+    Return the metrics of the api (e.g. the hit rate of the page cache).
+    """
+    return schemas.MetricsSchema(
+        page_cache=page_cache.metrics() if page_cache else None,
+        flights=single_flight.metrics(),
+        wasted_work=providers.wasted_work.metrics()
+    )
+
+# ---------------------------------------------------------------------------- #
@@ -3,5 +3,10 @@
 from .app import create_app
 from .scan import scan_project, scan_document
 from .scan import scan_project_sync, scan_document_sync
+from .rebuild import rebuild_project_data, rebuild_document_data
+from .pages import get_page_contents, iterate_page_contents, \
+    get_page_content, get_page_count, get_page_image, get_page_etag, \
+    get_file_info, get_tile_pyramid, get_page_tile, get_cached_tile, \
+    get_page_tiles, get_tile_etag, create_thumbnail, store_pages
 
 # ---------------------------------------------------------------------------- #
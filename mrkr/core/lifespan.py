@@ -11,6 +11,7 @@ from typing import AsyncGenerator
 # ---------------------------------------------------------------------------- #
 
 import mrkr.database as database
+import mrkr.providers as providers
 import mrkr.services as services
 
 # ---------------------------------------------------------------------------- #
@@ -32,6 +33,12 @@ async def lifespan(app: fastapi.FastAPI) -> AsyncGenerator[None, None]:
 
     worker_pool = services.get_worker_pool()
 
+    # The number of rendering and OCR processes that may run at a time
+    # (defaults to the number of cores).
+    config = services.get_configuration()
+    if config.backend.cpu_budget:
+        providers.cpu_budget.resize(config.backend.cpu_budget)
+
     logger.info("Application startup complete.")
 
     yield
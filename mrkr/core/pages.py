@@ -0,0 +1,934 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import base64
+import functools
+import hashlib
+import io
+import logging
+import math
+from PIL import Image
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, \
+    Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+import mrkr.services as services
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.core")
+
+# ---------------------------------------------------------------------------- #
+
+# The width and height of the tiles of the zoom levels of a page.
+_TILE_SIZE = 512
+
+# The formats of the thumbnails of the first pages (the first one that PIL
+# can encode is used).
+_THUMBNAIL_FORMATS = ("WEBP", "JPEG")
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_page_contents(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache]
+) -> List[schemas.PageContentSchema]:
+    """
+    Returns the pages of the file of a provider as base64 encoded images for
+    the viewer. Cached pages are read from the page cache. If the number of
+    pages is known, only the missing pages are rendered (and stored in the
+    cache), otherwise the whole file is rendered.
+    """
+    fingerprint = await provider.fingerprint() if cache else None
+
+    if cache is None or fingerprint is None:
+        return await provider.read_as_base64_images()
+
+    loop = asyncio.get_running_loop()
+
+    pages = await loop.run_in_executor(
+        None,
+        functools.partial(
+            _read_pages,
+            cache=cache,
+            fingerprint=fingerprint,
+            config=provider.config
+        )
+    )
+
+    if pages is None:
+        logger.debug(f"Rendering pages of '{provider.path}'.")
+        images = await provider.read_as_images()
+        pages = list(await store_pages(
+            provider=provider,
+            cache=cache,
+            images=images,
+            fingerprint=fingerprint,
+            page_count=len(images)
+        ))
+
+    for first, last in _get_missing_ranges(pages):
+        logger.debug(f"Rendering pages {first}-{last} of '{provider.path}'.")
+        for page, image in await _render_pages(
+                provider=provider, first_page=first, last_page=last):
+            stored = await store_pages(
+                provider=provider,
+                cache=cache,
+                images=[image],
+                fingerprint=fingerprint,
+                first_page=page
+            )
+            pages[page - 1] = stored[0]
+
+    return [
+        await _create_page_content(data=data, page=index + 1)
+        for index, data in enumerate(pages) if data is not None
+    ]
+
+# ---------------------------------------------------------------------------- #
+
+
+async def iterate_page_contents(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache]
+) -> AsyncGenerator[schemas.PageContentSchema, None]:
+    """
+    Like get_page_contents, but yields the pages in order as soon as they
+    are read from the page cache or rendered, so that a response can be sent
+    page by page. Runs of missing pages are rendered at once, but only one
+    page at a time is encoded for the viewer.
+    """
+    fingerprint = await provider.fingerprint() if cache else None
+
+    loop = asyncio.get_running_loop()
+
+    count = None
+    if cache is not None and fingerprint is not None:
+        data = await loop.run_in_executor(
+            None, cache.get, _get_count_key(fingerprint, provider.config))
+        if data is not None:
+            count = int(data)
+
+    if cache is None or fingerprint is None or count is None:
+        # The number of pages is unknown, so the whole file is rendered.
+        logger.debug(f"Rendering pages of '{provider.path}'.")
+        page = 0
+        async for image in provider.iterate_images():
+            page += 1
+            yield await _create_page_content(
+                data=await _encode_page(
+                    provider=provider,
+                    cache=cache,
+                    image=image,
+                    fingerprint=fingerprint,
+                    page=page
+                ),
+                page=page
+            )
+
+        if cache is not None and fingerprint is not None:
+            await loop.run_in_executor(
+                None,
+                cache.put,
+                _get_count_key(fingerprint, provider.config),
+                str(page).encode("ascii")
+            )
+        return
+
+    page = 1
+    while page <= count:
+        data = await loop.run_in_executor(
+            None, cache.get, _get_page_key(fingerprint, page, provider.config))
+        if data is not None:
+            yield await _create_page_content(data=data, page=page)
+            page += 1
+            continue
+
+        last = await loop.run_in_executor(
+            None,
+            functools.partial(
+                _get_missing_run,
+                cache=cache,
+                fingerprint=fingerprint,
+                config=provider.config,
+                first_page=page,
+                page_count=count
+            )
+        )
+
+        logger.debug(f"Rendering pages {page}-{last} of '{provider.path}'.")
+        index = page
+        async for image in provider.iterate_images(page=page, last_page=last):
+            yield await _create_page_content(
+                data=await _encode_page(
+                    provider=provider,
+                    cache=cache,
+                    image=image,
+                    fingerprint=fingerprint,
+                    page=index
+                ),
+                page=index
+            )
+            index += 1
+
+        # Pages that could not be rendered are left out.
+        page = last + 1
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_page_content(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int
+) -> schemas.PageContentSchema | None:
+    """
+    Returns a single page of the file of a provider as a base64 encoded
+    image for the viewer (None if the file has no such page). Only this page
+    is rendered if it is not cached.
+    """
+    image = await get_page_image(provider=provider, cache=cache, page=page)
+    if image is None:
+        return None
+
+    data, _ = image
+    return await _create_page_content(data=data, page=page)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_page_image(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int,
+    fingerprint: Optional[str] = None,
+    format: Optional[str] = None,
+    max_size: Optional[int] = None
+) -> Tuple[bytes, str] | None:
+    """
+    Returns a single page of the file of a provider as an encoded image and
+    its format (None if the file has no such page). Only this page is
+    rendered if it is not cached. If a format or a maximum width and height
+    are given, the page is converted and the variant is cached as well.
+    """
+    if cache is not None and fingerprint is None:
+        fingerprint = await provider.fingerprint()
+
+    if format is None and max_size is None:
+        return await _get_encoded_page(
+            provider=provider,
+            cache=cache,
+            page=page,
+            fingerprint=fingerprint
+        )
+
+    loop = asyncio.get_running_loop()
+
+    key = None
+    if cache is not None and fingerprint is not None:
+        key = _get_variant_key(fingerprint, page, provider.config,
+                               format, max_size)
+        data = await loop.run_in_executor(None, cache.get, key)
+        if data is not None:
+            return data, await loop.run_in_executor(None, _get_format, data)
+
+    image = await _get_encoded_page(
+        provider=provider,
+        cache=cache,
+        page=page,
+        fingerprint=fingerprint
+    )
+    if image is None:
+        return None
+
+    data, base_format = image
+    format = (format or base_format).upper()
+    variant = await providers.cpu_budget.run_in_executor(
+        providers.convert_image,
+        data=data,
+        format=format,
+        quality=provider.config.image_quality,
+        max_size=max_size
+    )
+
+    # The page is used as it is if it already has the format and size.
+    if variant is None:
+        return image
+
+    if cache is not None and key is not None:
+        await loop.run_in_executor(None, cache.put, key, variant)
+
+    return variant, format
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_page_etag(
+    fingerprint: str,
+    page: int,
+    config: schemas.FileProviderConfigSchema,
+    format: Optional[str] = None,
+    max_size: Optional[int] = None
+) -> str:
+    """
+    Returns the strong entity tag of a rendered page (or of one of its
+    variants). It only depends on the version of the file and the rendering
+    options, so it is known before the page is rendered.
+    """
+    key = repr(_get_variant_key(fingerprint, page, config, format, max_size))
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_tile_pyramid(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int
+) -> schemas.TilePyramidSchema | None:
+    """
+    Returns the zoom levels of a page (None if the file has no such page),
+    so that a viewer can load only the visible tiles of large pages.
+    """
+    image = await get_page_image(provider=provider, cache=cache, page=page)
+    if image is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+
+    width, height = await loop.run_in_executor(None, _get_size, image[0])
+
+    return schemas.TilePyramidSchema(
+        page=page,
+        width=width,
+        height=height,
+        tile_size=_TILE_SIZE,
+        levels=_get_levels(width, height)
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_page_tile(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int,
+    level: int,
+    x: int,
+    y: int,
+    fingerprint: Optional[str] = None,
+    format: Optional[str] = None
+) -> Tuple[bytes, str] | None:
+    """
+    Returns a tile (in column x and row y) of a zoom level of a page and its
+    format (None if there is no such page or tile). The tile is read from
+    the page cache, otherwise all tiles of the level are created (see
+    get_page_tiles).
+    """
+    if cache is not None and fingerprint is None:
+        fingerprint = await provider.fingerprint()
+
+    tile = await get_cached_tile(
+        provider=provider,
+        cache=cache,
+        page=page,
+        level=level,
+        x=x,
+        y=y,
+        fingerprint=fingerprint,
+        format=format
+    )
+    if tile is not None:
+        return tile
+
+    tiles = await get_page_tiles(
+        provider=provider,
+        cache=cache,
+        page=page,
+        level=level,
+        fingerprint=fingerprint,
+        format=format
+    )
+    if tiles is None:
+        return None
+
+    data = tiles[0].get((x, y))
+    return (data, tiles[1]) if data is not None else None
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_cached_tile(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int,
+    level: int,
+    x: int,
+    y: int,
+    fingerprint: Optional[str] = None,
+    format: Optional[str] = None
+) -> Tuple[bytes, str] | None:
+    """
+    Returns a tile of a zoom level of a page and its format if it is in the
+    page cache, without reading the file.
+    """
+    if cache is None:
+        return None
+
+    if fingerprint is None:
+        fingerprint = await provider.fingerprint()
+        if fingerprint is None:
+            return None
+
+    format = (format or provider.config.image_format).upper()
+
+    loop = asyncio.get_running_loop()
+
+    data = await loop.run_in_executor(
+        None,
+        cache.get,
+        _get_tile_key(fingerprint, page, provider.config, level, x, y, format)
+    )
+    return (data, format) if data is not None else None
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_page_tiles(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int,
+    level: int,
+    fingerprint: Optional[str] = None,
+    format: Optional[str] = None
+) -> Tuple[Dict[Tuple[int, int], bytes], str] | None:
+    """
+    Creates all tiles of a zoom level of a page and returns them by their
+    column and row, along with their format (None if there is no such page
+    or level). The page is decoded and scaled once for all tiles of the
+    level, which are cached together.
+    """
+    if cache is not None and fingerprint is None:
+        fingerprint = await provider.fingerprint()
+
+    format = (format or provider.config.image_format).upper()
+
+    loop = asyncio.get_running_loop()
+
+    image = await _get_encoded_page(
+        provider=provider,
+        cache=cache,
+        page=page,
+        fingerprint=fingerprint
+    )
+    if image is None:
+        return None
+
+    width, height = await loop.run_in_executor(None, _get_size, image[0])
+    if level >= _get_levels(width, height):
+        return None
+
+    logger.debug(f"Creating tiles of level {level} of page {page} of "
+                 f"'{provider.path}'.")
+
+    tiles = await providers.cpu_budget.run_in_executor(
+        providers.create_tiles,
+        data=image[0],
+        level=level,
+        tile_size=_TILE_SIZE,
+        format=format,
+        quality=provider.config.image_quality
+    )
+
+    if cache is not None and fingerprint is not None:
+        await loop.run_in_executor(
+            None,
+            functools.partial(
+                _store_tiles,
+                cache=cache,
+                tiles=tiles,
+                key=functools.partial(_get_tile_key, fingerprint, page,
+                                      provider.config, level, format=format)
+            )
+        )
+
+    return tiles, format
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_tile_etag(
+    fingerprint: str,
+    page: int,
+    config: schemas.FileProviderConfigSchema,
+    level: int,
+    x: int,
+    y: int,
+    format: Optional[str] = None
+) -> str:
+    """
+    Returns the strong entity tag of a tile of a zoom level of a page (known
+    before the tile is created).
+    """
+    format = (format or config.image_format).upper()
+    key = repr(_get_tile_key(fingerprint, page, config, level, x, y, format))
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_file_info(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache]
+) -> schemas.FileInfoSchema:
+    """
+    Returns the number of pages of the file of a provider and their sizes,
+    so that the viewer can lay out the pages before they are loaded. The
+    info is read from the page cache or with pdfinfo (without rendering the
+    file).
+    """
+    fingerprint = await provider.fingerprint() if cache else None
+
+    loop = asyncio.get_running_loop()
+
+    if cache is not None and fingerprint is not None:
+        data = await loop.run_in_executor(
+            None, cache.get, _get_info_key(fingerprint, provider.config))
+        if data is not None:
+            return schemas.FileInfoSchema.model_validate_json(data)
+
+    info = await provider.read_info()
+
+    if cache is not None and fingerprint is not None:
+        await loop.run_in_executor(
+            None,
+            cache.put,
+            _get_info_key(fingerprint, provider.config),
+            info.model_dump_json().encode("utf-8")
+        )
+
+    return info
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_page_count(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache]
+) -> int:
+    """
+    Returns the number of pages of the file of a provider. The number is
+    read from the page cache or with pdfinfo (without rendering the file).
+    """
+    fingerprint = await provider.fingerprint() if cache else None
+
+    loop = asyncio.get_running_loop()
+
+    if cache is not None and fingerprint is not None:
+        count = await loop.run_in_executor(
+            None, cache.get, _get_count_key(fingerprint, provider.config))
+        if count is not None:
+            return int(count)
+
+    info = await provider.read_info()
+
+    if cache is not None and fingerprint is not None:
+        await loop.run_in_executor(
+            None,
+            cache.put,
+            _get_count_key(fingerprint, provider.config),
+            str(info.pages).encode("ascii")
+        )
+
+    return info.pages
+
+# ---------------------------------------------------------------------------- #
+
+
+async def create_thumbnail(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache]
+) -> Tuple[bytes, str]:
+    """
+    Returns a thumbnail of the first page of the file of a provider and its
+    format. The thumbnail is scaled down from the cached first page if there
+    is one, otherwise the first page is read at the size of the thumbnail.
+    """
+    config = provider.config
+    format = next(
+        format for format in _THUMBNAIL_FORMATS if providers.can_save(format))
+
+    fingerprint = await provider.fingerprint() if cache else None
+
+    loop = asyncio.get_running_loop()
+
+    data = None
+    if cache is not None and fingerprint is not None:
+        data = await loop.run_in_executor(
+            None,
+            cache.get,
+            _get_page_key(fingerprint, 1, config)
+        )
+
+    if data is not None:
+        thumbnail = await providers.cpu_budget.run_in_executor(
+            providers.convert_image,
+            data=data,
+            format=format,
+            quality=config.image_quality,
+            max_size=config.thumbnail_size
+        )
+        return thumbnail or data, format
+
+    image = await provider.read_thumbnail(max_size=config.thumbnail_size)
+
+    thumbnail = await providers.cpu_budget.run_in_executor(
+        providers.save_image,
+        image=image,
+        format=format,
+        quality=config.image_quality
+    )
+    return thumbnail, format
+
+# ---------------------------------------------------------------------------- #
+
+
+async def store_pages(
+    provider: providers.BaseFileProvider,
+    cache: services.PageCache,
+    images: List[Image.Image],
+    fingerprint: Optional[str] = None,
+    first_page: int = 1,
+    page_count: Optional[int] = None
+) -> List[bytes]:
+    """
+    Encode rendered pages (starting at first_page) for the viewer and store
+    them in the page cache, along with the number of pages of the file if
+    it is given. Nothing is stored if the version of the file is unknown.
+    Returns the encoded pages.
+    """
+    if fingerprint is None:
+        fingerprint = await provider.fingerprint()
+
+    loop = asyncio.get_running_loop()
+
+    pages = []
+    for index, image in enumerate(images):
+        data, _ = await provider.encode_image(image=image)
+        pages.append(data)
+
+        if fingerprint is not None:
+            await loop.run_in_executor(
+                None,
+                cache.put,
+                _get_page_key(fingerprint, first_page + index,
+                              provider.config),
+                data
+            )
+
+    if fingerprint is not None and page_count is not None:
+        await loop.run_in_executor(
+            None,
+            cache.put,
+            _get_count_key(fingerprint, provider.config),
+            str(page_count).encode("ascii")
+        )
+
+    return pages
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _encode_page(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    image: Image.Image,
+    fingerprint: Optional[str],
+    page: int
+) -> bytes:
+    """
+    Encode a rendered page for the viewer and store it in the page cache if
+    the version of the file is known.
+    """
+    if cache is not None and fingerprint is not None:
+        pages = await store_pages(
+            provider=provider,
+            cache=cache,
+            images=[image],
+            fingerprint=fingerprint,
+            first_page=page
+        )
+        return pages[0]
+
+    data, _ = await provider.encode_image(image=image)
+    return data
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _get_encoded_page(
+    provider: providers.BaseFileProvider,
+    cache: Optional[services.PageCache],
+    page: int,
+    fingerprint: Optional[str]
+) -> Tuple[bytes, str] | None:
+    """
+    Returns a single page as it is rendered for the viewer and its format,
+    from the page cache if possible.
+    """
+    loop = asyncio.get_running_loop()
+
+    if cache is not None and fingerprint is not None:
+        data = await loop.run_in_executor(
+            None,
+            cache.get,
+            _get_page_key(fingerprint, page, provider.config)
+        )
+        if data is not None:
+            return data, await loop.run_in_executor(None, _get_format, data)
+
+    images = await provider.read_as_images(page=page)
+    if not images:
+        return None
+
+    if cache is not None:
+        pages = await store_pages(
+            provider=provider,
+            cache=cache,
+            images=images,
+            fingerprint=fingerprint,
+            first_page=page
+        )
+        return pages[0], await loop.run_in_executor(
+            None, _get_format, pages[0])
+
+    data, format = await provider.encode_image(image=images[0])
+    return data, format.upper()
+
+# ---------------------------------------------------------------------------- #
+
+
+def _store_tiles(
+    cache: services.PageCache,
+    tiles: Dict[Tuple[int, int], bytes],
+    key: Callable[[int, int], Tuple[Any, ...]]
+) -> None:
+    """
+    Store the tiles of a zoom level in the page cache (blocking).
+    """
+    for (x, y), data in tiles.items():
+        cache.put(key(x, y), data)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_levels(width: int, height: int) -> int:
+    """
+    Returns the number of zoom levels of a page, down to the level that fits
+    into a single tile.
+    """
+    return max(0, math.ceil(math.log2(max(width, height) / _TILE_SIZE))) + 1
+
+# ---------------------------------------------------------------------------- #
+
+
+def _read_pages(
+    cache: services.PageCache,
+    fingerprint: str,
+    config: schemas.FileProviderConfigSchema
+) -> List[bytes | None] | None:
+    """
+    Returns the cached pages of a file (None for pages that are not cached),
+    or None if the number of pages is unknown (blocking).
+    """
+    count = cache.get(_get_count_key(fingerprint, config))
+    if count is None:
+        return None
+
+    return [
+        cache.get(_get_page_key(fingerprint, page, config))
+        for page in range(1, int(count) + 1)
+    ]
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_missing_run(
+    cache: services.PageCache,
+    fingerprint: str,
+    config: schemas.FileProviderConfigSchema,
+    first_page: int,
+    page_count: int
+) -> int:
+    """
+    Returns the last page of the run of missing pages that starts at
+    first_page (blocking).
+    """
+    last_page = first_page
+    while last_page < page_count and not cache.contains(
+            _get_page_key(fingerprint, last_page + 1, config)):
+        last_page += 1
+    return last_page
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _render_pages(
+    provider: providers.BaseFileProvider,
+    first_page: int,
+    last_page: int
+) -> List[Tuple[int, Image.Image]]:
+    """
+    Render a run of pages and return the images with their page numbers.
+    Poppler leaves out pages it can not render (e.g. of a truncated file),
+    so if fewer pages are returned, the images can not be matched to their
+    pages and the run is rendered again page by page. Pages that can not be
+    rendered are left out.
+    """
+    images = await provider.read_as_images(
+        page=first_page, last_page=last_page)
+    if len(images) >= last_page - first_page + 1:
+        return list(zip(range(first_page, last_page + 1), images))
+
+    pages: List[Tuple[int, Image.Image]] = []
+    if first_page == last_page:
+        return pages
+
+    logger.debug(f"Rendering pages {first_page}-{last_page} of "
+                 f"'{provider.path}' one at a time.")
+    for page in range(first_page, last_page + 1):
+        images = await provider.read_as_images(page=page, last_page=page)
+        if images:
+            pages.append((page, images[0]))
+    return pages
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_missing_ranges(pages: List[bytes | None]) -> List[Tuple[int, int]]:
+    """
+    Returns the first and last page numbers of the runs of missing pages,
+    so that each run can be rendered at once.
+    """
+    ranges: List[Tuple[int, int]] = []
+    for index, data in enumerate(pages):
+        if data is not None:
+            continue
+        if ranges and ranges[-1][1] == index:
+            ranges[-1] = (ranges[-1][0], index + 1)
+        else:
+            ranges.append((index + 1, index + 1))
+    return ranges
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _create_page_content(
+    data: bytes,
+    page: int
+) -> schemas.PageContentSchema:
+    """
+    Create the viewer content of an encoded page. Only the header of the
+    image is read for its size and mode.
+    """
+    loop = asyncio.get_running_loop()
+
+    image = await loop.run_in_executor(None, Image.open, io.BytesIO(data))
+    content = await loop.run_in_executor(None, base64.b64encode, data)
+
+    return schemas.PageContentSchema(
+        content=content.decode("ascii"),
+        page=page,
+        width=image.width,
+        height=image.height,
+        aspect_ratio=round(image.width / image.height, 7),
+        format=str(image.format).upper(),
+        mode=image.mode
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_format(data: bytes) -> str:
+    """
+    Returns the format of an encoded page (only its header is read).
+    """
+    return str(Image.open(io.BytesIO(data)).format).upper()
+
+
+def _get_size(data: bytes) -> Tuple[int, int]:
+    """
+    Returns the width and height of an encoded page (only its header is
+    read).
+    """
+    return Image.open(io.BytesIO(data)).size
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_page_key(
+    fingerprint: str,
+    page: int,
+    config: schemas.FileProviderConfigSchema
+) -> Tuple[Any, ...]:
+    """
+    Returns the cache key of a rendered page.
+    """
+    return ("page", fingerprint, page, config.pdf_dpi,
+            config.image_format.upper(), config.image_quality)
+
+
+def _get_variant_key(
+    fingerprint: str,
+    page: int,
+    config: schemas.FileProviderConfigSchema,
+    format: Optional[str],
+    max_size: Optional[int]
+) -> Tuple[Any, ...]:
+    """
+    Returns the cache key of a converted (or downscaled) rendered page.
+    """
+    return ("variant", *_get_page_key(fingerprint, page, config),
+            format and format.upper(), max_size)
+
+
+def _get_tile_key(
+    fingerprint: str,
+    page: int,
+    config: schemas.FileProviderConfigSchema,
+    level: int,
+    x: int,
+    y: int,
+    format: str
+) -> Tuple[Any, ...]:
+    """
+    Returns the cache key of a tile of a zoom level of a rendered page.
+    """
+    return ("tile", *_get_page_key(fingerprint, page, config),
+            _TILE_SIZE, level, x, y, format)
+
+
+def _get_info_key(
+    fingerprint: str,
+    config: schemas.FileProviderConfigSchema
+) -> Tuple[Any, ...]:
+    """
+    Returns the cache key of the page sizes of a file.
+    """
+    return ("info", fingerprint, config.pdf_dpi)
+
+
+def _get_count_key(
+    fingerprint: str,
+    config: schemas.FileProviderConfigSchema
+) -> Tuple[Any, ...]:
+    """
+    Returns the cache key of the number of pages of a file.
+    """
+    return ("pages", fingerprint, config.pdf_dpi)
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,159 @@
+# ---------------------------------------------------------------------------- #
+
+import logging
+import sqlmodel
+from typing import Dict, List
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+import mrkr.models as models
+import mrkr.crud as crud
+import mrkr.database as database
+from .scan import _initialize_label_pages
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.core")
+
+# ---------------------------------------------------------------------------- #
+
+
+def rebuild_project_data(
+    project_id: int,
+    session: sqlmodel.Session | None = None
+) -> None:
+    """
+    Rebuild the label data of all documents in a project from their stored
+    OCR results (without running the OCR again). Documents without a stored
+    OCR result are skipped.
+    """
+    logger.debug(f"Rebuilding label data of project {project_id}...")
+
+    try:
+        if not session:
+            session = next(database.get_database_session())
+
+        project = crud.get_project(session=session, id=project_id)
+
+        if not project:
+            raise Exception(f"Project with id {project_id} not found.")
+
+        documents = crud.get_project_documents(
+            session=session,
+            project_id=project.id
+        )
+
+        count = 0
+        for document in documents:
+            if rebuild_document_data(session=session, document=document):
+                count += 1
+
+        logger.debug(
+            f"Label data of {count} documents in project {project_id} "
+            f"rebuilt successfully.")
+    except Exception as exception:
+        logger.exception(exception)
+        logger.error(
+            f"Error rebuilding label data of project {project_id}: "
+            f"{exception}")
+
+# ---------------------------------------------------------------------------- #
+
+
+def rebuild_document_data(
+    session: sqlmodel.Session,
+    document: models.Document
+) -> bool:
+    """
+    Rebuild the label data of a document from its stored OCR result. Labels
+    of the document and of all pages and blocks whose ids did not change are
+    kept. Returns False if no OCR result is stored for the document.
+    """
+    document_ocr = crud.get_document_ocr(
+        session=session,
+        document_id=document.id
+    )
+
+    if len(document_ocr) == 0:
+        logger.debug(f"No OCR result stored for document {document.id}.")
+        return False
+
+    builder = providers.OcrResultBuilder()
+    for page in document_ocr:
+        builder.add_result(
+            result=providers.OcrResult.from_bytes(page.data))
+
+    label_data = schemas.DocumentLabelDataSchema(
+        pages=_initialize_label_pages(ocr_result=builder.build()),
+        label_status=schemas.LabelStatus.open,
+        labels=[]
+    )
+
+    if document.data is not None:
+        label_data = _merge_label_data(
+            previous=schemas.DocumentLabelDataSchema(**document.data),
+            current=label_data
+        )
+
+    status = document.status
+    if status == models.DocumentStatus.processing:
+        status = models.DocumentStatus.open
+
+    crud.update_document_data_and_status(
+        session=session,
+        document=document,
+        status=status,
+        data=label_data
+    )
+
+    return True
+
+# ---------------------------------------------------------------------------- #
+
+
+def _merge_label_data(
+    previous: schemas.DocumentLabelDataSchema,
+    current: schemas.DocumentLabelDataSchema
+) -> schemas.DocumentLabelDataSchema:
+    """
+    Copy the labels of the document and of all pages and blocks with
+    matching ids from the previous into the current label data. Text labels
+    that no longer fit into the content of their block are dropped.
+    """
+    current.labels = previous.labels
+    current.label_status = previous.label_status
+
+    pages: Dict[str, schemas.PageLabelDataSchema] = {
+        str(page.id): page for page in previous.pages
+    }
+    blocks: Dict[str, schemas.BlockLabelDataSchema] = {
+        str(block.id): block
+        for page in previous.pages for block in page.blocks
+    }
+
+    for page in current.pages:
+        previous_page = pages.get(str(page.id))
+        if previous_page:
+            page.labels = previous_page.labels
+            page.label_status = previous_page.label_status
+
+        for block in page.blocks:
+            previous_block = blocks.get(str(block.id))
+            if not previous_block:
+                continue
+
+            labels: List[schemas.LabelSchema | schemas.TextLabelSchema] = []
+            for label in previous_block.labels:
+                if isinstance(label, schemas.TextLabelSchema) and \
+                        (label.end or 0) > len(block.content):
+                    continue
+                labels.append(label)
+
+            block.labels = labels
+            block.label_status = previous_block.label_status
+
+    return current
+
+# ---------------------------------------------------------------------------- #
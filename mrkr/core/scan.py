@@ -4,7 +4,7 @@ import logging
 import functools
 import asyncio
 import sqlmodel
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
 # ---------------------------------------------------------------------------- #
 
@@ -13,6 +13,8 @@ import mrkr.schemas as schemas
 import mrkr.models as models
 import mrkr.crud as crud
 import mrkr.database as database
+import mrkr.services as services
+import mrkr.core.pages as pages
 
 # ---------------------------------------------------------------------------- #
 
@@ -156,6 +158,12 @@ async def scan_document(
                 ocr_provider=ocr_provider
             )
 
+            _store_document_ocr(
+                session=session,
+                document=document,
+                ocr_result=ocr_result
+            )
+
             await _create_document_data(
                 session=session,
                 document=document,
@@ -166,6 +174,16 @@ async def scan_document(
                 f"Document {document.id} already scanned."
             )
 
+        # Thumbnails are created for documents that were scanned before as
+        # well, so that a rescan of the project fills in missing ones.
+        if force or not crud.get_document_thumbnails(
+                session=session, document_ids=[document.id]):
+            await _create_document_thumbnail(
+                session=session,
+                document=document,
+                file_provider=file_provider
+            )
+
         logger.debug(f"Scan of document {document_id} successful.")
     except Exception as exception:
         logger.exception(exception)
@@ -190,19 +208,35 @@ async def _scan_project_file_system(
         project_id=project.id
     )
 
-    db_paths = [document.path for document in db_documents]
+    db_paths = {document.path for document in db_documents}
 
     if not file_provider:
         file_provider = providers.get_file_provider(
             project_config=project.config)
 
-    async with file_provider("/") as provider:
-        async for file in provider.list():
+    # Continue an interrupted listing (if the provider supports it), the
+    # files before the checkpoint are already in the database.
+    checkpoint = schemas.ListingCheckpointSchema()
+    db_checkpoint = crud.get_listing_checkpoint(
+        session=session,
+        project_id=project.id
+    )
+    if db_checkpoint:
+        checkpoint.prefix = db_checkpoint.prefix
+        checkpoint.token = db_checkpoint.token
+    token = checkpoint.token
 
-            if not file.lower().endswith(
-                    ('.pdf', '.png', '.jpg', '.jpeg',
-                     '.bmp', '.gif', '.tif', '.tiff')):
-                continue
+    async with file_provider("/") as provider:
+        # The provider only lists files with supported extensions.
+        async for file in provider.list(checkpoint=checkpoint):
+
+            if checkpoint.token != token:
+                token = checkpoint.token
+                crud.update_listing_checkpoint(
+                    session=session,
+                    project_id=project.id,
+                    checkpoint=checkpoint
+                )
 
             if file in db_paths:
                 logger.debug(f"Document already exists: {file}")
@@ -216,6 +250,13 @@ async def _scan_project_file_system(
                 path=file
             )
 
+    # The listing is complete.
+    crud.update_listing_checkpoint(
+        session=session,
+        project_id=project.id,
+        checkpoint=schemas.ListingCheckpointSchema()
+    )
+
     logger.debug("Project file system scan successful.")
 
 # ---------------------------------------------------------------------------- #
@@ -225,7 +266,7 @@ async def _run_document_ocr(
     document: models.Document,
     file_provider: Optional[providers.BaseFileProvider] = None,
     ocr_provider: Optional[providers.BaseOcrProvider] = None
-) -> schemas.OcrResultSchema:
+) -> providers.OcrResult:
     """
     Run OCR on a document using the configured OCR provider.
     """
@@ -240,10 +281,64 @@ async def _run_document_ocr(
             project_config=document.project.config)
 
     async with file_provider(document.path) as provider:
-        images = await provider.read_as_images()
+        location = await provider.object_location()
+
+        if location is not None and ocr_provider.supports_object(location):
+            # The OCR provider reads the object directly from the object
+            # storage, so there is no need to render the pages locally.
+            async with ocr_provider(images=[]) as ocr_provider:
+                ocr = await ocr_provider.ocr_object(location=location)
+        else:
+            preprocessing = ocr_provider.preprocessing
+
+            # The pages are rendered in color if they are cached for the
+            # viewer (the preprocessing converts them to grayscale).
+            cache = services.get_page_cache()
+
+            images = await provider.read_as_images(
+                grayscale=preprocessing.enabled and cache is None)
+
+            if cache is not None:
+                try:
+                    await pages.store_pages(
+                        provider=provider,
+                        cache=cache,
+                        images=images,
+                        page_count=len(images)
+                    )
+                except Exception as exception:
+                    logger.warning(f"Pages of document {document.id} could "
+                                   f"not be cached: {exception}")
+
+            transforms = None
+            if preprocessing.enabled:
+                images, transforms = await providers.preprocess_images(
+                    images=images,
+                    config=preprocessing
+                )
+
+            async with ocr_provider(images=images) as ocr_provider:
+                ocr = await ocr_provider.ocr()
 
-        async with ocr_provider(images=images) as ocr_provider:
-            ocr = await ocr_provider.ocr()
+            if transforms:
+                # The label data refers to the original pages.
+                providers.restore_positions(
+                    ocr_result=ocr,
+                    transforms=transforms
+                )
+
+    failed_pages = ocr.get_failed_pages()
+    page_count = sum(
+        1 for index in range(len(ocr))
+        if ocr.get_type(index) == schemas.OcrItemType.page)
+    if failed_pages and len(failed_pages) == page_count:
+        # The document is left unscanned, so that the next scan retries it.
+        raise Exception(
+            f"OCR failed for all pages of document {document.id}.")
+
+    if failed_pages:
+        logger.warning(
+            f"OCR failed for pages {failed_pages} of document {document.id}.")
 
     logger.debug(f"OCR for document {document.id} successful.")
 
@@ -253,10 +348,70 @@ async def _run_document_ocr(
 # ---------------------------------------------------------------------------- #
 
 
+def _store_document_ocr(
+    session: sqlmodel.Session,
+    document: models.Document,
+    ocr_result: providers.OcrResult,
+) -> None:
+    """
+    Store the raw OCR result of a document (compressed, one row per page), so
+    that the label data can be rebuilt without running the OCR again.
+    """
+    logger.debug(f"Storing OCR result for document {document.id}...")
+
+    crud.update_document_ocr(
+        session=session,
+        document=document,
+        pages={
+            page: page_result.to_bytes()
+            for page, page_result in ocr_result.split_pages().items()
+        }
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _create_document_thumbnail(
+    session: sqlmodel.Session,
+    document: models.Document,
+    file_provider: Optional[providers.BaseFileProvider] = None
+) -> None:
+    """
+    Create the thumbnail of the first page of a document and store it in the
+    database. A document without a thumbnail can still be labeled, so errors
+    are only logged.
+    """
+    logger.debug(f"Creating thumbnail for document {document.id}...")
+
+    if not file_provider:
+        file_provider = providers.get_file_provider(
+            project_config=document.project.config)
+
+    try:
+        async with file_provider(document.path) as provider:
+            data, format = await pages.create_thumbnail(
+                provider=provider,
+                cache=services.get_page_cache()
+            )
+    except Exception as exception:
+        logger.warning(f"Thumbnail of document {document.id} could not be "
+                       f"created: {exception}")
+        return
+
+    crud.update_document_thumbnail(
+        session=session,
+        document=document,
+        data=data,
+        format=format
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
 async def _create_document_data(
     session: sqlmodel.Session,
     document: models.Document,
-    ocr_result: schemas.OcrResultSchema,
+    ocr_result: providers.OcrResult,
 ) -> None:
     """
     Create the label setup for a document and update it in the database.
@@ -284,31 +439,9 @@ async def _create_document_data(
 # ---------------------------------------------------------------------------- #
 
 
-def _get_item_children(
-    ocr_result: schemas.OcrResultSchema,
-    ocr_item: schemas.OcrItemSchema,
-) -> List[schemas.OcrItemSchema]:
-    """
-    Return a list of children for an OCR item.
-    """
-    result = []
-    for relationship in ocr_item.relationships:
-        if relationship.type != schemas.OcrRelationshipType.child:
-            continue
-
-        for item in ocr_result.items:
-            if item.id == relationship.id:
-                result.append(item)
-                break
-
-    return result
-
-# ---------------------------------------------------------------------------- #
-
-
 def _get_item_content(
-    ocr_result: schemas.OcrResultSchema,
-    ocr_item: schemas.OcrItemSchema,
+    ocr_result: providers.OcrResult,
+    index: int,
     content: Optional[str] = None
 ) -> str:
     """
@@ -318,16 +451,12 @@ def _get_item_content(
     if not content:
         content = ""
 
-    if ocr_item.content and len(ocr_item.content) > 0:
-        content += (ocr_item.content + " ")
+    item_content = ocr_result.get_content(index)
+    if item_content and len(item_content) > 0:
+        content += (item_content + " ")
 
-    children = _get_item_children(
-        ocr_result=ocr_result,
-        ocr_item=ocr_item
-    )
-
-    for child in children:
-        match child.type:
+    for child in ocr_result.get_children(index):
+        match ocr_result.get_type(child):
             case schemas.OcrItemType.paragraph:
                 if len(content) > 0 and not content.endswith('\n'):
                     content = content.strip() + '\n\n'
@@ -338,7 +467,7 @@ def _get_item_content(
                 pass
         content = _get_item_content(
             ocr_result=ocr_result,
-            ocr_item=child,
+            index=child,
             content=content
         )
 
@@ -347,68 +476,50 @@ def _get_item_content(
 # ---------------------------------------------------------------------------- #
 
 
-def _get_ocr_item_parents(
-    ocr_result: schemas.OcrResultSchema,
-    ocr_item: schemas.OcrItemSchema
-) -> List[schemas.OcrItemSchema]:
+def _get_nested_blocks(
+    ocr_result: providers.OcrResult
+) -> Set[int]:
     """
-    Return a list of parent items for a given OCR item.
+    Return the indices of all blocks that are children of other blocks.
     """
-    parents = []
-    for item in ocr_result.items:
-        for relationship in item.relationships:
-            if relationship.type == schemas.OcrRelationshipType.child and \
-                    relationship.id == ocr_item.id:
-                parents.append(item)
-                break
+    nested = set()
+    for index in range(len(ocr_result)):
+        if ocr_result.get_type(index) != schemas.OcrItemType.block:
+            continue
+        for child in ocr_result.get_children(index):
+            if ocr_result.get_type(child) == schemas.OcrItemType.block:
+                nested.add(child)
 
-    return parents
+    return nested
 
 # ---------------------------------------------------------------------------- #
 
 
 def _initialize_label_blocks(
-    ocr_result: schemas.OcrResultSchema,
-    page: int
+    ocr_result: providers.OcrResult,
+    blocks: List[int],
+    nested_blocks: Set[int]
 ) -> List[schemas.BlockLabelDataSchema]:
     """
     Initialize all blocks in a page.
     """
     result = []
-    for item in ocr_result.items:
-        if item.type != schemas.OcrItemType.block:
-            continue
-
-        if item.page != page:
-            continue
-
-        parents = _get_ocr_item_parents(
-            ocr_result=ocr_result,
-            ocr_item=item
-        )
-
+    for index in blocks:
         # Do not include blocks that are children of other blocks.
         # In Textract, a line can be the child of a page and a layout block,
         # which would lead to duplicate blocks in the label data.
-        if any(
-            [parent.type == schemas.OcrItemType.block for parent in parents]
-        ):
+        if index in nested_blocks:
             continue
 
         result.append(
             schemas.BlockLabelDataSchema(
-                id=item.id,
+                id=ocr_result.get_id(index),
                 labels=[],
                 label_status=schemas.LabelStatus.open,
-                position=schemas.PositionSchema(
-                    left=item.left,
-                    top=item.top,
-                    width=item.width,
-                    height=item.height
-                ),
+                position=ocr_result.get_position(index),
                 content=_get_item_content(
                     ocr_result=ocr_result,
-                    ocr_item=item
+                    index=index
                 ).strip()
             )
         )
@@ -419,26 +530,39 @@ def _initialize_label_blocks(
 
 
 def _initialize_label_pages(
-    ocr_result: schemas.OcrResultSchema
+    ocr_result: providers.OcrResult
 ) -> List[schemas.PageLabelDataSchema]:
     """
-    Initialize a page.
+    Initialize all pages. The items are grouped by page in a single pass.
     """
-    result = []
-    for item in ocr_result.items:
-        if item.type != schemas.OcrItemType.page:
-            continue
+    pages: List[int] = []
+    blocks: Dict[int, List[int]] = {}
+    for index in range(len(ocr_result)):
+        match ocr_result.get_type(index):
+            case schemas.OcrItemType.page:
+                pages.append(index)
+            case schemas.OcrItemType.block:
+                blocks.setdefault(ocr_result.pages[index], []).append(index)
+            case _:
+                pass
+
+    nested_blocks = _get_nested_blocks(ocr_result=ocr_result)
 
+    result = []
+    for index in pages:
+        page = ocr_result.pages[index]
         result.append(
             schemas.PageLabelDataSchema(
-                id=item.id,
-                page=item.page,
+                id=ocr_result.get_id(index),
+                page=page,
                 labels=[],
                 label_status=schemas.LabelStatus.open,
                 blocks=_initialize_label_blocks(
                     ocr_result=ocr_result,
-                    page=item.page
-                )
+                    blocks=blocks.get(page, []),
+                    nested_blocks=nested_blocks
+                ),
+                ocr_failed=ocr_result.is_failed(index)
             )
         )
 
@@ -235,3 +235,92 @@ def batch_update_document_status(
     session.commit()
 
 # ---------------------------------------------------------------------------- #
+
+
+def get_document_ocr(
+    session: sqlmodel.Session,
+    document_id: int
+) -> Sequence[models.DocumentOcr]:
+    """
+    Retrieve the stored raw OCR results of a document (ordered by page).
+    """
+    return session.exec(
+        sqlmodel.select(models.DocumentOcr).where(
+            models.DocumentOcr.document_id == document_id
+        ).order_by(
+            sqlmodel.asc(models.DocumentOcr.page)
+        )
+    ).all()
+
+# ---------------------------------------------------------------------------- #
+
+
+def update_document_ocr(
+    session: sqlmodel.Session,
+    document: models.Document,
+    pages: Dict[int, bytes]
+) -> None:
+    """
+    Replace the stored raw OCR results of a document with the given
+    (compressed) OCR results per page.
+    """
+    for document_ocr in get_document_ocr(
+            session=session, document_id=document.id):
+        session.delete(document_ocr)
+
+    for page, data in pages.items():
+        session.add(
+            models.DocumentOcr(
+                document_id=document.id,
+                page=page,
+                data=data
+            )
+        )
+
+    session.commit()
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_document_thumbnails(
+    session: sqlmodel.Session,
+    document_ids: List[int]
+) -> Sequence[models.DocumentThumbnail]:
+    """
+    Retrieve the stored thumbnails of a list of documents (documents without
+    a thumbnail are left out).
+    """
+    return session.exec(
+        sqlmodel.select(models.DocumentThumbnail).where(
+            sqlmodel.col(models.DocumentThumbnail.document_id).in_(
+                document_ids)
+        )
+    ).all()
+
+# ---------------------------------------------------------------------------- #
+
+
+def update_document_thumbnail(
+    session: sqlmodel.Session,
+    document: models.Document,
+    data: bytes,
+    format: str
+) -> None:
+    """
+    Store the thumbnail of a document (replacing an existing one).
+    """
+    for thumbnail in get_document_thumbnails(
+            session=session, document_ids=[document.id]):
+        session.delete(thumbnail)
+
+    session.add(
+        models.DocumentThumbnail(
+            document_id=document.id,
+            format=format,
+            data=data
+        )
+    )
+
+    session.commit()
+
+# ---------------------------------------------------------------------------- #
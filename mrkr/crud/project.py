@@ -152,3 +152,53 @@ def update_project_name(
     return project
 
 # ---------------------------------------------------------------------------- #
+
+
+def get_listing_checkpoint(
+    session: sqlmodel.Session,
+    project_id: int
+) -> models.ListingCheckpoint | None:
+    """
+    Retrieve the checkpoint of an interrupted file listing of a project.
+    """
+    return session.exec(
+        sqlmodel.select(models.ListingCheckpoint).where(
+            models.ListingCheckpoint.project_id == project_id
+        )
+    ).first()
+
+# ---------------------------------------------------------------------------- #
+
+
+def update_listing_checkpoint(
+    session: sqlmodel.Session,
+    project_id: int,
+    checkpoint: schemas.ListingCheckpointSchema
+) -> None:
+    """
+    Store the checkpoint of the file listing of a project. The checkpoint is
+    removed if it has no token (i.e. the listing is complete).
+    """
+    listing_checkpoint = get_listing_checkpoint(
+        session=session, project_id=project_id)
+
+    if checkpoint.prefix is None or checkpoint.token is None:
+        if listing_checkpoint:
+            session.delete(listing_checkpoint)
+            session.commit()
+        return
+
+    if not listing_checkpoint:
+        listing_checkpoint = models.ListingCheckpoint(
+            project_id=project_id,
+            prefix=checkpoint.prefix,
+            token=checkpoint.token
+        )
+    else:
+        listing_checkpoint.prefix = checkpoint.prefix
+        listing_checkpoint.token = checkpoint.token
+
+    session.add(listing_checkpoint)
+    session.commit()
+
+# ---------------------------------------------------------------------------- #
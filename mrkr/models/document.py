@@ -3,7 +3,7 @@
 import sqlmodel
 import datetime
 import enum
-from sqlalchemy import Column
+from sqlalchemy import Column, LargeBinary
 from sqlalchemy.dialects.postgresql import JSON
 from typing import Optional
 
@@ -78,3 +78,48 @@ class Document(sqlmodel.SQLModel, table=True):
     )
 
 # ---------------------------------------------------------------------------- #
+
+
+class DocumentOcr(sqlmodel.SQLModel, table=True):
+    id: int = sqlmodel.Field(primary_key=True)
+    document_id: int = sqlmodel.Field(
+        foreign_key="document.id",
+        index=True,
+        description="The ID of the document this OCR result belongs to."
+    )
+    page: int = sqlmodel.Field(
+        description="The page number in the document (starting from 1)."
+    )
+    created: datetime.datetime = sqlmodel.Field(
+        default_factory=datetime.datetime.now,
+        description="The timestamp when the OCR result was created.",
+    )
+    data: bytes = sqlmodel.Field(
+        sa_column=Column(LargeBinary),
+        description="The compressed raw OCR result of the page."
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class DocumentThumbnail(sqlmodel.SQLModel, table=True):
+    id: int = sqlmodel.Field(primary_key=True)
+    document_id: int = sqlmodel.Field(
+        foreign_key="document.id",
+        index=True,
+        unique=True,
+        description="The ID of the document this thumbnail belongs to."
+    )
+    created: datetime.datetime = sqlmodel.Field(
+        default_factory=datetime.datetime.now,
+        description="The timestamp when the thumbnail was created.",
+    )
+    format: str = sqlmodel.Field(
+        description="The image format of the thumbnail (e.g. WEBP)."
+    )
+    data: bytes = sqlmodel.Field(
+        sa_column=Column(LargeBinary),
+        description="The encoded thumbnail of the first page."
+    )
+
+# ---------------------------------------------------------------------------- #
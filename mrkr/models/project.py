@@ -34,3 +34,26 @@ class Project(sqlmodel.SQLModel, table=True):
         back_populates="project")
 
 # ---------------------------------------------------------------------------- #
+
+
+class ListingCheckpoint(sqlmodel.SQLModel, table=True):
+    id: int = sqlmodel.Field(primary_key=True)
+    project_id: int = sqlmodel.Field(
+        foreign_key="project.id",
+        index=True,
+        unique=True,
+        description="The ID of the project that is being listed."
+    )
+    updated: datetime.datetime = sqlmodel.Field(
+        default_factory=datetime.datetime.now,
+        description="The timestamp when the checkpoint was last updated.",
+        sa_column_kwargs={"onupdate": lambda: datetime.datetime.now()}
+    )
+    prefix: str = sqlmodel.Field(
+        description="The prefix of the listing the token belongs to."
+    )
+    token: str = sqlmodel.Field(
+        description="The token to continue the listing with."
+    )
+
+# ---------------------------------------------------------------------------- #
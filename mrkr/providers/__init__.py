@@ -1,7 +1,40 @@
 # ---------------------------------------------------------------------------- #
 
-from mrkr.providers.file import LocalFileProvider, S3FileProvider
-from mrkr.providers.ocr import TesseractOcrProvider
+from typing import TYPE_CHECKING
+
+# ---------------------------------------------------------------------------- #
+
+from mrkr.providers.ocr import OcrResult, OcrResultBuilder
+from .registry import ProviderRegistry, lazy_attributes
+from .cpu import CpuBudget, cpu_budget
+from .metrics import WastedWork, wasted_work
+from .images import can_save, convert_image, create_tiles, fit_image, \
+    save_image
 from .factory import *
 
+if TYPE_CHECKING:
+    from mrkr.providers.file import LocalFileProvider, S3FileProvider
+    from mrkr.providers.ocr import TesseractOcrProvider, \
+        TextractOcrProvider
+    from mrkr.providers.ocr import PageTransform, preprocess_images, \
+        restore_positions
+
+# ---------------------------------------------------------------------------- #
+
+# Attributes that depend on heavy third-party packages (boto3, pytesseract,
+# numpy) are imported on first access (PEP 562).
+__getattr__, __dir__ = lazy_attributes(
+    module=__name__,
+    namespace=globals(),
+    references={
+        "LocalFileProvider": "mrkr.providers.file:LocalFileProvider",
+        "S3FileProvider": "mrkr.providers.file:S3FileProvider",
+        "TesseractOcrProvider": "mrkr.providers.ocr:TesseractOcrProvider",
+        "TextractOcrProvider": "mrkr.providers.ocr:TextractOcrProvider",
+        "PageTransform": "mrkr.providers.ocr:PageTransform",
+        "preprocess_images": "mrkr.providers.ocr:preprocess_images",
+        "restore_positions": "mrkr.providers.ocr:restore_positions",
+    }
+)
+
 # ---------------------------------------------------------------------------- #
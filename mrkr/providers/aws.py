@@ -1,6 +1,7 @@
 # ---------------------------------------------------------------------------- #
 
 import boto3
+import botocore.config
 import re
 import os
 import logging
@@ -8,7 +9,8 @@ import pydantic
 import datetime
 import asyncio
 import functools
-from typing import Any
+import threading
+from typing import Any, Dict, Tuple
 
 # ---------------------------------------------------------------------------- #
 
@@ -20,6 +22,16 @@ logger = logging.getLogger("mrkr.providers")
 
 # ---------------------------------------------------------------------------- #
 
+# Temporary credentials are refreshed this long before they expire, so that
+# no request is signed with credentials that expire while it is in flight.
+CREDENTIALS_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+# The size of the connection pool of each client. Clients are shared between
+# the threads of the default executor, which has up to 32 workers.
+MAX_POOL_CONNECTIONS = 32
+
+# ---------------------------------------------------------------------------- #
+
 
 class _AwsTemporaryCredentials(pydantic.BaseModel):
     AccessKeyId: str
@@ -33,10 +45,14 @@ class _AwsTemporaryCredentials(pydantic.BaseModel):
 class AwsSession(boto3.session.Session):
     """
     Inherits the boto3 session to automatically handle role changes and
-    temporary credentials.
+    temporary credentials. Sessions are shared process-wide (see
+    get_aws_session): the temporary credentials are cached until shortly
+    before they expire and the (thread-safe) clients are reused.
     """
     _config: schemas.AwsConfigSchema
     _temp_credentials: _AwsTemporaryCredentials | None
+    _clients: Dict[str, Tuple[str, Any]]
+    _lock: threading.Lock
 
     def __init__(self, config: schemas.AwsConfigSchema) -> None:
         """
@@ -51,6 +67,8 @@ class AwsSession(boto3.session.Session):
         )
 
         self._temp_credentials = None
+        self._clients = {}
+        self._lock = threading.Lock()
 
         logger.debug(f"AWS session initialized")
 
@@ -74,7 +92,8 @@ class AwsSession(boto3.session.Session):
     def _config_aws_role_name(self) -> str:
         return self.resolve_config(self._config.aws_role_name)
 
-    def resolve_config(self, string: str) -> str:
+    @staticmethod
+    def resolve_config(string: str) -> str:
         """
         Replace any environment variable placeholders in a string with their
         values. If an environment variable is not set, raise an exception.
@@ -94,42 +113,64 @@ class AwsSession(boto3.session.Session):
         string = re.sub(r"{{(\w+)}}", replace_env_var, string)
         return string
 
-    async def refresh_temp_credentials(self, force: bool = False) -> None:
+    @property
+    def _temp_credentials_valid(self) -> bool:
         """
-        Fetch and update temporary credentials.
+        Returns True if the temporary credentials are available and do not
+        expire within the refresh margin.
         """
-        if self._temp_credentials is not None and force is False:
-            if self._temp_credentials.Expiration <= \
-                    datetime.datetime.now(tz=datetime.timezone.utc):
-                logger.debug("Temporary credentials sill valid.")
-                return
+        if self._temp_credentials is None:
+            return False
 
-        logger.debug("Fetching temporary AWS credentials...")
+        return self._temp_credentials.Expiration - CREDENTIALS_REFRESH_MARGIN \
+            > datetime.datetime.now(tz=datetime.timezone.utc)
+
+    async def refresh_temp_credentials(self, force: bool = False) -> None:
+        """
+        Fetch and update temporary credentials if they are missing or about
+        to expire.
+        """
+        if self._temp_credentials_valid and force is False:
+            return
 
         loop = asyncio.get_running_loop()
 
-        client = await loop.run_in_executor(
+        await loop.run_in_executor(
             None,
             functools.partial(
-                super().client,
-                service_name="sts"
+                self._refresh_temp_credentials,
+                force=force
             )
         )
 
-        role_arn = f"arn:aws:iam::{self._config_aws_account_id}" \
-            f":role/{self._config_aws_role_name}"
+    def _refresh_temp_credentials(self, force: bool = False) -> None:
+        """
+        Fetch and update temporary credentials (blocking). Only one refresh
+        is in flight at a time; callers that waited for the lock reuse the
+        credentials fetched by the first one.
+        """
+        previous = self._temp_credentials
+
+        with self._lock:
+            if self._temp_credentials_valid and \
+                    (force is False or self._temp_credentials is not previous):
+                logger.debug("Temporary credentials still valid.")
+                return
 
-        response = await loop.run_in_executor(
-            None,
-            functools.partial(
-                client.assume_role,
+            logger.debug("Fetching temporary AWS credentials...")
+
+            client = self._create_client(service_name="sts")
+
+            role_arn = f"arn:aws:iam::{self._config_aws_account_id}" \
+                f":role/{self._config_aws_role_name}"
+
+            response = client.assume_role(
                 RoleSessionName='MrkrSession',
                 RoleArn=role_arn
             )
-        )
 
-        self._temp_credentials = \
-            _AwsTemporaryCredentials(**response['Credentials'])
+            self._temp_credentials = \
+                _AwsTemporaryCredentials(**response['Credentials'])
 
         expiration = self._temp_credentials.Expiration
 
@@ -138,56 +179,106 @@ class AwsSession(boto3.session.Session):
             f"{expiration.strftime('%Y-%m-%d %H:%M:%S%Z')})."
         )
 
-    async def get_client(self, service_name: str) -> Any:
+    def _create_client(
+        self,
+        service_name: str,
+        credentials: _AwsTemporaryCredentials | None = None
+    ) -> Any:
         """
-        Return an AWS client for a specific service (e.g. s3, ec2) using
-        the temporary credentials.
+        Create a new AWS client (blocking), using the temporary credentials
+        if given.
         """
-        logger.debug(f"Creating AWS client using temporary "
-                     f"credentials: {service_name}.")
+        if credentials is None:
+            return super().client(service_name=service_name)
+
+        return super().client(
+            service_name=service_name,
+            region_name=self._config_aws_region_name,
+            aws_access_key_id=credentials.AccessKeyId,
+            aws_secret_access_key=credentials.SecretAccessKey,
+            aws_session_token=credentials.SessionToken,
+            config=botocore.config.Config(
+                max_pool_connections=MAX_POOL_CONNECTIONS)
+        )
 
+    async def get_client(self, service_name: str) -> Any:
+        """
+        Return an AWS client for a specific service (e.g. s3, textract) using
+        the temporary credentials. Clients are created once per service and
+        set of credentials, and shared between threads.
+        """
         await self.refresh_temp_credentials()
-        if not self._temp_credentials:
+
+        credentials = self._temp_credentials
+        if not credentials:
             raise Exception("Temporary credentials not available.")
 
+        cached = self._clients.get(service_name)
+        if cached is not None and cached[0] == credentials.AccessKeyId:
+            return cached[1]
+
+        logger.debug(f"Creating AWS client using temporary "
+                     f"credentials: {service_name}.")
+
         loop = asyncio.get_running_loop()
 
         return await loop.run_in_executor(
             None,
             functools.partial(
-                super().client,
+                self._get_or_create_client,
                 service_name=service_name,
-                region_name=self._config_aws_region_name,
-                aws_access_key_id=self._temp_credentials.AccessKeyId,
-                aws_secret_access_key=self._temp_credentials.SecretAccessKey,
-                aws_session_token=self._temp_credentials.SessionToken
+                credentials=credentials
             )
         )
 
-    async def get_resource(self, service_name: str) -> Any:
+    def _get_or_create_client(
+        self,
+        service_name: str,
+        credentials: _AwsTemporaryCredentials
+    ) -> Any:
         """
-        Return an AWS resource for a specific service (e.g. "s3", "ec2") using
-        the temporary credentials.
+        Return the cached client for a service or create it (blocking). The
+        creation is locked, since boto3 sessions are not thread-safe.
         """
-        logger.debug(f"Creating AWS resource using temporary "
-                     f"credentials: {service_name}.")
-
-        await self.refresh_temp_credentials()
-        if not self._temp_credentials:
-            raise Exception("Temporary credentials not available.")
-
-        loop = asyncio.get_running_loop()
+        with self._lock:
+            cached = self._clients.get(service_name)
+            if cached is not None and cached[0] == credentials.AccessKeyId:
+                return cached[1]
 
-        return await loop.run_in_executor(
-            None,
-            functools.partial(
-                super().resource,
+            client = self._create_client(
                 service_name=service_name,
-                region_name=self._config_aws_region_name,
-                aws_access_key_id=self._temp_credentials.AccessKeyId,
-                aws_secret_access_key=self._temp_credentials.SecretAccessKey,
-                aws_session_token=self._temp_credentials.SessionToken
+                credentials=credentials
             )
-        )
+            self._clients[service_name] = (credentials.AccessKeyId, client)
+
+        return client
+
+# ---------------------------------------------------------------------------- #
+
+
+_sessions: Dict[Tuple[str, str, str, str], AwsSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_aws_session(config: schemas.AwsConfigSchema) -> AwsSession:
+    """
+    Return the process-wide AWS session for an account, role and region (and
+    the access key used to assume the role). The session is created on first
+    use.
+    """
+    key = (
+        AwsSession.resolve_config(config.aws_account_id),
+        AwsSession.resolve_config(config.aws_role_name),
+        AwsSession.resolve_config(config.aws_region_name),
+        AwsSession.resolve_config(config.aws_access_key_id),
+    )
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = AwsSession(config=config)
+            _sessions[key] = session
+
+    return session
 
 # ---------------------------------------------------------------------------- #
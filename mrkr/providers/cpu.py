@@ -0,0 +1,138 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from types import TracebackType
+from typing import Any, Callable, Optional, Type, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+from .metrics import wasted_work
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.providers")
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+class CpuBudget:
+    """
+    Limits the number of CPU-bound jobs (e.g. poppler and tesseract
+    processes) that run at a time in the process. The budget is shared by
+    all threads and event loops (scans run in worker threads with their own
+    event loops), so rendering and OCR can not oversubscribe the cores.
+    Asynchronous jobs run in a dedicated executor with one thread per job of
+    the budget, so queued jobs do not hold the threads of the default
+    executor (which file reads and the page cache need).
+    """
+    _size: int
+    _used: int
+    _condition: threading.Condition
+    _executor: concurrent.futures.ThreadPoolExecutor
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._used = 0
+        self._condition = threading.Condition()
+        self._executor = self._create_executor(size=size)
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of jobs that may run at a time.
+        """
+        return self._size
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of jobs that may run at a time (running jobs are
+        not interrupted).
+        """
+        if size < 1:
+            raise ValueError("The CPU budget must be at least 1.")
+
+        with self._condition:
+            self._size = size
+            # Jobs that are queued in the previous executor still run (within
+            # the new budget).
+            executor, self._executor = \
+                self._executor, self._create_executor(size=size)
+            self._condition.notify_all()
+
+        executor.shutdown(wait=False)
+
+        logger.info(f"CPU budget set to {size} jobs.")
+
+    def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking function as soon as the budget allows it (call this
+        in a worker thread, e.g. with run_in_executor).
+        """
+        with self:
+            return func(*args, **kwargs)
+
+    async def run_in_executor(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """
+        Run a blocking function in the executor of the budget as soon as the
+        budget allows it. If the caller is cancelled (e.g. because the client
+        disconnected), the job is abandoned: it is skipped if it has not
+        started yet, otherwise its result is discarded.
+        """
+        abandoned = threading.Event()
+
+        def job() -> T:
+            with self:
+                if abandoned.is_set():
+                    raise asyncio.CancelledError()
+                result = func(*args, **kwargs)
+                if abandoned.is_set():
+                    wasted_work.add(wasted_jobs=1)
+                return result
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            return await loop.run_in_executor(self._executor, job)
+        except asyncio.CancelledError:
+            abandoned.set()
+            wasted_work.add(abandoned_jobs=1)
+            raise
+
+    @staticmethod
+    def _create_executor(size: int) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Create the executor for the jobs of a budget of the given size.
+        """
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="mrkr-cpu")
+
+    def __enter__(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._used < self._size)
+            self._used += 1
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        with self._condition:
+            self._used -= 1
+            self._condition.notify()
+
+
+cpu_budget = CpuBudget(size=os.cpu_count() or 1)
+
+# ---------------------------------------------------------------------------- #
@@ -1,12 +1,53 @@
 # ---------------------------------------------------------------------------- #
 
+import enum
+from typing import Dict, Type
+
+# ---------------------------------------------------------------------------- #
+
 import mrkr.schemas as schemas
 from .file.base import BaseFileProvider
-from .file.local import LocalFileProvider
-from .file.s3 import S3FileProvider
 from .ocr.base import BaseOcrProvider
-from .ocr.tesseract import TesseractOcrProvider
-from .ocr.textract import TextractOcrProvider
+from .registry import ProviderRegistry
+
+# ---------------------------------------------------------------------------- #
+
+# The built-in providers are only imported when a project uses them, so that
+# e.g. boto3 is not imported for projects that use local files and Tesseract.
+file_providers: ProviderRegistry[BaseFileProvider] = ProviderRegistry(
+    group="mrkr.file_providers",
+    references={
+        schemas.FileProviderType.local.value:
+            "mrkr.providers.file.local:LocalFileProvider",
+        schemas.FileProviderType.s3.value:
+            "mrkr.providers.file.s3:S3FileProvider",
+    }
+)
+
+ocr_providers: ProviderRegistry[BaseOcrProvider] = ProviderRegistry(
+    group="mrkr.ocr_providers",
+    references={
+        schemas.OcrProviderType.tesseract.value:
+            "mrkr.providers.ocr.tesseract:TesseractOcrProvider",
+        schemas.OcrProviderType.textract.value:
+            "mrkr.providers.ocr.textract:TextractOcrProvider",
+    }
+)
+
+# The configuration schemas of the built-in providers.
+_FILE_PROVIDER_CONFIGS: Dict[str, Type[schemas.FileProviderConfigSchema]] = {
+    schemas.FileProviderType.local.value:
+        schemas.FileProviderLocalConfigSchema,
+    schemas.FileProviderType.s3.value:
+        schemas.FileProviderS3ConfigSchema,
+}
+
+_OCR_PROVIDER_CONFIGS: Dict[str, Type[schemas.OcrProviderConfigSchema]] = {
+    schemas.OcrProviderType.tesseract.value:
+        schemas.OcrProviderTesseractConfigSchema,
+    schemas.OcrProviderType.textract.value:
+        schemas.OcrProviderTextractConfigSchema,
+}
 
 # ---------------------------------------------------------------------------- #
 
@@ -17,34 +58,21 @@ def get_file_provider(
     if isinstance(project_config, dict):
         project_config = schemas.ProjectConfigSchema(**project_config)
 
-    match project_config.file_provider.type:
-        case schemas.FileProviderType.local:
-            if not isinstance(
-                project_config.file_provider.config,
-                schemas.FileProviderLocalConfigSchema
-            ):
-                raise ValueError(
-                    "Local file provider was configured incorrectly."
-                )
-
-            return LocalFileProvider(
-                config=project_config.file_provider.config)
-        case schemas.FileProviderType.s3:
-            if not isinstance(
-                project_config.file_provider.config,
-                schemas.FileProviderS3ConfigSchema
-            ):
-                raise ValueError(
-                    "S3 file provider was configured incorrectly."
-                )
-
-            return S3FileProvider(
-                config=project_config.file_provider.config)
-        case _:
-            raise ValueError(
-                f"Unsupported file provider type: "
-                f"{project_config.file_provider.type}"
-            )
+    type = _get_type_name(project_config.file_provider.type)
+    config = project_config.file_provider.config
+
+    config_schema = _FILE_PROVIDER_CONFIGS.get(type)
+    if config_schema is not None and not isinstance(config, config_schema):
+        raise ValueError(
+            f"File provider '{type}' was configured incorrectly."
+        )
+
+    try:
+        provider = file_providers.get(type)
+    except ValueError:
+        raise ValueError(f"Unsupported file provider type: {type}")
+
+    return provider(config=config)
 
 # ---------------------------------------------------------------------------- #
 
@@ -55,33 +83,29 @@ def get_ocr_provider(
     if isinstance(project_config, dict):
         project_config = schemas.ProjectConfigSchema(**project_config)
 
-    match project_config.ocr_provider.type:
-        case schemas.OcrProviderType.tesseract:
-            if not isinstance(
-                project_config.ocr_provider.config,
-                schemas.OcrProviderTesseractConfigSchema
-            ):
-                raise ValueError(
-                    "Tesseract OCR provider was configured incorrectly."
-                )
-
-            return TesseractOcrProvider(
-                config=project_config.ocr_provider.config)
-        case schemas.OcrProviderType.textract:
-            if not isinstance(
-                project_config.ocr_provider.config,
-                schemas.OcrProviderTextractConfigSchema
-            ):
-                raise ValueError(
-                    "Textract OCR provider was configured incorrectly."
-                )
-
-            return TextractOcrProvider(
-                config=project_config.ocr_provider.config)
-        case _:
-            raise ValueError(
-                f"Unsupported ocr provider type: "
-                f"{project_config.ocr_provider.type}"
-            )
+    type = _get_type_name(project_config.ocr_provider.type)
+    config = project_config.ocr_provider.config
+
+    config_schema = _OCR_PROVIDER_CONFIGS.get(type)
+    if config_schema is not None and not isinstance(config, config_schema):
+        raise ValueError(
+            f"OCR provider '{type}' was configured incorrectly."
+        )
+
+    try:
+        provider = ocr_providers.get(type)
+    except ValueError:
+        raise ValueError(f"Unsupported ocr provider type: {type}")
+
+    return provider(config=config)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_type_name(type: enum.Enum | str) -> str:
+    """
+    Returns the name of a provider type (built-in types are enums).
+    """
+    return type.value if isinstance(type, enum.Enum) else type
 
 # ---------------------------------------------------------------------------- #
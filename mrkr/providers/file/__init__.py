@@ -1,6 +1,26 @@
 # ---------------------------------------------------------------------------- #
 
-from .local import LocalFileProvider
-from .s3 import S3FileProvider
+from typing import TYPE_CHECKING
+
+# ---------------------------------------------------------------------------- #
+
+from ..registry import lazy_attributes
+
+if TYPE_CHECKING:
+    from .local import LocalFileProvider
+    from .s3 import S3FileProvider
+
+# ---------------------------------------------------------------------------- #
+
+# The S3 provider depends on boto3, so the providers are imported on first
+# access (PEP 562).
+__getattr__, __dir__ = lazy_attributes(
+    module=__name__,
+    namespace=globals(),
+    references={
+        "LocalFileProvider": f"{__name__}.local:LocalFileProvider",
+        "S3FileProvider": f"{__name__}.s3:S3FileProvider",
+    }
+)
 
 # ---------------------------------------------------------------------------- #
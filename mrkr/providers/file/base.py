@@ -5,13 +5,25 @@ import pdf2image
 import logging
 import base64
 import asyncio
+import contextlib
 import functools
+import os
+import pathlib
+import re
+import tempfile
 from PIL import Image
-from typing import Any, AsyncGenerator, List, Optional, Self
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, \
+    Optional, Self, Tuple
 
 # ---------------------------------------------------------------------------- #
 
 import mrkr.schemas as schemas
+from .filters import PathFilter
+from .rendering import render_pdf
+from ..cpu import cpu_budget
+from ..metrics import wasted_work
+from ..images import attach_source, fit_image, get_source, limit_pixels, \
+    open_image, save_image
 
 # ---------------------------------------------------------------------------- #
 
@@ -19,6 +31,21 @@ logger = logging.getLogger("mrkr.providers.file")
 
 # ---------------------------------------------------------------------------- #
 
+# Image formats that are passed through to the viewer without re-encoding.
+_PASSTHROUGH_FORMATS = ("JPEG", "PNG")
+
+# The size (in bytes) of the chunks that read yields if no size is given.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# The extensions of the image files that can be read.
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')
+
+# The last page that pdfinfo is asked for (it stops at the last page of the
+# file), so that it reports the sizes of all pages.
+_PDF_INFO_LAST_PAGE = 1_000_000
+
+# ---------------------------------------------------------------------------- #
+
 
 class BaseFileProvider:
     """
@@ -26,6 +53,7 @@ class BaseFileProvider:
     """
     path: str
     _config: schemas.FileProviderConfigSchema
+    _filter: PathFilter
 
     def __init__(self, config: schemas.FileProviderConfigSchema) -> None:
         """
@@ -33,6 +61,14 @@ class BaseFileProvider:
         """
         self.path = ''
         self._config = config
+        self._filter = PathFilter.from_config(config)
+
+    @property
+    def config(self) -> schemas.FileProviderConfigSchema:
+        """
+        Returns the configuration of the provider.
+        """
+        return self._config
 
     def __call__(self, path: str) -> Self:
         """
@@ -79,43 +115,182 @@ class BaseFileProvider:
         chunk_size: Optional[int] = None
     ) -> AsyncGenerator[bytes, None]:
         """
-        Reads the file and returns its content as bytes. If the path is a
-        folder, it should raise an exception.
+        Reads the file and yields its content in chunks of at most chunk_size
+        bytes (DEFAULT_CHUNK_SIZE if not given), so that the whole file does
+        not have to be held in memory. If the path is a folder, it should
+        raise an exception.
         """
         raise NotImplementedError
         yield ""  # Placeholder for AsyncGenerator
 
-    async def list(self) -> AsyncGenerator[str, None]:
+    async def list(
+        self,
+        checkpoint: Optional[schemas.ListingCheckpointSchema] = None
+    ) -> AsyncGenerator[str, None]:
         """
         Implement this method to list the files in the directory if the path is
-        a folder. If the path is a file, it should raise an exception.
+        a folder. If the path is a file, it should raise an exception. Only
+        files that pass the filter of the configuration (extensions, include
+        and exclude patterns) should be listed, in subfolders as well if the
+        listing is recursive. Providers that can resume a listing continue at
+        the checkpoint (if given) and keep it up to date.
         """
         raise NotImplementedError
         yield ""  # Placeholder for AsyncGenerator
 
+    async def object_location(self) -> schemas.ObjectLocationSchema | None:
+        """
+        Implement this method if the file is stored in an object storage that
+        OCR providers can access directly (e.g. S3). Returns None otherwise.
+        """
+        return None
+
+    async def fingerprint(self) -> str | None:
+        """
+        Implement this method to identify the current version of the file
+        (e.g. by its ETag), so that pages rendered from it can be cached.
+        Returns None if the version of the file is unknown.
+        """
+        return None
+
+    async def local_path(self) -> pathlib.Path | None:
+        """
+        Implement this method if the file is stored in a local file system,
+        so that it can be opened directly (e.g. by poppler) instead of being
+        read into memory. Returns None otherwise.
+        """
+        return None
+
+    async def read_info(self) -> schemas.FileInfoSchema:
+        """
+        Returns the number of pages of the file and their sizes when they are
+        rendered, without rendering them (PDF files are inspected with
+        pdfinfo, only the header of images is read).
+        """
+        logger.debug(f"Reading file info for: '{self.path}'")
+
+        if self.path.lower().endswith('.pdf'):
+            return await self._read_pdf_info()
+        elif self.path.lower().endswith(_IMAGE_EXTENSIONS):
+            image = await self._read_image_file()
+            return schemas.FileInfoSchema(
+                pages=1,
+                sizes=[schemas.PageSizeSchema(
+                    page=1, width=image.width, height=image.height)]
+            )
+        else:
+            raise Exception(
+                f"Unsupported file format for image conversion: {self.path}"
+            )
+
     async def read_as_images(
         self,
-        page: Optional[int] = None
+        page: Optional[int] = None,
+        grayscale: bool = False,
+        last_page: Optional[int] = None
     ) -> List[Image.Image]:
         """
-        Converts the file to an image or a list of images.
+        Converts the file to an image or a list of images. If a page is given,
+        only that page (or the pages up to last_page) is rendered. PDF files
+        can be rendered in grayscale directly (which needs a third of the
+        memory).
         """
         logger.debug(f"Reading file as images for: '{self.path}'")
 
+        return [
+            image async for image in self.iterate_images(
+                page=page, grayscale=grayscale, last_page=last_page)
+        ]
+
+    async def iterate_images(
+        self,
+        page: Optional[int] = None,
+        grayscale: bool = False,
+        last_page: Optional[int] = None
+    ) -> AsyncGenerator[Image.Image, None]:
+        """
+        Like read_as_images, but yields the pages in order as soon as they
+        are rendered. The pages of PDF files are rendered by up to
+        render_processes poppler processes at a time.
+        """
         if self.path.lower().endswith('.pdf'):
-            images = await self._read_pdf_file(page=page)
-        elif self.path.lower().endswith(
-                ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')):
-            if not page or page == 1:
-                images = [await self._read_image_file()]
-            else:
-                return []
+            images = self._iterate_pdf_pages(
+                page=page, grayscale=grayscale, last_page=last_page)
+        elif self.path.lower().endswith(_IMAGE_EXTENSIONS):
+            if page and page != 1:
+                return
+            images = self._iterate_image_file()
         else:
             raise Exception(
                 f"Unsupported file format for image conversion: {self.path}"
             )
 
-        return images
+        loop = asyncio.get_running_loop()
+
+        index = 0
+        async for image in images:
+            # Oversized pages (huge scans or PDF pages) are downsampled, so
+            # that a single page cannot exhaust the memory of the OCR or the
+            # viewer.
+            if image.width * image.height > self._config.max_pixels:
+                logger.warning(
+                    f"Downsampling page {(page or 1) + index} of "
+                    f"'{self.path}' with {image.width}x{image.height} "
+                    f"pixels.")
+                image = await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        limit_pixels,
+                        image=image,
+                        max_pixels=self._config.max_pixels
+                    )
+                )
+            index += 1
+            yield image
+
+    async def read_thumbnail(self, max_size: int) -> Image.Image:
+        """
+        Returns the first page of the file downscaled so that neither side
+        exceeds max_size. The first page of PDF files is rendered at that
+        size by poppler, JPEG files are decoded at a reduced size, so that
+        thumbnails stay cheap. Images that are too large to be decoded (see
+        limit_pixels) are rejected.
+        """
+        logger.debug(f"Reading thumbnail for: '{self.path}'")
+
+        loop = asyncio.get_running_loop()
+
+        if self.path.lower().endswith('.pdf'):
+            try:
+                async with self._open_pdf() as path:
+                    images = await cpu_budget.run_in_executor(
+                        pdf2image.convert_from_path,
+                        path,
+                        first_page=1,
+                        last_page=1,
+                        size=max_size
+                    )
+            except Exception as exception:
+                raise Exception(
+                    f"Failed to render PDF thumbnail: {exception}"
+                )
+            image = images[0]
+        elif self.path.lower().endswith(_IMAGE_EXTENSIONS):
+            image = await self._read_image_file()
+        else:
+            raise Exception(
+                f"Unsupported file format for image conversion: {self.path}"
+            )
+
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                fit_image,
+                image=image,
+                max_size=max_size,
+                max_pixels=self._config.max_pixels
+            )
+        )
 
     async def read_as_base64_images(
         self,
@@ -129,21 +304,11 @@ class BaseFileProvider:
 
         images = await self.read_as_images(page=page)
 
-        loop = asyncio.get_running_loop()
-
         result = []
         for index, image in enumerate(images):
-            bytes = io.BytesIO()
-            await loop.run_in_executor(
-                None,
-                functools.partial(
-                    image.save,
-                    fp=bytes,
-                    format=self._config.image_format
-                )
-            )
-            bytes.seek(0)
-            base64_string = await self._convert_to_base64(bytes.getvalue())
+            data, format = await self.encode_image(image=image)
+
+            base64_string = await self._convert_to_base64(data)
             result.append(
                 schemas.PageContentSchema(
                     content=base64_string,
@@ -151,13 +316,31 @@ class BaseFileProvider:
                     width=image.width,
                     height=image.height,
                     aspect_ratio=round(image.width / image.height, 7),
-                    format=self._config.image_format.upper(),
+                    format=format.upper(),
                     mode=image.mode
                 )
             )
 
         return result
 
+    async def encode_image(self, image: Image.Image) -> Tuple[bytes, str]:
+        """
+        Encodes a page for the viewer and returns the data and its format.
+        """
+        # Images that browsers can display are passed through without being
+        # decoded and encoded again.
+        data = get_source(image=image, formats=_PASSTHROUGH_FORMATS)
+        if data is not None:
+            return data, str(image.format)
+
+        data = await cpu_budget.run_in_executor(
+            save_image,
+            image=image,
+            format=self._config.image_format,
+            quality=self._config.image_quality
+        )
+        return data, self._config.image_format
+
     async def _convert_to_base64(self, bytes: bytes) -> str:
         """
         Converts bytes to a base64 encoded string.
@@ -169,6 +352,12 @@ class BaseFileProvider:
             None, encoded_bytes.decode, 'utf-8')
         return text
 
+    async def _iterate_image_file(self) -> AsyncGenerator[Image.Image, None]:
+        """
+        Yields the image of an image file.
+        """
+        yield await self._read_image_file()
+
     async def _read_image_file(
         self
     ) -> Image.Image:
@@ -177,61 +366,175 @@ class BaseFileProvider:
         """
         try:
             chunks = []
-            async for chunk in self.read():
-                chunks.append(chunk)
+            try:
+                async for chunk in self.read():
+                    chunks.append(chunk)
+            except asyncio.CancelledError:
+                wasted_work.add(wasted_bytes=sum(map(len, chunks)))
+                raise
             bytes = b"".join(chunks)
 
+            # Oversized images are accepted, they are downsampled before
+            # they are decoded (see iterate_images).
             loop = asyncio.get_running_loop()
             image = await loop.run_in_executor(
-                None, Image.open, io.BytesIO(bytes))
+                None,
+                functools.partial(
+                    open_image,
+                    data=bytes,
+                    max_pixels=self._config.max_pixels
+                )
+            )
+
+            # Image.open only reads the header, the image is decoded when
+            # its pixels are needed. Keep the file content, so it can be
+            # passed on as is.
+            attach_source(image=image, data=bytes)
             return image
         except Exception as e:
             raise Exception(
                 f"Failed to read image file: {e}"
             )
 
-    async def _read_pdf_file(
+    async def _iterate_pdf_pages(
         self,
-        page: Optional[int] = None
-    ) -> List[Image.Image]:
+        page: Optional[int] = None,
+        grayscale: bool = False,
+        last_page: Optional[int] = None
+    ) -> AsyncGenerator[Image.Image, None]:
         """
-        Converts a PDF file to a list of images.
+        Converts a PDF file (or a range of its pages) to images. If the whole
+        file is rendered by several processes, the number of pages is read
+        with pdfinfo first.
         """
         logger.debug(f"Converting PDF to images for: '{self.path}'")
 
         try:
-            chunks = []
-            async for chunk in self.read():
-                chunks.append(chunk)
-            bytes = b"".join(chunks)
-
-            loop = asyncio.get_running_loop()
-
-            if not page:
-                images = await loop.run_in_executor(
-                    None,
-                    functools.partial(
-                        pdf2image.convert_from_bytes,
-                        bytes,
-                        dpi=self._config.pdf_dpi
-                    )
-                )
-                return images
-            else:
-                images = await loop.run_in_executor(
-                    None,
-                    functools.partial(
-                        pdf2image.convert_from_bytes,
-                        bytes,
-                        dpi=self._config.pdf_dpi,
-                        first_page=page,
-                        last_page=page
-                    )
-                )
-                return images
+            async with self._open_pdf() as path:
+                if page is not None and last_page is None:
+                    last_page = page
+
+                processes = self._config.render_processes
+                if last_page is None and processes > 1:
+                    info = await self._run_pdfinfo(path=path)
+                    last_page = int(info["Pages"])
+
+                async for image in render_pdf(
+                    path=path,
+                    dpi=self._config.pdf_dpi,
+                    first_page=page or 1,
+                    last_page=last_page,
+                    grayscale=grayscale,
+                    processes=processes
+                ):
+                    yield image
         except Exception as exception:
             raise Exception(
                 f"Failed to convert PDF to images: {exception}"
             )
 
+    async def _read_pdf_info(self) -> schemas.FileInfoSchema:
+        """
+        Reads the number of pages and the page sizes of a PDF file with
+        pdfinfo.
+        """
+        try:
+            async with self._open_pdf() as path:
+                info = await self._run_pdfinfo(path=path)
+        except Exception as exception:
+            raise Exception(
+                f"Failed to read PDF info: {exception}"
+            )
+
+        return _parse_pdf_info(info=info, dpi=self._config.pdf_dpi)
+
+    async def _run_pdfinfo(self, path: str) -> Dict[str, Any]:
+        """
+        Run pdfinfo for all pages of a PDF file.
+        """
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                pdf2image.pdfinfo_from_path,
+                path,
+                first_page=1,
+                last_page=_PDF_INFO_LAST_PAGE
+            )
+        )
+
+    @contextlib.asynccontextmanager
+    async def _open_pdf(self) -> AsyncIterator[str]:
+        """
+        Yields a path of the PDF file that poppler can open: the path of local
+        files, or a temporary copy of other files (which is written chunk by
+        chunk and removed afterwards).
+        """
+        path = await self.local_path()
+        if path is not None:
+            yield str(path)
+            return
+
+        loop = asyncio.get_running_loop()
+
+        descriptor, name = await loop.run_in_executor(
+            None, functools.partial(tempfile.mkstemp, suffix=".pdf"))
+        size = 0
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                async for chunk in self.read():
+                    await loop.run_in_executor(None, file.write, chunk)
+                    size += len(chunk)
+
+            yield name
+        except asyncio.CancelledError:
+            # The copy was downloaded in vain if the file is no longer
+            # needed.
+            wasted_work.add(wasted_bytes=size)
+            raise
+        finally:
+            await loop.run_in_executor(None, os.unlink, name)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _parse_pdf_info(
+    info: Dict[str, Any],
+    dpi: int
+) -> schemas.FileInfoSchema:
+    """
+    Create the file info from the output of pdfinfo. The page sizes (e.g.
+    "Page    2 size: 612 x 792 pts (letter)" and "Page    2 rot: 90") are
+    converted from points to pixels at the given DPI.
+    """
+    sizes: Dict[int, Tuple[float, float]] = {}
+    rotations: Dict[int, int] = {}
+
+    for key, value in info.items():
+        match = re.fullmatch(r"Page(?:\s+(\d+))? (size|rot)", key)
+        if match is None:
+            continue
+
+        page = int(match.group(1) or 1)
+        if match.group(2) == "rot":
+            rotations[page] = int(float(value))
+            continue
+
+        size = re.match(r"([\d.]+) x ([\d.]+) pts", str(value))
+        if size is not None:
+            sizes[page] = (float(size.group(1)), float(size.group(2)))
+
+    result = []
+    for page, (width, height) in sorted(sizes.items()):
+        if rotations.get(page, 0) % 180 == 90:
+            width, height = height, width
+        result.append(schemas.PageSizeSchema(
+            page=page,
+            width=round(width * dpi / 72),
+            height=round(height * dpi / 72)
+        ))
+
+    return schemas.FileInfoSchema(pages=int(info["Pages"]), sizes=result)
+
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,101 @@
+# ---------------------------------------------------------------------------- #
+
+import fnmatch
+import os
+import re
+from typing import List, Pattern, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+
+class PathFilter:
+    """
+    Filters the paths (relative to the path of a file provider, separated by
+    "/") that a file provider lists. Files are listed if they have one of the
+    extensions, match one of the include patterns (if any) and match none of
+    the exclude patterns. Folders that match an exclude pattern are not
+    scanned at all. The glob patterns are compiled into a single regular
+    expression each.
+    """
+    extensions: Tuple[str, ...]
+    prefix: str
+    _include: Pattern[str] | None
+    _exclude: Pattern[str] | None
+
+    def __init__(
+        self,
+        extensions: List[str],
+        include: List[str],
+        exclude: List[str]
+    ) -> None:
+        """
+        Initializes the filter with extensions and glob patterns.
+        """
+        self.extensions = tuple(
+            extension.lower() for extension in extensions)
+        self.prefix = self._get_prefix(include)
+        self._include = self._compile(include)
+        self._exclude = self._compile(exclude)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: schemas.FileProviderConfigSchema
+    ) -> "PathFilter":
+        """
+        Create the filter of a file provider configuration.
+        """
+        return cls(
+            extensions=config.extensions,
+            include=config.include,
+            exclude=config.exclude
+        )
+
+    def match_file(self, path: str) -> bool:
+        """
+        Returns True if a file should be listed.
+        """
+        if self.extensions and not path.lower().endswith(self.extensions):
+            return False
+
+        if self._include is not None and not self._include.match(path):
+            return False
+
+        return self._exclude is None or not self._exclude.match(path)
+
+    def match_folder(self, path: str) -> bool:
+        """
+        Returns True if a folder should be scanned.
+        """
+        return self._exclude is None or not self._exclude.match(path)
+
+    def _get_prefix(self, patterns: List[str]) -> str:
+        """
+        Returns the literal beginning that all paths matching one of the
+        patterns share (empty if there are no patterns). Object storages can
+        list this prefix instead of all objects.
+        """
+        if not patterns:
+            return ""
+
+        return os.path.commonprefix([
+            re.split(r"[*?\[]", pattern.strip("/"), maxsplit=1)[0]
+            for pattern in patterns
+        ])
+
+    def _compile(self, patterns: List[str]) -> Pattern[str] | None:
+        """
+        Compile glob patterns into one regular expression (None if there are
+        no patterns).
+        """
+        if not patterns:
+            return None
+
+        return re.compile("|".join(
+            fnmatch.translate(pattern.strip("/")) for pattern in patterns))
+
+# ---------------------------------------------------------------------------- #
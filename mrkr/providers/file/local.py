@@ -1,14 +1,17 @@
 # ---------------------------------------------------------------------------- #
 
+import os
+import hashlib
 import pathlib
 import logging
 import asyncio
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Iterator, List, Optional
 
 # ---------------------------------------------------------------------------- #
 
 import mrkr.schemas as schemas
-from .base import BaseFileProvider
+from .base import DEFAULT_CHUNK_SIZE, BaseFileProvider
+from ..streams import iterate_in_thread
 
 # ---------------------------------------------------------------------------- #
 
@@ -71,12 +74,8 @@ class LocalFileProvider(BaseFileProvider):
                 None, self.filename.open, 'rb')
 
             while True:
-                if chunk_size:
-                    chunk = await loop.run_in_executor(
-                        None, stream.read, chunk_size)
-                else:
-                    chunk = await loop.run_in_executor(
-                        None, stream.read)
+                chunk = await loop.run_in_executor(
+                    None, stream.read, chunk_size or DEFAULT_CHUNK_SIZE)
                 if not chunk:
                     break
                 yield chunk
@@ -85,17 +84,81 @@ class LocalFileProvider(BaseFileProvider):
         finally:
             stream.close()
 
-    async def list(self) -> AsyncGenerator[str, None]:
+    async def fingerprint(self) -> str | None:
         """
-        Lists the contents of the directory if the path is a folder.
+        Returns a hash of the path, size and modification time of the file
+        (None if the path is not a file).
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            stat = await loop.run_in_executor(None, self.filename.stat)
+        except FileNotFoundError:
+            return None
+
+        return hashlib.sha256(
+            f"{os.path.abspath(self.filename)}:{stat.st_size}:"
+            f"{stat.st_mtime_ns}".encode("utf-8")
+        ).hexdigest()
+
+    async def local_path(self) -> pathlib.Path | None:
+        """
+        Returns the path of the file (None if the path is not a file).
+        """
+        if not await self.is_file:
+            return None
+
+        return self.filename
+
+    async def list(
+        self,
+        checkpoint: Optional[schemas.ListingCheckpointSchema] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        Lists the files in the folder (and its subfolders if the listing is
+        recursive). The folder is walked in a worker thread and the files are
+        streamed back in batches (partial batches after a short delay), so
+        that large or slow folders (e.g. on network drives) do not block the
+        event loop. Local listings can not be resumed, the checkpoint is
+        ignored.
         """
         logger.debug(f"Listing files for path: '{self.filename}'")
 
         if not await self.is_folder:
             raise Exception(f"Object '{self.filename}' is not a folder.")
 
-        for item in pathlib.Path(self.filename).iterdir():
-            if item.is_file():
-                yield str(item.relative_to(self.filename))
+        async for batch in iterate_in_thread(self._walk):
+            for path in batch:
+                yield path
+
+    def _walk(self) -> Iterator[str]:
+        """
+        Walk the folder with os.scandir (blocking) and yield the paths of all
+        files that pass the filter, relative to the folder. The file type is
+        usually known from the directory entry, so no file needs to be
+        stat'ed. Excluded folders and symbolic links to folders are skipped.
+        """
+        root = str(self.filename)
+        folders: List[str] = [""]
+
+        while folders:
+            folder = folders.pop()
+            try:
+                with os.scandir(os.path.join(root, folder)) as entries:
+                    for entry in entries:
+                        path = f"{folder}/{entry.name}" if folder \
+                            else entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self._config.recursive and \
+                                        self._filter.match_folder(path):
+                                    folders.append(path)
+                            elif entry.is_file() and \
+                                    self._filter.match_file(path):
+                                yield path
+                        except OSError as exception:
+                            logger.warning(
+                                f"Skipping '{path}': {exception}")
+            except OSError as exception:
+                logger.warning(f"Skipping folder '{folder}': {exception}")
 
 # ---------------------------------------------------------------------------- #
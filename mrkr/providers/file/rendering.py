@@ -0,0 +1,102 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import collections
+import logging
+import math
+import pdf2image
+from PIL import Image
+from typing import AsyncGenerator, Deque, List, Optional, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from ..cpu import cpu_budget
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.providers.file")
+
+# ---------------------------------------------------------------------------- #
+
+# The maximum number of pages that one poppler process renders, so that the
+# first pages of large documents arrive early.
+_MAX_RUN_PAGES = 8
+
+# ---------------------------------------------------------------------------- #
+
+
+async def render_pdf(
+    path: str,
+    dpi: int,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    grayscale: bool = False,
+    processes: int = 1
+) -> AsyncGenerator[Image.Image, None]:
+    """
+    Render the pages from first_page to last_page (or to the end) of a PDF
+    file and yield them in page order. The pages are split into runs that
+    are rendered by up to processes poppler processes at a time, within the
+    CPU budget of the process. At most processes runs of pages are held in
+    memory. When the pages are no longer needed (e.g. the request was
+    cancelled), the runs that are not rendered yet are abandoned.
+    """
+    runs = _get_runs(
+        first_page=first_page,
+        last_page=last_page,
+        processes=processes
+    )
+
+    if len(runs) > 1:
+        logger.debug(f"Rendering pages {first_page}-{last_page} of '{path}' "
+                     f"in {len(runs)} runs.")
+
+    pending: Deque[asyncio.Future[List[Image.Image]]] = collections.deque()
+
+    def render_next_runs() -> None:
+        while runs and len(pending) < processes:
+            first, last = runs.pop(0)
+            pending.append(asyncio.ensure_future(cpu_budget.run_in_executor(
+                pdf2image.convert_from_path,
+                path,
+                dpi=dpi,
+                first_page=first,
+                last_page=last,
+                grayscale=grayscale
+            )))
+
+    try:
+        render_next_runs()
+        while pending:
+            images = await pending.popleft()
+            render_next_runs()
+            for image in images:
+                yield image
+    finally:
+        for future in pending:
+            future.cancel()
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_runs(
+    first_page: int,
+    last_page: Optional[int],
+    processes: int
+) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split a range of pages into runs of consecutive pages (one run to the
+    end if the last page is unknown).
+    """
+    if last_page is None:
+        return [(first_page, None)]
+
+    pages = last_page - first_page + 1
+    size = min(_MAX_RUN_PAGES, max(1, math.ceil(pages / processes)))
+
+    return [
+        (first, min(first + size - 1, last_page))
+        for first in range(first_page, last_page + 1, size)
+    ]
+
+# ---------------------------------------------------------------------------- #
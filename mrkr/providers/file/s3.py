@@ -3,27 +3,115 @@
 import pathlib
 import logging
 import asyncio
-import io
+import collections
+import contextlib
 import pydantic
 import functools
-from typing import Any, AsyncGenerator, Optional
+import hashlib
+import threading
+import time
+import botocore.exceptions
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, \
+    Tuple
 
 # ---------------------------------------------------------------------------- #
 
 import mrkr.schemas as schemas
-from .base import BaseFileProvider
-from ..aws import AwsSession
+from .base import DEFAULT_CHUNK_SIZE, BaseFileProvider
+from ..aws import AwsSession, get_aws_session
 
 # ---------------------------------------------------------------------------- #
 
 logger = logging.getLogger("mrkr.providers.file")
 
+# The maximum number of objects per listing request (the S3 maximum).
+_LIST_PAGE_SIZE = 1000
+
+# The maximum number of objects whose metadata is cached (the oldest entries
+# are removed first).
+_METADATA_CACHE_SIZE = 10_000
+
+# The error codes of requests for objects that do not exist.
+_NOT_FOUND_ERROR_CODES = ("404", "NoSuchKey", "NotFound")
+
+# The error codes of conditional requests for objects whose ETag changed.
+_CHANGED_ERROR_CODES = ("412", "PreconditionFailed")
+
 # ---------------------------------------------------------------------------- #
 
 
 class BucketObjectMetadata(pydantic.BaseModel):
     content_type: str = pydantic.Field(alias="ContentType")
     etag: str = pydantic.Field(alias="ETag")
+    size: int = pydantic.Field(alias="ContentLength")
+
+# ---------------------------------------------------------------------------- #
+
+
+class _MetadataCache:
+    """
+    A process-wide cache for the metadata of S3 objects, so that repeated
+    is_file and is_folder checks (providers are created per request) do not
+    send a HEAD request each. Only existing objects are cached, new objects
+    are visible immediately.
+    """
+    _entries: collections.OrderedDict[
+        Tuple[str, str], Tuple[float, BucketObjectMetadata]]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket: str, key: str) -> BucketObjectMetadata | None:
+        """
+        Returns the metadata of an object if it was cached and has not
+        expired.
+        """
+        with self._lock:
+            entry = self._entries.get((bucket, key))
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[(bucket, key)]
+                return None
+            return entry[1]
+
+    def set(
+        self,
+        bucket: str,
+        key: str,
+        metadata: BucketObjectMetadata,
+        ttl: float
+    ) -> None:
+        """
+        Cache the metadata of an object for ttl seconds.
+        """
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop((bucket, key), None)
+            self._entries[(bucket, key)] = (time.monotonic() + ttl, metadata)
+            while len(self._entries) > _METADATA_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, bucket: str, key: str) -> None:
+        """
+        Remove the metadata of an object (e.g. because it was changed).
+        """
+        with self._lock:
+            self._entries.pop((bucket, key), None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+_metadata_cache = _MetadataCache()
 
 # ---------------------------------------------------------------------------- #
 
@@ -34,13 +122,16 @@ class S3FileProvider(BaseFileProvider):
     """
     _config: schemas.FileProviderS3ConfigSchema
     _session: AwsSession | None
-    _bucket: Any | None
+    _client: Any | None
+    _etags: Dict[str, str]
 
     def __init__(self, config: schemas.FileProviderS3ConfigSchema):
         super().__init__(config=config)
 
         self._session = None
-        self._bucket = None
+        self._client = None
+        # The ETags that the fingerprints of the objects were created from.
+        self._etags = {}
 
     @property
     def filename(self) -> pathlib.Path:
@@ -51,15 +142,18 @@ class S3FileProvider(BaseFileProvider):
             self._config.path.strip("/")
         ) / pathlib.Path(self.path.strip("/"))
 
+    @property
+    def bucket_name(self) -> str:
+        """
+        Returns the name of the bucket.
+        """
+        return AwsSession.resolve_config(self._config.aws_bucket_name)
+
     @property
     async def is_file(self) -> bool:
         """
         Returns True if the path is a file, False otherwise.
         """
-        await self.refresh_bucket()
-        if self._bucket is None:
-            raise Exception("Bucket not initialized.")
-
         key = str(self.filename)
 
         metadata = await self._get_object_metadata(key=key)
@@ -67,21 +161,13 @@ class S3FileProvider(BaseFileProvider):
         if not metadata:
             return False
 
-        if not metadata.content_type.lower().startswith(
-                "application/x-directory"):
-            return True
-
-        return False
+        return not _is_directory(metadata)
 
     @property
     async def is_folder(self) -> bool:
         """
         Returns True if the path is a folder, False otherwise.
         """
-        await self.refresh_bucket()
-        if self._bucket is None:
-            raise Exception("Bucket not initialized.")
-
         key = str(self.filename).rstrip("/") + "/"
 
         metadata = await self._get_object_metadata(key=key)
@@ -89,158 +175,389 @@ class S3FileProvider(BaseFileProvider):
         if not metadata:
             return False
 
-        if metadata.content_type.lower().startswith(
-                "application/x-directory"):
-            return True
-
-        return False
+        return _is_directory(metadata)
 
     async def read(
         self,
         chunk_size: Optional[int] = None
     ) -> AsyncGenerator[bytes, None]:
         """
-        Asynchronously yields the file content in chunks.
+        Asynchronously yields the file content in chunks. The first part of
+        the object is requested with a single ranged GET request (without
+        checking first whether the object exists) and streamed. If the object
+        is larger than a part, the following parts are downloaded in parallel
+        (up to download_concurrency at a time, in order). Each part is
+        buffered completely, chunk_size only sets the size of the yielded
+        chunks: a read holds up to part_size * (download_concurrency + 1)
+        bytes (the part being yielded and the ones downloaded meanwhile), or
+        part_size * (2 * download_concurrency + 1) bytes if hedged requests
+        are sent. If the fingerprint of the object was
+        requested before, only the version of the object with the same ETag
+        is read (the cached metadata may be outdated), otherwise the read
+        fails.
         """
         logger.debug(f"Streaming file content for: '{self.filename}'")
 
-        await self.refresh_bucket()
-        if self._bucket is None:
-            raise Exception("Bucket not initialized.")
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
 
-        if not await self.is_file:
-            raise Exception(f"Object '{self.filename}' is not a file.")
+        client = await self.refresh_client()
 
         loop = asyncio.get_running_loop()
 
+        key = str(self.filename)
+        part_size = self._config.part_size
+
+        conditions: Dict[str, str] = {}
+        if key in self._etags:
+            conditions["IfMatch"] = self._etags[key]
+
         try:
-            stream = io.BytesIO()
-            await self._download_fileobj(
-                stream=stream
+            try:
+                response = await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        client.get_object,
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        Range=f"bytes=0-{part_size - 1}",
+                        **conditions
+                    )
+                )
+            except botocore.exceptions.ClientError as exception:
+                # Ranges of empty objects can not be satisfied.
+                if _get_error_code(exception) != "InvalidRange":
+                    raise
+                response = await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        client.get_object,
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        **conditions
+                    )
+                )
+        except botocore.exceptions.ClientError as exception:
+            if _get_error_code(exception) in _NOT_FOUND_ERROR_CODES:
+                raise Exception(f"Object '{self.filename}' is not a file.")
+            if _get_error_code(exception) in _CHANGED_ERROR_CODES:
+                self._invalidate(key=key)
+                raise Exception(
+                    f"Object '{self.filename}' was changed after its "
+                    f"fingerprint was created.")
+            raise
+
+        body = response["Body"]
+        parts: Deque[asyncio.Task[bytes]] = collections.deque()
+        try:
+            # The size of ranged responses is the size of the part, the size
+            # of the object is in the content range ("bytes 0-99/1234").
+            size = int(response.get("ContentRange", "").rpartition("/")[2]
+                       or response["ContentLength"])
+            metadata = BucketObjectMetadata(
+                **{**response, "ContentLength": size})
+            if _is_directory(metadata):
+                raise Exception(f"Object '{self.filename}' is not a file.")
+            _metadata_cache.set(
+                bucket=self.bucket_name,
+                key=key,
+                metadata=metadata,
+                ttl=self._config.metadata_ttl
             )
 
+            ranges = collections.deque(
+                (start, min(start + part_size, size) - 1)
+                for start in range(part_size, size, part_size)
+            )
+            if ranges:
+                logger.debug(f"Downloading '{self.filename}' in "
+                             f"{len(ranges) + 1} parts.")
+
+            def download_next_parts() -> None:
+                while ranges and len(parts) < \
+                        self._config.download_concurrency:
+                    start, end = ranges.popleft()
+                    parts.append(asyncio.ensure_future(self._download_part(
+                        key=key, etag=metadata.etag, start=start, end=end)))
+
+            download_next_parts()
+
             while True:
-                if chunk_size:
-                    chunk = await loop.run_in_executor(
-                        None, stream.read, chunk_size)
-                else:
-                    chunk = await loop.run_in_executor(
-                        None, stream.read)
+                chunk = await loop.run_in_executor(
+                    None, body.read, chunk_size)
                 if not chunk:
                     break
                 yield chunk
-        except Exception as exception:
-            raise exception
+
+            while parts:
+                data = await parts.popleft()
+                download_next_parts()
+                for offset in range(0, len(data), chunk_size):
+                    yield data[offset:offset + chunk_size]
         finally:
-            stream.close()
+            for part in parts:
+                part.cancel()
+            body.close()
 
-    async def list(self) -> AsyncGenerator[str, None]:
+    async def list(
+        self,
+        checkpoint: Optional[schemas.ListingCheckpointSchema] = None
+    ) -> AsyncGenerator[str, None]:
         """
-        Lists the contents of the directory if the path is a folder.
+        Lists the contents of the directory if the path is a folder. The
+        objects are listed page by page in the executor, the next page is
+        fetched while the keys of the current one are processed. The literal
+        prefix of the include patterns and the delimiter of non-recursive
+        listings are passed to S3, so that it does not return objects that
+        would be filtered out anyway. The continuation token of the next page
+        is stored in the checkpoint after each page, a listing with the same
+        prefix continues there.
         """
         logger.debug(f"Listing files for path: '{self.filename}'")
 
-        await self.refresh_bucket()
-        if self._bucket is None:
-            raise Exception("Bucket not initialized.")
-
         if not await self.is_folder:
             raise Exception(f"Object '{self.filename}' is not a folder.")
 
+        client = await self.refresh_client()
+
         loop = asyncio.get_running_loop()
 
-        key = str(self.filename).rstrip("/") + "/"
+        folder = str(self.filename).rstrip("/") + "/"
+        prefix = folder + self._filter.prefix
+
+        arguments: Dict[str, Any] = {
+            "Bucket": self.bucket_name,
+            "Prefix": prefix,
+            "MaxKeys": _LIST_PAGE_SIZE,
+        }
+        if not self._config.recursive:
+            arguments["Delimiter"] = "/"
+
+        token = None
+        if checkpoint is not None and checkpoint.prefix == prefix:
+            token = checkpoint.token
+            if token:
+                logger.debug(f"Continuing listing of '{prefix}'.")
+
+        def fetch(token: Optional[str]) -> "asyncio.Future[Dict[str, Any]]":
+            if token:
+                return loop.run_in_executor(None, functools.partial(
+                    client.list_objects_v2,
+                    ContinuationToken=token,
+                    **arguments))
+            return loop.run_in_executor(None, functools.partial(
+                client.list_objects_v2, **arguments))
+
+        pending: Optional[asyncio.Future[Dict[str, Any]]] = fetch(token)
+        try:
+            while pending is not None:
+                page = await pending
 
-        response = await loop.run_in_executor(
-            None,
-            functools.partial(
-                self._bucket.objects.filter,
-                Prefix=key
-            )
-        )
+                token = page.get("NextContinuationToken") \
+                    if page.get("IsTruncated") else None
+                pending = fetch(token) if token else None
+
+                for object in page.get("Contents", []):
+                    path = self._get_path(key=object["Key"], folder=folder)
+                    if path is not None:
+                        yield path
+
+                if checkpoint is not None:
+                    checkpoint.prefix = prefix
+                    checkpoint.token = token
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def fingerprint(self) -> str | None:
+        """
+        Returns a hash of the bucket, key and ETag of the object (None if the
+        path is not a file). The following reads of the object are
+        conditional on this ETag, so that the content always matches the
+        fingerprint.
+        """
+        key = str(self.filename)
+
+        metadata = await self._get_object_metadata(key=key)
+
+        if not metadata or _is_directory(metadata):
+            return None
+
+        self._etags[key] = metadata.etag
 
-        for object in response:
-            if object.key.endswith('/'):
-                continue
-            yield object.key[len(str(self.filename))+1:]
+        return hashlib.sha256(
+            f"s3:{self.bucket_name}:{key}:{metadata.etag}".encode("utf-8")
+        ).hexdigest()
 
-    async def refresh_bucket(self) -> None:
+    async def object_location(self) -> schemas.ObjectLocationSchema | None:
         """
-        Refresh the S3 bucket if needed.
+        Returns the bucket and key of the file.
         """
-        aws_config = schemas.AwsS3ConfigSchema(**self._config.model_dump())
+        return schemas.ObjectLocationSchema(
+            bucket=self.bucket_name,
+            key=str(self.filename)
+        )
 
+    async def refresh_client(self) -> Any:
+        """
+        Return the S3 client of the shared AWS session. The client is
+        replaced if the temporary credentials were refreshed.
+        """
         if self._session is None:
-            self._session = AwsSession(config=aws_config)
+            self._session = get_aws_session(
+                config=schemas.AwsS3ConfigSchema(**self._config.model_dump()))
 
-        if self._bucket is None:
-            resource = await self._session.get_resource(service_name="s3")
+        self._client = await self._session.get_client(service_name="s3")
 
-            loop = asyncio.get_running_loop()
+        return self._client
 
-            self._bucket = await loop.run_in_executor(
-                None,
-                functools.partial(
-                    resource.Bucket,
-                    name=self._session.resolve_config(
-                        aws_config.aws_bucket_name)
+    async def _download_part(
+        self,
+        key: str,
+        etag: str,
+        start: int,
+        end: int
+    ) -> bytes:
+        """
+        Download the bytes from start to end (inclusive) of an object, unless
+        the object was changed in the meantime. If hedge_after is set and the
+        part has not arrived in time, a second request is sent and the first
+        response is used.
+        """
+        client = await self.refresh_client()
+
+        loop = asyncio.get_running_loop()
+
+        def download() -> bytes:
+            try:
+                response = client.get_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Range=f"bytes={start}-{end}",
+                    IfMatch=etag
                 )
-            )
+            except botocore.exceptions.ClientError as exception:
+                if _get_error_code(exception) in _CHANGED_ERROR_CODES:
+                    self._invalidate(key=key)
+                raise
+            with contextlib.closing(response["Body"]) as body:
+                return body.read()
+
+        requests = {loop.run_in_executor(None, download)}
+
+        if self._config.hedge_after is not None:
+            done, _ = await asyncio.wait(
+                requests, timeout=self._config.hedge_after)
+            if not done:
+                logger.debug(f"Hedging slow request for bytes {start}-{end} "
+                             f"of '{key}'.")
+                requests.add(loop.run_in_executor(None, download))
+
+        try:
+            while True:
+                done, requests = await asyncio.wait(
+                    requests, return_when=asyncio.FIRST_COMPLETED)
+                for request in done:
+                    if request.exception() is None or not requests:
+                        return request.result()
+        finally:
+            for request in requests:
+                request.cancel()
 
     async def _get_object_metadata(
         self,
         key: str
     ) -> BucketObjectMetadata | None:
         """
-        Retrieve the matadata for an S3 object.
+        Retrieve the matadata for an S3 object (without its content) with a
+        HEAD request, or from the cache.
         """
-        loop = asyncio.get_running_loop()
+        metadata = _metadata_cache.get(bucket=self.bucket_name, key=key)
+        if metadata is not None:
+            return metadata
 
-        await self.refresh_bucket()
-        if self._bucket is None:
-            raise Exception("Bucket not initialized.")
+        client = await self.refresh_client()
 
-        response = await loop.run_in_executor(
-            None,
-            functools.partial(
-                self._bucket.objects.filter,
-                Prefix=key
+        loop = asyncio.get_running_loop()
+
+        try:
+            response = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    client.head_object,
+                    Bucket=self.bucket_name,
+                    Key=key
+                )
             )
+        except botocore.exceptions.ClientError as exception:
+            if _get_error_code(exception) in _NOT_FOUND_ERROR_CODES:
+                return None
+            raise
+
+        metadata = BucketObjectMetadata(**(response))
+        _metadata_cache.set(
+            bucket=self.bucket_name,
+            key=key,
+            metadata=metadata,
+            ttl=self._config.metadata_ttl
         )
 
-        matched_object = None
-        for object in response:
-            if object.key == key:
-                matched_object = object
+        return metadata
 
-        if matched_object is None:
+    def _invalidate(self, key: str) -> None:
+        """
+        Forget the metadata of an object that was changed, so that the next
+        fingerprint is created from its new ETag.
+        """
+        logger.debug(f"Object '{key}' was changed, removing its metadata.")
+        _metadata_cache.delete(bucket=self.bucket_name, key=key)
+        self._etags.pop(key, None)
+
+    def _get_path(self, key: str, folder: str) -> str | None:
+        """
+        Returns the path of an object relative to the listed folder, or None
+        if the object is a folder or is filtered out.
+        """
+        if key.endswith("/"):
             return None
 
-        response = await loop.run_in_executor(
-            None,
-            matched_object.get
-        )
+        path = key[len(folder):]
 
-        return BucketObjectMetadata(**(response))
+        if not self._config.recursive and "/" in path:
+            return None
 
-    async def _download_fileobj(
-        self,
-        stream: io.BytesIO
-    ) -> None:
-        loop = asyncio.get_running_loop()
+        if not self._filter.match_file(path) or not all(
+                self._filter.match_folder(parent)
+                for parent in _get_folders(path)):
+            return None
 
-        await self.refresh_bucket()
-        if self._bucket is None:
-            raise Exception("Bucket not initialized.")
+        return path
 
-        await loop.run_in_executor(
-            None,
-            functools.partial(
-                self._bucket.download_fileobj,
-                Key=str(self.filename),
-                Fileobj=stream
-            )
-        )
-        stream.seek(0)
+# ---------------------------------------------------------------------------- #
+
+
+def _get_folders(path: str) -> List[str]:
+    """
+    Returns the folders that contain a path, e.g. ["a", "a/b"] for "a/b/c".
+    """
+    parts = path.split("/")[:-1]
+    return ["/".join(parts[:index + 1]) for index in range(len(parts))]
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_error_code(exception: botocore.exceptions.ClientError) -> str | None:
+    """
+    Returns the error code of a failed request.
+    """
+    return exception.response.get("Error", {}).get("Code")
+
+# ---------------------------------------------------------------------------- #
+
+
+def _is_directory(metadata: BucketObjectMetadata) -> bool:
+    """
+    Returns True if the object is a folder marker.
+    """
+    return metadata.content_type.lower().startswith("application/x-directory")
 
 # ---------------------------------------------------------------------------- #
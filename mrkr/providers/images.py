@@ -0,0 +1,308 @@
+# ---------------------------------------------------------------------------- #
+
+import contextlib
+import functools
+import io
+import math
+import threading
+from PIL import Image, features
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+# The key in Image.info under which the original file content is kept.
+_SOURCE_KEY = "mrkr.source"
+
+# The EXIF tag for the orientation of an image.
+_EXIF_ORIENTATION = 0x0112
+
+# Oversized pages are downsampled by limit_pixels instead of being rejected by
+# PIL as decompression bombs. Images that would still need more than this
+# multiple of the pixel limit to be decoded (e.g. huge PNG files, which can
+# not be decoded at a reduced size like JPEG files) are rejected.
+_MAX_DECODE_FACTOR = 4
+
+# JPEG files can be decoded at up to 1/8 of their width and height, so
+# open_image accepts files with up to this multiple of the pixels that
+# limit_pixels decodes.
+_MAX_DRAFT_REDUCTION = 64
+
+# Serializes the changes of PIL's (process-wide) decompression bomb limit.
+_pixel_limit_lock = threading.Lock()
+
+# The image modes that can be saved in each format (other images are
+# converted to RGB first).
+_SAVE_MODES = {
+    "JPEG": ("RGB", "L", "CMYK"),
+    "WEBP": ("RGB", "RGBA", "L"),
+    "AVIF": ("RGB", "RGBA", "L"),
+}
+
+# ---------------------------------------------------------------------------- #
+
+
+def attach_source(image: Image.Image, data: bytes) -> None:
+    """
+    Keep the original file content of an image that was opened (but not yet
+    decoded) with Image.open, so that it can be passed on without being
+    decoded and encoded again.
+    """
+    image.info[_SOURCE_KEY] = (data, image.size)
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_source(
+    image: Image.Image,
+    formats: Tuple[str, ...],
+    modes: Optional[Tuple[str, ...]] = None,
+    max_bytes: Optional[int] = None
+) -> bytes | None:
+    """
+    Return the original file content of an image if it can be used instead
+    of encoding the image again: the image must not have been changed since
+    it was opened (converted images have no format, and Image.info is copied
+    by most operations), it must be in one of the given formats and modes, it
+    must not exceed the given size, and it must not be rotated by its EXIF
+    data.
+    """
+    source = image.info.get(_SOURCE_KEY)
+    if source is None:
+        return None
+
+    data, size = source
+
+    if image.format not in formats or image.size != size:
+        return None
+
+    if modes is not None and image.mode not in modes:
+        return None
+
+    if max_bytes is not None and len(data) > max_bytes:
+        return None
+
+    if image.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        return None
+
+    return data
+
+# ---------------------------------------------------------------------------- #
+
+
+def open_image(data: bytes, max_pixels: int) -> Image.Image:
+    """
+    Open an image file without decoding it (blocking). Unlike Image.open,
+    files with more pixels than PIL's decompression bomb limit are accepted
+    as long as limit_pixels can decode them at a reduced size; the image
+    must be passed through limit_pixels (or fit_image with max_pixels)
+    before its pixels are used.
+    """
+    with _pixel_limit(_MAX_DRAFT_REDUCTION * _MAX_DECODE_FACTOR * max_pixels):
+        return Image.open(io.BytesIO(data))
+
+
+@contextlib.contextmanager
+def _pixel_limit(pixels: int) -> Iterator[None]:
+    """
+    Raise PIL's decompression bomb limit while an image header is read, so
+    that images with up to the given number of pixels are accepted (PIL
+    rejects images with more than twice its limit). The previous limit is
+    restored afterwards.
+    """
+    with _pixel_limit_lock:
+        previous = Image.MAX_IMAGE_PIXELS
+        if previous is not None and previous * 2 < pixels:
+            Image.MAX_IMAGE_PIXELS = pixels // 2
+        try:
+            yield
+        finally:
+            Image.MAX_IMAGE_PIXELS = previous
+
+# ---------------------------------------------------------------------------- #
+
+
+def limit_pixels(image: Image.Image, max_pixels: int) -> Image.Image:
+    """
+    Downsample an image (blocking) if it has more than the given number of
+    pixels. JPEG files that were opened but not yet decoded are decoded at a
+    reduced size, so the full image is never held in memory. Returns the
+    image itself if it is small enough.
+    """
+    width, height = image.size
+    if width * height <= max_pixels:
+        return image
+
+    scale = math.sqrt(max_pixels / (width * height))
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    # Only has an effect on JPEG files that have not been decoded yet.
+    image.draft(None, size)
+
+    _check_decode_size(image=image, size=(width, height),
+                       max_pixels=max_pixels)
+
+    return image.resize(
+        size, resample=Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _check_decode_size(
+    image: Image.Image,
+    size: Tuple[int, int],
+    max_pixels: int
+) -> None:
+    """
+    Raise an error if decoding an image (at its draft size) needs more than
+    _MAX_DECODE_FACTOR times max_pixels pixels. The size is the original
+    size of the image, for the error message.
+    """
+    if image.width * image.height > _MAX_DECODE_FACTOR * max_pixels:
+        raise Exception(
+            f"Image with {size[0]}x{size[1]} pixels is too large to be "
+            f"decoded (limit: {max_pixels} pixels).")
+
+# ---------------------------------------------------------------------------- #
+
+
+def save_image(image: Image.Image, format: str, quality: int) -> bytes:
+    """
+    Encode an image (blocking). JPEG images are saved as optimized
+    progressive JPEG files, so browsers can show them before they are
+    loaded completely. The quality applies to JPEG, WebP and AVIF images.
+    """
+    format = format.upper()
+
+    modes = _SAVE_MODES.get(format)
+    if modes is not None and image.mode not in modes:
+        image = image.convert("RGB")
+
+    options: Dict[str, Any] = {}
+    if format == "JPEG":
+        options = {"quality": quality, "progressive": True, "optimize": True}
+    elif format in ("WEBP", "AVIF"):
+        options = {"quality": quality}
+
+    data = io.BytesIO()
+    image.save(data, format=format, **options)
+    return data.getvalue()
+
+# ---------------------------------------------------------------------------- #
+
+
+def convert_image(
+    data: bytes,
+    format: str,
+    quality: int,
+    max_size: Optional[int] = None
+) -> bytes | None:
+    """
+    Convert an encoded image (blocking) to another format and downscale it
+    so that neither side exceeds max_size. JPEG files are decoded at a
+    reduced size if possible. Returns None if the image already has the
+    format and fits, so that it can be used as it is.
+    """
+    image: Image.Image = Image.open(io.BytesIO(data))
+
+    fits = max_size is None or max(image.size) <= max_size
+    if image.format == format.upper() and fits:
+        return None
+
+    if not fits and max_size is not None:
+        image = fit_image(image=image, max_size=max_size)
+
+    return save_image(image=image, format=format, quality=quality)
+
+# ---------------------------------------------------------------------------- #
+
+
+def fit_image(
+    image: Image.Image,
+    max_size: int,
+    max_pixels: Optional[int] = None
+) -> Image.Image:
+    """
+    Downscale an image (blocking) so that neither side exceeds max_size.
+    JPEG files that were opened but not yet decoded are decoded at a reduced
+    size. If max_pixels is given, images that would need too many pixels to
+    be decoded are rejected (as by limit_pixels). Returns the image itself
+    if it fits.
+    """
+    size = image.size
+    if max(size) > max_size:
+        # Only has an effect on JPEG files that have not been decoded yet.
+        image.draft(None, (max_size, max_size))
+
+    if max_pixels is not None:
+        _check_decode_size(image=image, size=size, max_pixels=max_pixels)
+
+    if max(image.size) <= max_size:
+        return image
+
+    image.thumbnail(
+        (max_size, max_size),
+        resample=Image.Resampling.LANCZOS,
+        reducing_gap=2.0
+    )
+    return image
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_tiles(
+    data: bytes,
+    level: int,
+    tile_size: int,
+    format: str,
+    quality: int
+) -> Dict[Tuple[int, int], bytes]:
+    """
+    Split an encoded image (blocking), downscaled by 2 to the power of the
+    level, into square tiles. JPEG files are decoded at a reduced size if
+    possible. Returns the encoded tiles by their column and row.
+    """
+    image: Image.Image = Image.open(io.BytesIO(data))
+
+    scale = 2 ** level
+    size = (max(1, math.ceil(image.width / scale)),
+            max(1, math.ceil(image.height / scale)))
+
+    if size != image.size:
+        # Only has an effect on JPEG files that have not been decoded yet.
+        image.draft(None, size)
+        image = image.resize(
+            size, resample=Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    return {
+        (x, y): save_image(
+            image=image.crop((
+                x * tile_size,
+                y * tile_size,
+                min((x + 1) * tile_size, size[0]),
+                min((y + 1) * tile_size, size[1])
+            )),
+            format=format,
+            quality=quality
+        )
+        for x in range(math.ceil(size[0] / tile_size))
+        for y in range(math.ceil(size[1] / tile_size))
+    }
+
+# ---------------------------------------------------------------------------- #
+
+
+@functools.lru_cache
+def can_save(format: str) -> bool:
+    """
+    Returns whether PIL can encode images in a format (WebP and AVIF need
+    optional libraries).
+    """
+    Image.init()
+
+    if format.upper() not in Image.SAVE:
+        return False
+    if format.upper() in ("WEBP", "AVIF"):
+        return bool(features.check(format.lower()))
+    return True
+
+# ---------------------------------------------------------------------------- #
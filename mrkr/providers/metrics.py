@@ -0,0 +1,63 @@
+# ---------------------------------------------------------------------------- #
+
+import threading
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+
+class WastedWork:
+    """
+    Counts the work that was done in vain because the requests that needed
+    it were cancelled (e.g. because the user navigated away while a
+    document was still being rendered). The counters are shared by all
+    threads of the process.
+    """
+    _lock: threading.Lock
+    _cancelled_requests: int
+    _abandoned_jobs: int
+    _wasted_jobs: int
+    _wasted_bytes: int
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cancelled_requests = 0
+        self._abandoned_jobs = 0
+        self._wasted_jobs = 0
+        self._wasted_bytes = 0
+
+    def add(
+        self,
+        cancelled_requests: int = 0,
+        abandoned_jobs: int = 0,
+        wasted_jobs: int = 0,
+        wasted_bytes: int = 0
+    ) -> None:
+        """
+        Add to the counters.
+        """
+        with self._lock:
+            self._cancelled_requests += cancelled_requests
+            self._abandoned_jobs += abandoned_jobs
+            self._wasted_jobs += wasted_jobs
+            self._wasted_bytes += wasted_bytes
+
+    def metrics(self) -> schemas.WastedWorkMetricsSchema:
+        """
+        Returns the metrics of the wasted work.
+        """
+        with self._lock:
+            return schemas.WastedWorkMetricsSchema(
+                cancelled_requests=self._cancelled_requests,
+                abandoned_jobs=self._abandoned_jobs,
+                wasted_jobs=self._wasted_jobs,
+                wasted_bytes=self._wasted_bytes
+            )
+
+
+wasted_work = WastedWork()
+
+# ---------------------------------------------------------------------------- #
@@ -1,5 +1,32 @@
 # ---------------------------------------------------------------------------- #
 
-from .tesseract import TesseractOcrProvider
+from typing import TYPE_CHECKING
+
+# ---------------------------------------------------------------------------- #
+
+from .result import OcrResult, OcrResultBuilder
+from ..registry import lazy_attributes
+
+if TYPE_CHECKING:
+    from .tesseract import TesseractOcrProvider
+    from .textract import TextractOcrProvider
+    from .preprocessing import PageTransform, preprocess_images, \
+        restore_positions
+
+# ---------------------------------------------------------------------------- #
+
+# The providers and the preprocessing depend on pytesseract, boto3 and numpy
+# and are imported on first access (PEP 562).
+__getattr__, __dir__ = lazy_attributes(
+    module=__name__,
+    namespace=globals(),
+    references={
+        "TesseractOcrProvider": f"{__name__}.tesseract:TesseractOcrProvider",
+        "TextractOcrProvider": f"{__name__}.textract:TextractOcrProvider",
+        "PageTransform": f"{__name__}.preprocessing:PageTransform",
+        "preprocess_images": f"{__name__}.preprocessing:preprocess_images",
+        "restore_positions": f"{__name__}.preprocessing:restore_positions",
+    }
+)
 
 # ---------------------------------------------------------------------------- #
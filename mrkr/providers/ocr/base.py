@@ -1,12 +1,13 @@
 # ---------------------------------------------------------------------------- #
 
 import logging
-from typing import Any, List, Self
-from PIL import Image
+from typing import Any, Awaitable, List, Self, Tuple, Type, TypeVar
+from PIL import Image, UnidentifiedImageError
 
 # ---------------------------------------------------------------------------- #
 
 import mrkr.schemas as schemas
+from .result import OcrResult
 
 # ---------------------------------------------------------------------------- #
 
@@ -14,6 +15,18 @@ logger = logging.getLogger("mrkr.providers.ocr")
 
 # ---------------------------------------------------------------------------- #
 
+T = TypeVar("T")
+
+# Errors that only affect the page they occur on (e.g. a page image that can
+# not be decoded). Any other error (e.g. a missing binary or invalid
+# credentials) would fail every page, so it fails the whole OCR instead.
+_PAGE_ERRORS: Tuple[Type[Exception], ...] = (
+    TimeoutError,
+    UnidentifiedImageError
+)
+
+# ---------------------------------------------------------------------------- #
+
 
 class BaseOcrProvider:
     """
@@ -37,6 +50,13 @@ class BaseOcrProvider:
 
         return self
 
+    @property
+    def preprocessing(self) -> schemas.OcrPreprocessingSchema:
+        """
+        Returns the configuration of the preprocessing of pages before OCR.
+        """
+        return self._config.preprocessing
+
     async def __aenter__(self) -> Self:
         """
         Implement this method to initialize the OCR provider. Should return
@@ -55,9 +75,61 @@ class BaseOcrProvider:
         """
         pass
 
-    async def ocr(self) -> schemas.OcrResultSchema:
+    async def _run_page(
+        self,
+        page: int,
+        operation: Awaitable[T]
+    ) -> T | None:
+        """
+        Run the OCR of a single page. Returns None if the page timed out or
+        failed with a page error (see is_page_error), so that the remaining
+        pages of the document can still be processed. Other errors are
+        raised. The operation applies the page timeout itself, once the page
+        is actually processed, so that waiting for the CPU budget or a rate
+        limiter does not count towards it.
+        """
+        try:
+            return await operation
+        except TimeoutError:
+            logger.warning(
+                f"OCR of page {page} timed out after "
+                f"{self._config.page_timeout} seconds.")
+        except Exception as exception:
+            if not self.is_page_error(exception):
+                raise
+            logger.warning(f"OCR of page {page} failed: {exception}")
+
+        return None
+
+    def is_page_error(self, exception: Exception) -> bool:
+        """
+        Returns True if an error only affects a single page (e.g. the image
+        can not be decoded). Override this method to add the page errors of
+        a provider.
+        """
+        return isinstance(exception, _PAGE_ERRORS)
+
+    async def ocr(self) -> OcrResult:
         """
         Implement this method to perform OCR on the file and return the result.
+        Use an OcrResultBuilder to create the result.
+        """
+        raise NotImplementedError
+
+    def supports_object(self, location: schemas.ObjectLocationSchema) -> bool:
+        """
+        Implement this method to return True if the provider can perform OCR
+        directly on an object in an object storage (see ocr_object).
+        """
+        return False
+
+    async def ocr_object(
+        self,
+        location: schemas.ObjectLocationSchema
+    ) -> OcrResult:
+        """
+        Implement this method to perform OCR directly on an object in an
+        object storage (e.g. S3) without rendering the pages locally.
         """
         raise NotImplementedError
 
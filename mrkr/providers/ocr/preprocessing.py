@@ -0,0 +1,370 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import functools
+import logging
+import math
+import time
+import numpy
+import pydantic
+from PIL import Image
+from typing import Dict, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.schemas as schemas
+from .result import OcrResult
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.providers.ocr")
+
+# ---------------------------------------------------------------------------- #
+
+# The skew is estimated on a downscaled copy of the page with about this
+# width, which is precise enough and keeps the estimation fast.
+_DESKEW_WIDTH = 800
+
+# Rows and columns where more than this share of the pixels is dark are
+# treated as scanner borders.
+_BORDER_INK_RATIO = 0.8
+
+# The margin (in pixels) that is kept around the content when cropping.
+_CROP_MARGIN = 10
+
+# ---------------------------------------------------------------------------- #
+
+
+class PageTransform(pydantic.BaseModel):
+    """
+    The transformation of a page by the preprocessing. Positions on the
+    preprocessed page can be mapped back to the original page.
+    """
+    original_size: Tuple[int, int] = pydantic.Field(
+        ...,
+        description="The size of the original page in pixels.",
+    )
+    angle: float = pydantic.Field(
+        default=0.0,
+        description="The rotation (counterclockwise, in degrees) around the "
+                    "center of the page.",
+    )
+    crop: Tuple[int, int] = pydantic.Field(
+        default=(0, 0),
+        description="The left and top offset of the crop in pixels.",
+    )
+    scale: float = pydantic.Field(
+        default=1.0,
+        description="The scale factor applied after cropping.",
+    )
+    size: Tuple[int, int] = pydantic.Field(
+        ...,
+        description="The size of the preprocessed page in pixels.",
+    )
+    timings: Dict[str, float] = pydantic.Field(
+        default={},
+        description="The duration of each preprocessing stage in seconds.",
+    )
+
+    @property
+    def is_identity(self) -> bool:
+        """
+        Returns True if the positions do not change.
+        """
+        return self.angle == 0 and self.crop == (0, 0) and \
+            self.scale == 1 and self.size == self.original_size
+
+    def to_original(
+        self,
+        left: float,
+        top: float,
+        width: float,
+        height: float
+    ) -> Tuple[float, float, float, float]:
+        """
+        Map a box (relative to the size of the preprocessed page) to the
+        original page. Rotated boxes are replaced by their bounding box.
+        """
+        original_width, original_height = self.original_size
+        center_x, center_y = original_width / 2, original_height / 2
+        cos = math.cos(math.radians(self.angle))
+        sin = math.sin(math.radians(self.angle))
+
+        xs, ys = [], []
+        for x, y in ((left, top), (left + width, top),
+                     (left, top + height), (left + width, top + height)):
+            # preprocessed page -> rotated page (undo scale and crop)
+            x = x * self.size[0] / self.scale + self.crop[0] - center_x
+            y = y * self.size[1] / self.scale + self.crop[1] - center_y
+            # rotated page -> original page (undo rotation)
+            xs.append(center_x + x * cos - y * sin)
+            ys.append(center_y + x * sin + y * cos)
+
+        x0 = min(max(min(xs) / original_width, 0.0), 1.0)
+        y0 = min(max(min(ys) / original_height, 0.0), 1.0)
+        x1 = min(max(max(xs) / original_width, 0.0), 1.0)
+        y1 = min(max(max(ys) / original_height, 0.0), 1.0)
+
+        return (round(x0, 5), round(y0, 5),
+                round(x1 - x0, 5), round(y1 - y0, 5))
+
+# ---------------------------------------------------------------------------- #
+
+
+def otsu_threshold(pixels: numpy.ndarray) -> int:
+    """
+    Return the threshold that best separates dark and light pixels of a
+    grayscale image (Otsu's method).
+    """
+    histogram = numpy.bincount(pixels.ravel(), minlength=256).astype(
+        numpy.float64)
+    levels = numpy.arange(256, dtype=numpy.float64)
+
+    weight = numpy.cumsum(histogram)
+    total = weight[-1]
+    mean = numpy.cumsum(histogram * levels)
+
+    background = weight[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+
+    variance = numpy.zeros(255)
+    variance[valid] = (
+        mean[-1] * background[valid] - mean[:-1][valid] * total
+    ) ** 2 / (background[valid] * foreground[valid])
+
+    return int(numpy.argmax(variance)) + 1
+
+# ---------------------------------------------------------------------------- #
+
+
+def estimate_skew(
+    pixels: numpy.ndarray,
+    max_angle: float
+) -> float:
+    """
+    Estimate the rotation (in degrees) that aligns the text lines of a page
+    with the horizontal axis. The ink pixels are projected onto the vertical
+    axis for a range of angles; the angle with the sharpest projection
+    profile (the largest sum of squares) wins. A coarse search is refined
+    around the best angle.
+    """
+    scale = min(1.0, _DESKEW_WIDTH / pixels.shape[1])
+    step = max(1, int(round(1 / scale)))
+    small = pixels[::step, ::step]
+
+    ys, xs = numpy.nonzero(small < otsu_threshold(small))
+    if len(ys) < 100:
+        return 0.0
+
+    center_y, center_x = small.shape[0] / 2, small.shape[1] / 2
+    xs = xs.astype(numpy.float64) - center_x
+    ys = ys.astype(numpy.float64) - center_y
+
+    def score(angle: float) -> float:
+        radians = math.radians(angle)
+        rows = -xs * math.sin(radians) + ys * math.cos(radians)
+        rows = numpy.rint(rows - rows.min()).astype(numpy.int64)
+        profile = numpy.bincount(rows).astype(numpy.float64)
+        return float(numpy.dot(profile, profile))
+
+    angles = numpy.arange(-max_angle, max_angle + 0.5, 0.5)
+    best = float(max(angles, key=score))
+
+    angles = numpy.arange(best - 0.5, best + 0.55, 0.05)
+    best = float(max(angles, key=score))
+
+    return round(best, 2)
+
+# ---------------------------------------------------------------------------- #
+
+
+def find_content_box(
+    pixels: numpy.ndarray
+) -> Tuple[int, int, int, int]:
+    """
+    Return the box (left, top, right, bottom) that contains the content of a
+    page, without empty margins and dark scanner borders.
+    """
+    ink = pixels < otsu_threshold(pixels)
+
+    rows = ink.mean(axis=1)
+    columns = ink.mean(axis=0)
+
+    content_rows = numpy.nonzero((rows > 0) & (rows < _BORDER_INK_RATIO))[0]
+    content_columns = numpy.nonzero(
+        (columns > 0) & (columns < _BORDER_INK_RATIO))[0]
+
+    height, width = pixels.shape
+    if len(content_rows) == 0 or len(content_columns) == 0:
+        return (0, 0, width, height)
+
+    return (
+        max(int(content_columns[0]) - _CROP_MARGIN, 0),
+        max(int(content_rows[0]) - _CROP_MARGIN, 0),
+        min(int(content_columns[-1]) + _CROP_MARGIN + 1, width),
+        min(int(content_rows[-1]) + _CROP_MARGIN + 1, height)
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def estimate_x_height(pixels: numpy.ndarray) -> float | None:
+    """
+    Estimate the x-height of the text on a page (in pixels) from the runs of
+    rows that contain ink. The median height of a text line (including
+    ascenders and descenders) is about twice its x-height.
+    """
+    ink_rows = (pixels < otsu_threshold(pixels)).any(axis=1)
+
+    edges = numpy.diff(ink_rows.astype(numpy.int8), prepend=0, append=0)
+    starts = numpy.nonzero(edges == 1)[0]
+    ends = numpy.nonzero(edges == -1)[0]
+    heights = ends - starts
+
+    # ignore specks and rules that are only a few pixels high
+    heights = heights[heights > 3]
+    if len(heights) == 0:
+        return None
+
+    return float(numpy.median(heights)) / 2
+
+# ---------------------------------------------------------------------------- #
+
+
+def preprocess_image(
+    image: Image.Image,
+    config: schemas.OcrPreprocessingSchema
+) -> Tuple[Image.Image, PageTransform]:
+    """
+    Preprocess a page for OCR (blocking) and return the preprocessed image
+    together with the transformation of the page.
+    """
+    timings: Dict[str, float] = {}
+    original_size = image.size
+    angle = 0.0
+    crop = (0, 0)
+    scale = 1.0
+
+    start = time.perf_counter()
+    if image.mode != "L":
+        image = image.convert("L")
+    pixels = numpy.asarray(image)
+    timings["grayscale"] = time.perf_counter() - start
+
+    if config.deskew:
+        start = time.perf_counter()
+        angle = estimate_skew(pixels=pixels, max_angle=config.max_skew_angle)
+        if angle != 0:
+            image = image.rotate(
+                angle, resample=Image.Resampling.BILINEAR, fillcolor=255)
+            pixels = numpy.asarray(image)
+        timings["deskew"] = time.perf_counter() - start
+
+    if config.crop_borders:
+        start = time.perf_counter()
+        box = find_content_box(pixels=pixels)
+        if box != (0, 0, image.width, image.height):
+            image = image.crop(box)
+            pixels = pixels[box[1]:box[3], box[0]:box[2]]
+            crop = (box[0], box[1])
+        timings["crop"] = time.perf_counter() - start
+
+    if config.target_x_height:
+        start = time.perf_counter()
+        x_height = estimate_x_height(pixels=pixels)
+        if x_height and x_height > config.target_x_height:
+            scale = config.target_x_height / x_height
+            image = image.resize(
+                (max(1, round(image.width * scale)),
+                 max(1, round(image.height * scale))),
+                resample=Image.Resampling.LANCZOS
+            )
+            pixels = numpy.asarray(image)
+        timings["downscale"] = time.perf_counter() - start
+
+    if config.mode == schemas.OcrPreprocessingMode.binary:
+        start = time.perf_counter()
+        threshold = otsu_threshold(pixels)
+        image = Image.fromarray(pixels >= threshold)
+        timings["binary"] = time.perf_counter() - start
+
+    transform = PageTransform(
+        original_size=original_size,
+        angle=angle,
+        crop=crop,
+        scale=scale,
+        size=image.size,
+        timings=timings
+    )
+
+    return image, transform
+
+# ---------------------------------------------------------------------------- #
+
+
+async def preprocess_images(
+    images: List[Image.Image],
+    config: schemas.OcrPreprocessingSchema
+) -> Tuple[List[Image.Image], List[PageTransform]]:
+    """
+    Preprocess the pages of a document for OCR.
+    """
+    loop = asyncio.get_running_loop()
+
+    result = []
+    transforms = []
+    for page, image in enumerate(images):
+        preprocessed, transform = await loop.run_in_executor(
+            None,
+            functools.partial(
+                preprocess_image,
+                image=image,
+                config=config
+            )
+        )
+
+        logger.debug(
+            f"Preprocessed page {page + 1}: " +
+            ", ".join(f"{stage} {duration * 1000:.1f}ms"
+                      for stage, duration in transform.timings.items()) +
+            f" (angle {transform.angle}, scale {transform.scale:.2f})")
+
+        result.append(preprocessed)
+        transforms.append(transform)
+
+    return result, transforms
+
+# ---------------------------------------------------------------------------- #
+
+
+def restore_positions(
+    ocr_result: OcrResult,
+    transforms: List[PageTransform]
+) -> None:
+    """
+    Map the positions of all items of an OCR result from the preprocessed
+    pages back to the original pages (in place).
+    """
+    for index in range(len(ocr_result)):
+        page = ocr_result.pages[index]
+        if page < 1 or page > len(transforms):
+            continue
+
+        transform = transforms[page - 1]
+        if transform.is_identity:
+            continue
+
+        (
+            ocr_result.left[index],
+            ocr_result.top[index],
+            ocr_result.width[index],
+            ocr_result.height[index]
+        ) = transform.to_original(
+            left=ocr_result.left[index],
+            top=ocr_result.top[index],
+            width=ocr_result.width[index],
+            height=ocr_result.height[index]
+        )
+
+# ---------------------------------------------------------------------------- #
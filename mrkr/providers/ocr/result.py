@@ -0,0 +1,548 @@
+# ---------------------------------------------------------------------------- #
+
+import array
+import math
+import struct
+import sys
+import uuid
+import zlib
+from typing import Dict, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+_ITEM_TYPES: List[schemas.OcrItemType] = list(schemas.OcrItemType)
+
+_ITEM_TYPE_CODES: Dict[schemas.OcrItemType, int] = {
+    item_type: code for code, item_type in enumerate(_ITEM_TYPES)
+}
+
+# magic, version, result id, items, relationships, strings, string bytes
+_HEADER = struct.Struct("<4sB16sIIII")
+_MAGIC = b"MOCR"
+_VERSION = 2
+
+# The bits of the flags column.
+_FLAG_FAILED = 1
+
+# ---------------------------------------------------------------------------- #
+
+
+class OcrResult:
+    """
+    A compact, array-backed OCR result. Every OCR item is a row index into a
+    set of columns (id, type, page, geometry, confidence and content). The
+    child relationships are stored CSR-style: the children of item i are
+    children[child_offsets[i]:child_offsets[i+1]]. Texts are interned in a
+    string table and referenced by index (-1 for no content), a missing
+    confidence is stored as NaN. The flags column marks e.g. failed pages.
+
+    Use OcrResultBuilder to create a result. The OcrResultSchema is only used
+    to export a result (see to_schema and from_schema).
+    """
+    id: uuid.UUID
+    ids: bytes
+    types: array.array
+    pages: array.array
+    left: array.array
+    top: array.array
+    width: array.array
+    height: array.array
+    confidences: array.array
+    contents: array.array
+    flags: array.array
+    strings: List[str]
+    child_offsets: array.array
+    children: array.array
+
+    def __init__(
+        self,
+        id: uuid.UUID,
+        ids: bytes,
+        types: array.array,
+        pages: array.array,
+        left: array.array,
+        top: array.array,
+        width: array.array,
+        height: array.array,
+        confidences: array.array,
+        contents: array.array,
+        flags: array.array,
+        strings: List[str],
+        child_offsets: array.array,
+        children: array.array
+    ) -> None:
+        """
+        Initializes the OcrResult from its columns. All columns must have one
+        entry per item (child_offsets has one additional entry).
+        """
+        self.id = id
+        self.ids = ids
+        self.types = types
+        self.pages = pages
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidences = confidences
+        self.contents = contents
+        self.flags = flags
+        self.strings = strings
+        self.child_offsets = child_offsets
+        self.children = children
+
+    def __len__(self) -> int:
+        """
+        Returns the number of OCR items.
+        """
+        return len(self.types)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the (approximate) number of bytes used by the columns.
+        """
+        columns = (
+            self.types, self.pages, self.left, self.top, self.width,
+            self.height, self.confidences, self.contents, self.flags,
+            self.child_offsets, self.children
+        )
+        return len(self.ids) + \
+            sum(column.itemsize * len(column) for column in columns) + \
+            sum(len(string) for string in self.strings)
+
+    def get_id(self, index: int) -> uuid.UUID:
+        """
+        Returns the id of an item.
+        """
+        return uuid.UUID(bytes=self.ids[index * 16:index * 16 + 16])
+
+    def get_type(self, index: int) -> schemas.OcrItemType:
+        """
+        Returns the type of an item.
+        """
+        return _ITEM_TYPES[self.types[index]]
+
+    def get_confidence(self, index: int) -> float | None:
+        """
+        Returns the confidence of an item (None if not available).
+        """
+        confidence = self.confidences[index]
+        return None if math.isnan(confidence) else confidence
+
+    def get_content(self, index: int) -> str | None:
+        """
+        Returns the text content of an item (None if not available).
+        """
+        string = self.contents[index]
+        return None if string < 0 else self.strings[string]
+
+    def get_position(self, index: int) -> schemas.PositionSchema:
+        """
+        Returns the position of an item.
+        """
+        return schemas.PositionSchema(
+            left=self.left[index],
+            top=self.top[index],
+            width=self.width[index],
+            height=self.height[index]
+        )
+
+    def get_children(self, index: int) -> array.array:
+        """
+        Returns the indices of the immediate children of an item.
+        """
+        return self.children[
+            self.child_offsets[index]:self.child_offsets[index + 1]]
+
+    def is_failed(self, index: int) -> bool:
+        """
+        Returns True if an item is a page whose OCR failed (see
+        OcrResultBuilder.add_failed_page).
+        """
+        return bool(self.flags[index] & _FLAG_FAILED)
+
+    def get_failed_pages(self) -> List[int]:
+        """
+        Returns the pages whose OCR failed.
+        """
+        return [
+            self.pages[index] for index in range(len(self))
+            if self.is_failed(index)
+        ]
+
+    def split_pages(self) -> Dict[int, "OcrResult"]:
+        """
+        Split the result into one result per page. Relationships between
+        items on different pages are dropped.
+        """
+        indices: Dict[int, List[int]] = {}
+        for index, page in enumerate(self.pages):
+            indices.setdefault(page, []).append(index)
+
+        result = {}
+        for page, page_indices in indices.items():
+            builder = OcrResultBuilder()
+            builder.add_result(result=self, indices=page_indices)
+            result[page] = builder.build(id=self.id)
+
+        return result
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the result into a compressed binary representation.
+        """
+        strings = [string.encode("utf-8") for string in self.strings]
+        string_lengths = array.array("I", [len(string) for string in strings])
+        string_data = b"".join(strings)
+
+        columns = [
+            self.types, self.pages, self.left, self.top, self.width,
+            self.height, self.confidences, self.contents, self.flags,
+            self.child_offsets, self.children, string_lengths
+        ]
+        if sys.byteorder != "little":
+            columns = [array.array(c.typecode, c) for c in columns]
+            for column in columns:
+                column.byteswap()
+
+        header = _HEADER.pack(
+            _MAGIC,
+            _VERSION,
+            self.id.bytes,
+            len(self),
+            len(self.children),
+            len(self.strings),
+            len(string_data)
+        )
+
+        return zlib.compress(
+            header + self.ids +
+            b"".join(column.tobytes() for column in columns) + string_data
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OcrResult":
+        """
+        Deserialize a result created by to_bytes.
+        """
+        data = zlib.decompress(data)
+
+        magic, version, id, count, child_count, string_count, \
+            string_size = _HEADER.unpack_from(data)
+
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Unsupported OCR result format.")
+
+        offset = _HEADER.size
+
+        def read(typecode: str, length: int) -> array.array:
+            nonlocal offset
+            column = array.array(typecode)
+            size = column.itemsize * length
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            offset += size
+            return column
+
+        ids = data[offset:offset + 16 * count]
+        offset += 16 * count
+
+        types = read("B", count)
+        pages = read("I", count)
+        left = read("d", count)
+        top = read("d", count)
+        width = read("d", count)
+        height = read("d", count)
+        confidences = read("d", count)
+        contents = read("i", count)
+        flags = read("B", count)
+        child_offsets = read("I", count + 1)
+        children = read("I", child_count)
+        string_lengths = read("I", string_count)
+
+        strings = []
+        for length in string_lengths:
+            strings.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+
+        return cls(
+            id=uuid.UUID(bytes=id),
+            ids=ids,
+            types=types,
+            pages=pages,
+            left=left,
+            top=top,
+            width=width,
+            height=height,
+            confidences=confidences,
+            contents=contents,
+            flags=flags,
+            strings=strings,
+            child_offsets=child_offsets,
+            children=children
+        )
+
+    def to_schema(self) -> schemas.OcrResultSchema:
+        """
+        Export the result as an OcrResultSchema.
+        """
+        item_ids = [self.get_id(index) for index in range(len(self))]
+
+        items = []
+        for index in range(len(self)):
+            items.append(schemas.OcrItemSchema(
+                id=item_ids[index],
+                type=self.get_type(index),
+                page=self.pages[index],
+                left=self.left[index],
+                top=self.top[index],
+                width=self.width[index],
+                height=self.height[index],
+                confidence=self.get_confidence(index),
+                content=self.get_content(index),
+                failed=self.is_failed(index),
+                relationships=[
+                    schemas.OcrRelationshipSchema(
+                        type=schemas.OcrRelationshipType.child,
+                        id=item_ids[child]
+                    )
+                    for child in self.get_children(index)
+                ]
+            ))
+
+        return schemas.OcrResultSchema(id=self.id, items=items)
+
+    @classmethod
+    def from_schema(cls, schema: schemas.OcrResultSchema) -> "OcrResult":
+        """
+        Create a result from an OcrResultSchema. Relationships to unknown
+        items are ignored.
+        """
+        builder = OcrResultBuilder()
+
+        item_map = {}
+        for item in schema.items:
+            item_map[item.id] = builder.add_item(
+                id=item.id.bytes,
+                type=item.type,
+                page=item.page,
+                left=item.left,
+                top=item.top,
+                width=item.width,
+                height=item.height,
+                confidence=item.confidence,
+                content=item.content,
+                failed=item.failed
+            )
+
+        for item in schema.items:
+            for relationship in item.relationships:
+                if relationship.type != schemas.OcrRelationshipType.child:
+                    continue
+                if relationship.id not in item_map:
+                    continue
+                builder.add_child(
+                    parent=item_map[item.id],
+                    child=item_map[relationship.id]
+                )
+
+        return builder.build(id=schema.id)
+
+# ---------------------------------------------------------------------------- #
+
+
+class OcrResultBuilder:
+    """
+    Collects OCR items and child relationships and builds an OcrResult.
+    """
+    _ids: bytearray
+    _types: array.array
+    _pages: array.array
+    _left: array.array
+    _top: array.array
+    _width: array.array
+    _height: array.array
+    _confidences: array.array
+    _contents: array.array
+    _flags: array.array
+    _strings: List[str]
+    _string_map: Dict[str, int]
+    _parents: array.array
+    _children: array.array
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty builder.
+        """
+        self._ids = bytearray()
+        self._types = array.array("B")
+        self._pages = array.array("I")
+        self._left = array.array("d")
+        self._top = array.array("d")
+        self._width = array.array("d")
+        self._height = array.array("d")
+        self._confidences = array.array("d")
+        self._contents = array.array("i")
+        self._flags = array.array("B")
+        self._strings = []
+        self._string_map = {}
+        self._parents = array.array("I")
+        self._children = array.array("I")
+
+    def __len__(self) -> int:
+        """
+        Returns the number of items added so far.
+        """
+        return len(self._types)
+
+    def add_item(
+        self,
+        id: bytes,
+        type: schemas.OcrItemType,
+        page: int,
+        left: float,
+        top: float,
+        width: float,
+        height: float,
+        confidence: Optional[float] = None,
+        content: Optional[str] = None,
+        failed: bool = False
+    ) -> int:
+        """
+        Add an item (with a 16 byte id) and return its index.
+        """
+        if len(id) != 16:
+            raise ValueError("OCR item ids must be 16 bytes long.")
+
+        self._ids += id
+        self._types.append(_ITEM_TYPE_CODES[type])
+        self._pages.append(page)
+        self._left.append(left)
+        self._top.append(top)
+        self._width.append(width)
+        self._height.append(height)
+        self._confidences.append(
+            math.nan if confidence is None else confidence)
+        self._contents.append(self._intern(content))
+        self._flags.append(_FLAG_FAILED if failed else 0)
+
+        return len(self._types) - 1
+
+    def add_failed_page(self, page: int) -> int:
+        """
+        Add a page whose OCR failed (e.g. timed out) and return its index.
+        The page covers the whole image, has no children and is flagged as
+        failed.
+        """
+        return self.add_item(
+            id=uuid.uuid4().bytes,
+            type=schemas.OcrItemType.page,
+            page=page,
+            left=0.0,
+            top=0.0,
+            width=1.0,
+            height=1.0,
+            failed=True
+        )
+
+    def add_child(self, parent: int, child: int) -> None:
+        """
+        Add a child relationship between two items (by index). The order in
+        which children are added is preserved.
+        """
+        self._parents.append(parent)
+        self._children.append(child)
+
+    def add_result(
+        self,
+        result: OcrResult,
+        indices: Optional[List[int]] = None
+    ) -> None:
+        """
+        Add the items (or a subset of the items) of another result including
+        their relationships among each other.
+        """
+        if indices is None:
+            indices = list(range(len(result)))
+
+        index_map = {}
+        for index in indices:
+            index_map[index] = self.add_item(
+                id=result.ids[index * 16:index * 16 + 16],
+                type=result.get_type(index),
+                page=result.pages[index],
+                left=result.left[index],
+                top=result.top[index],
+                width=result.width[index],
+                height=result.height[index],
+                confidence=result.get_confidence(index),
+                content=result.get_content(index),
+                failed=result.is_failed(index)
+            )
+
+        for index in indices:
+            for child in result.get_children(index):
+                if child in index_map:
+                    self.add_child(
+                        parent=index_map[index],
+                        child=index_map[child]
+                    )
+
+    def build(self, id: Optional[uuid.UUID] = None) -> OcrResult:
+        """
+        Build the result. The relationships are sorted into a CSR index using
+        a stable counting sort. The columns are copied, so the builder can
+        still be used afterwards without changing the result.
+        """
+        count = len(self._types)
+
+        child_offsets = array.array("I", bytes(4 * (count + 1)))
+        for parent in self._parents:
+            child_offsets[parent + 1] += 1
+        for index in range(count):
+            child_offsets[index + 1] += child_offsets[index]
+
+        children = array.array("I", bytes(4 * len(self._children)))
+        cursor = child_offsets[:-1]
+        for parent, child in zip(self._parents, self._children):
+            children[cursor[parent]] = child
+            cursor[parent] += 1
+
+        return OcrResult(
+            id=id if id is not None else uuid.uuid4(),
+            ids=bytes(self._ids),
+            types=self._types[:],
+            pages=self._pages[:],
+            left=self._left[:],
+            top=self._top[:],
+            width=self._width[:],
+            height=self._height[:],
+            confidences=self._confidences[:],
+            contents=self._contents[:],
+            flags=self._flags[:],
+            strings=list(self._strings),
+            child_offsets=child_offsets,
+            children=children
+        )
+
+    def _intern(self, content: Optional[str]) -> int:
+        """
+        Return the index of a string in the string table (-1 for None).
+        """
+        if content is None:
+            return -1
+
+        index = self._string_map.get(content)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(content)
+            self._string_map[content] = index
+
+        return index
+
+# ---------------------------------------------------------------------------- #
@@ -4,14 +4,14 @@ import logging
 import pytesseract
 import pydantic
 import uuid
-import asyncio
-import functools
 from typing import List
 
 # ---------------------------------------------------------------------------- #
 
 import mrkr.schemas as schemas
 from .base import BaseOcrProvider
+from .result import OcrResult, OcrResultBuilder
+from ..cpu import cpu_budget
 
 # ---------------------------------------------------------------------------- #
 
@@ -62,23 +62,31 @@ class TesseractOcrProvider(BaseOcrProvider):
             5: schemas.OcrItemType.word
         }
 
-    async def ocr(self) -> schemas.OcrResultSchema:
+    async def ocr(self) -> OcrResult:
         """
-        Perform OCR on the file and return the result.
+        Perform OCR on the file and return the result. Pages that Tesseract
+        can not read or that exceed the page timeout are added as failed
+        pages.
         """
-        items = []
+        builder = OcrResultBuilder()
         for page, image in enumerate(self._images):
-            ocr = await self._ocr_image(page=page+1)
-            items += self._convert_result(
+            ocr = await self._run_page(
+                page=page + 1,
+                operation=self._ocr_image(page=page + 1)
+            )
+
+            if ocr is None:
+                builder.add_failed_page(page=page + 1)
+                continue
+
+            self._convert_result(
                 result=ocr,
                 dimensions=image.size,
-                page=page + 1
+                page=page + 1,
+                builder=builder
             )
 
-        return schemas.OcrResultSchema(
-            id=uuid.uuid4(),
-            items=items
-        )
+        return builder.build()
 
     async def _ocr_image(self, page: int) -> TesseractResult:
         """
@@ -89,23 +97,37 @@ class TesseractOcrProvider(BaseOcrProvider):
 
         logger.debug(f"Performing OCR on page {page}.")
 
-        loop = asyncio.get_running_loop()
-
-        output = await loop.run_in_executor(
-            None,
-            functools.partial(
+        try:
+            output = await cpu_budget.run_in_executor(
                 pytesseract.image_to_data,
                 image=self._images[page-1],
                 output_type=pytesseract.Output.DICT,
                 config="--psm 1",
-                lang=self._config.language
+                lang=self._config.language,
+                # Tesseract is killed if it is still running after the
+                # timeout, so that it does not block a worker thread.
+                timeout=self._config.page_timeout
             )
-        )
+        except RuntimeError as exception:
+            # pytesseract raises a plain RuntimeError if Tesseract was
+            # killed after the timeout.
+            if str(exception) == "Tesseract process timeout":
+                raise TimeoutError(str(exception)) from exception
+            raise
 
         result = TesseractResult(**output)
 
         return result
 
+    def is_page_error(self, exception: Exception) -> bool:
+        """
+        Returns True if an error only affects a single page. Tesseract errors
+        (e.g. an image that Tesseract can not read) are page errors, while
+        a missing Tesseract binary is not.
+        """
+        return super().is_page_error(exception) or \
+            isinstance(exception, pytesseract.TesseractError)
+
     def _get_line_id(
         self,
         result: TesseractResult,
@@ -164,95 +186,27 @@ class TesseractOcrProvider(BaseOcrProvider):
             case _:
                 return None
 
-    def _get_children_ids(
-        self,
-        result: TesseractResult,
-        line: int
-    ) -> List[str]:
-        """
-        Get the parent ID of a line in the Tesseract result.
-        """
-        children_ids = []
-        for index in range(len(result.level)):
-            if result.level[index] != result.level[line] + 1:
-                # just return the immediate children to avoid double
-                # counting
-                continue
-
-            if result.level[line] == 1:  # line is a page
-                if result.page_num[index] == result.page_num[line]:
-                    children_ids.append(self._get_line_id(
-                        result=result, line=index))
-            elif result.level[line] == 2:  # line is a block
-                if result.page_num[index] == result.page_num[line] and \
-                   result.block_num[index] == result.block_num[line]:
-                    children_ids.append(self._get_line_id(
-                        result=result, line=index))
-            elif result.level[line] == 3:  # line is a paragraph
-                if result.page_num[index] == result.page_num[line] and \
-                   result.block_num[index] == result.block_num[line] and \
-                        result.par_num[index] == result.par_num[line]:
-                    children_ids.append(self._get_line_id(
-                        result=result, line=index))
-            elif result.level[line] == 4:  # line is a line
-                if result.page_num[index] == result.page_num[line] and \
-                   result.block_num[index] == result.block_num[line] and \
-                   result.par_num[index] == result.par_num[line] and \
-                   result.line_num[index] == result.line_num[line]:
-                    children_ids.append(self._get_line_id(
-                        result=result, line=index))
-
-        return children_ids
-
-    def _create_item_map(
-        self,
-        result: TesseractResult
-    ) -> dict[str, uuid.UUID]:
-        """
-        Create a map of relationships between items based on their IDs.
-        """
-        relationship_map = {}
-        for i in range(len(result.level)):
-            item_id = self._get_line_id(result=result, line=i)
-
-            if item_id not in relationship_map:
-                relationship_map[item_id] = uuid.uuid4()
-            else:
-                raise Exception("Duplicate item ID found.")
-
-        return relationship_map
-
     def _convert_result(
         self,
         result: TesseractResult,
         dimensions: tuple[int, int],
-        page: int
-    ) -> List[schemas.OcrItemSchema]:
+        page: int,
+        builder: OcrResultBuilder
+    ) -> None:
         """
-        Convert the Tesseract OCR result to the target schema.
+        Convert the Tesseract OCR result and add its items to the builder.
+        The children of an item are resolved through their parent id, so
+        that the conversion is linear in the number of items.
         """
-        item_map = self._create_item_map(result=result)
-
-        items = []
+        item_map: dict[str, int] = {}
         for i in range(len(result.level)):
             id = self._get_line_id(result=result, line=i)
 
-            children = self._get_children_ids(
-                result=result,
-                line=i
-            )
+            if id in item_map:
+                raise Exception("Duplicate item ID found.")
 
-            relationships = []
-            for child in children:
-                relationships.append(
-                    schemas.OcrRelationshipSchema(
-                        type=schemas.OcrRelationshipType.child,
-                        id=item_map[child]
-                    )
-                )
-
-            item = schemas.OcrItemSchema(
-                id=item_map[id],
+            item_map[id] = builder.add_item(
+                id=uuid.uuid4().bytes,
                 type=self._type_map[result.level[i]],
                 page=page,
                 left=round(result.left[i] / dimensions[0], 5),
@@ -260,12 +214,18 @@ class TesseractOcrProvider(BaseOcrProvider):
                 width=round(result.width[i] / dimensions[0], 5),
                 height=round(result.height[i] / dimensions[1], 5),
                 confidence=result.conf[i] if result.conf[i] != -1 else None,
-                content=result.text[i] if len(result.text[i]) > 0 else None,
-                relationships=relationships
+                content=result.text[i] if len(result.text[i]) > 0 else None
             )
 
-            items.append(item)
+        for i in range(len(result.level)):
+            parent_id = self._get_parent_id(result=result, line=i)
+
+            if parent_id is None or parent_id not in item_map:
+                continue
 
-        return items
+            builder.add_child(
+                parent=item_map[parent_id],
+                child=item_map[self._get_line_id(result=result, line=i)]
+            )
 
 # ---------------------------------------------------------------------------- #
@@ -4,16 +4,19 @@ import logging
 import asyncio
 import functools
 import io
-import uuid
-import pydantic
 from PIL import Image
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Tuple
 
 # ---------------------------------------------------------------------------- #
 
 import mrkr.schemas as schemas
 from .base import BaseOcrProvider
-from ..aws import AwsSession
+from .result import OcrResult, OcrResultBuilder
+from ..aws import AwsSession, get_aws_session
+from ..cpu import cpu_budget
+from ..images import get_source
+from ..throttle import AdaptiveRateLimiter, call_with_throttling, \
+    get_rate_limiter
 
 # ---------------------------------------------------------------------------- #
 
@@ -21,36 +24,46 @@ logger = logging.getLogger("mrkr.providers.ocr")
 
 # ---------------------------------------------------------------------------- #
 
+# GetDocumentAnalysis has its own (higher) TPS quota than the operations that
+# start an analysis, and returns up to 1000 blocks per call.
+_JOB_REQUESTS_PER_SECOND = 5.0
+_JOB_MAX_RESULTS = 1000
+
+# The errors of Textract that are caused by the document (page) itself. Other
+# errors (e.g. AccessDenied) affect all pages.
+_PAGE_ERROR_CODES = (
+    "BadDocumentException",
+    "DocumentTooLargeException",
+    "InvalidParameterException",
+    "UnsupportedDocumentException",
+)
+
+# AnalyzeDocument accepts JPEG and PNG files of up to 10 MB. Source files
+# within these limits are sent as they are.
+_PASSTHROUGH_FORMATS = ("JPEG", "PNG")
+_PASSTHROUGH_MODES = ("RGB", "L")
+_MAX_DOCUMENT_BYTES = 10 * 1024 * 1024
 
-class TextractBoundingBox(pydantic.BaseModel):
-    width: float = pydantic.Field(alias="Width")
-    height: float = pydantic.Field(alias="Height")
-    left: float = pydantic.Field(alias="Left")
-    top: float = pydantic.Field(alias="Top")
-
-
-class TextractGeometry(pydantic.BaseModel):
-    bounding_box: TextractBoundingBox = pydantic.Field(alias="BoundingBox")
-
+# ---------------------------------------------------------------------------- #
 
-class TextractRelationship(pydantic.BaseModel):
-    type: str = pydantic.Field(alias="Type")
-    ids: List[str] = pydantic.Field(alias="Ids")
 
+# A block of a Textract response, e.g. {"Id": ..., "BlockType": "WORD",
+# "Text": ..., "Geometry": {"BoundingBox": {...}}, "Relationships": [...]}.
+# Responses contain thousands of blocks, so they are converted directly
+# instead of being validated block by block.
+TextractBlock = Dict[str, Any]
 
-class TextractBlock(pydantic.BaseModel):
-    id: str = pydantic.Field(alias="Id")
-    block_type: str = pydantic.Field(alias="BlockType")
-    confidence: Optional[float] = pydantic.Field(
-        default=None, alias="Confidence")
-    text: Optional[str] = pydantic.Field(default=None, alias="Text")
-    geometry: TextractGeometry = pydantic.Field(alias="Geometry")
-    relationships: List[TextractRelationship] = pydantic.Field(
-        default=[], alias="Relationships")
+# ---------------------------------------------------------------------------- #
 
+_BLOCK_TYPES: Dict[str, schemas.OcrItemType] = {
+    'PAGE': schemas.OcrItemType.page,
+    'LINE': schemas.OcrItemType.line,
+    'WORD': schemas.OcrItemType.word,
+}
 
-class TextractResult(pydantic.BaseModel):
-    blocks: List[TextractBlock] = pydantic.Field(alias="Blocks")
+_RELATIONSHIP_TYPES: Dict[str, schemas.OcrRelationshipType] = {
+    'CHILD': schemas.OcrRelationshipType.child,
+}
 
 # ---------------------------------------------------------------------------- #
 
@@ -64,6 +77,8 @@ class TextractOcrProvider(BaseOcrProvider):
     _config: schemas.OcrProviderTextractConfigSchema
     _session: AwsSession | None
     _client: Any | None
+    _limiter: AdaptiveRateLimiter
+    _job_limiter: AdaptiveRateLimiter
 
     def __init__(
         self,
@@ -77,46 +92,136 @@ class TextractOcrProvider(BaseOcrProvider):
         self._session = None
         self._client = None
 
-    async def ocr(self) -> schemas.OcrResultSchema:
+        # The TPS quotas apply to the whole account and region, so the rate
+        # limiters are shared by all providers (and scans) in the process.
+        account = (
+            AwsSession.resolve_config(self._config.aws_account_id),
+            AwsSession.resolve_config(self._config.aws_region_name)
+        )
+        self._limiter = get_rate_limiter(
+            key=("textract", *account),
+            rate=self._config.requests_per_second
+        )
+        self._job_limiter = get_rate_limiter(
+            key=("textract-jobs", *account),
+            rate=_JOB_REQUESTS_PER_SECOND
+        )
+
+    async def ocr(self) -> OcrResult:
         """
-        Perform OCR on the file and return the result.
+        Perform OCR on the file and return the result. Pages are analyzed
+        concurrently (up to max_concurrency at a time), while the rate
+        limiter keeps the requests within the account's TPS quota. Pages that
+        Textract rejects or whose request exceeds the page timeout are added
+        as failed pages.
         """
-        items = []
-        for page, image in enumerate(self._images):
+        await self.refresh_client()
+
+        semaphore = asyncio.Semaphore(self._config.max_concurrency)
+
+        async def analyze(
+            page: int,
+            image: Image.Image
+        ) -> List[TextractBlock] | None:
+            async with semaphore:
+                return await self._run_page(
+                    page=page,
+                    operation=self._analyze_page(image=image)
+                )
+
+        textract_results = await asyncio.gather(
+            *(analyze(page + 1, image)
+              for page, image in enumerate(self._images)))
 
-            textract_result = await self._analyze_page(
-                image=image)
+        builder = OcrResultBuilder()
+        for page, blocks in enumerate(textract_results):
+            if blocks is None:
+                builder.add_failed_page(page=page + 1)
+                continue
 
-            items += await self._convert_result(
-                textract_result=textract_result,
-                page=page+1
+            self._convert_result(
+                blocks=blocks,
+                page=page+1,
+                builder=builder
             )
 
-        ocr_result = schemas.OcrResultSchema(
-            id=uuid.uuid4(),
-            items=items
-        )
+        return builder.build()
+
+    def is_page_error(self, exception: Exception) -> bool:
+        """
+        Returns True if an error only affects a single page, e.g. Textract
+        rejected the page as an invalid or unsupported document.
+        """
+        if super().is_page_error(exception):
+            return True
 
-        return ocr_result
+        response = getattr(exception, "response", None)
+        if not isinstance(response, dict):
+            return False
 
-    async def refresh_client(self) -> None:
+        return response.get("Error", {}).get("Code") in _PAGE_ERROR_CODES
+
+    def supports_object(self, location: schemas.ObjectLocationSchema) -> bool:
         """
-        Refresh the Textract client if needed.
+        Returns True if asynchronous jobs are enabled and Textract supports
+        the format of the object.
         """
-        aws_config = schemas.AwsTextractConfigSchema(
-            **self._config.model_dump())
+        return self._config.use_async_jobs and location.key.lower().endswith(
+            ('.pdf', '.png', '.jpg', '.jpeg', '.tif', '.tiff'))
 
-        if self._session is None:
-            self._session = AwsSession(config=aws_config)
+    async def ocr_object(
+        self,
+        location: schemas.ObjectLocationSchema
+    ) -> OcrResult:
+        """
+        Perform OCR on an S3 object with an asynchronous Textract job. The
+        pages are neither rendered nor uploaded locally; Textract reads the
+        object directly and returns the blocks of all pages.
+        """
+        await self.refresh_client()
 
-        if self._client is None:
-            self._client = await self._session.get_client(
-                service_name="textract"
+        job_id = await self._start_document_analysis(location=location)
+        blocks = await self._get_document_analysis(job_id=job_id)
+
+        pages: Dict[int, List[TextractBlock]] = {}
+        for block in blocks:
+            pages.setdefault(block.get("Page", 1), []).append(block)
+
+        builder = OcrResultBuilder()
+        for page in sorted(pages):
+            self._convert_result(
+                blocks=pages[page],
+                page=page,
+                builder=builder
             )
 
-    async def _analyze_page(self, image: Image.Image) -> TextractResult:
+        return builder.build()
+
+    async def refresh_client(self) -> None:
         """
-        Call Textract to analyze the document layout.
+        Get the Textract client of the shared AWS session. The client is
+        replaced if the temporary credentials were refreshed.
+        """
+        if self._session is None:
+            self._session = get_aws_session(
+                config=schemas.AwsTextractConfigSchema(
+                    **self._config.model_dump()))
+
+        self._client = await self._session.get_client(
+            service_name="textract"
+        )
+
+    async def _call(
+        self,
+        operation: str,
+        limiter: AdaptiveRateLimiter,
+        timeout: float | None = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Call an operation of the Textract client in a thread. The call waits
+        for the rate limiter and is retried if it is throttled. The timeout
+        applies to each request, not to the wait for the rate limiter.
         """
         await self.refresh_client()
         if self._client is None:
@@ -124,44 +229,149 @@ class TextractOcrProvider(BaseOcrProvider):
 
         loop = asyncio.get_running_loop()
 
-        if image.mode != "RGB":
-            logger.debug("Converting image to RGB mode for Textract.")
-            image = await loop.run_in_executor(
-                None,
-                functools.partial(
-                    image.convert,
-                    mode="RGB"
-                )
+        async def call() -> Dict[str, Any]:
+            return await asyncio.wait_for(
+                loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        getattr(self._client, operation),
+                        **kwargs
+                    )
+                ),
+                timeout=timeout
             )
 
+        return await call_with_throttling(
+            func=call,
+            limiter=limiter,
+            max_retries=self._config.max_retries
+        )
+
+    async def _analyze_page(self, image: Image.Image) -> List[TextractBlock]:
+        """
+        Call Textract to analyze the document layout.
+        """
+        data = get_source(
+            image=image,
+            formats=_PASSTHROUGH_FORMATS,
+            modes=_PASSTHROUGH_MODES,
+            max_bytes=_MAX_DOCUMENT_BYTES
+        )
+
+        if data is None:
+            data = await self._encode_page(image=image)
+
         logger.debug("Calling Textract to analyze the page...")
 
+        result = await self._call(
+            "analyze_document",
+            limiter=self._limiter,
+            timeout=self._config.page_timeout,
+            Document={
+                "Bytes": data
+            },
+            FeatureTypes=["LAYOUT"]
+        )
+
+        logger.debug("Textract analysis successful.")
+
+        return result["Blocks"]
+
+    async def _encode_page(self, image: Image.Image) -> bytes:
+        """
+        Encode an image in the configured format for Textract (within the
+        CPU budget of the process).
+        """
+        if image.mode != "RGB":
+            logger.debug("Converting image to RGB mode for Textract.")
+            image = await cpu_budget.run_in_executor(image.convert, mode="RGB")
+
         bytesIO = io.BytesIO()
-        await loop.run_in_executor(
-            None,
-            functools.partial(
-                image.save,
-                fp=bytesIO,
-                format=self._config.image_format
-            )
+        await cpu_budget.run_in_executor(
+            image.save,
+            fp=bytesIO,
+            format=self._config.image_format
         )
 
-        bytesIO.seek(0)
+        return bytesIO.getvalue()
 
-        result = await loop.run_in_executor(
-            None,
-            functools.partial(
-                self._client.analyze_document,
-                Document={
-                    "Bytes": bytesIO.getvalue()
-                },
-                FeatureTypes=["LAYOUT"]
-            )
+    async def _start_document_analysis(
+        self,
+        location: schemas.ObjectLocationSchema
+    ) -> str:
+        """
+        Start an asynchronous Textract job for an S3 object and return the
+        id of the job.
+        """
+        logger.debug(f"Starting Textract job for "
+                     f"s3://{location.bucket}/{location.key}...")
+
+        response = await self._call(
+            "start_document_analysis",
+            limiter=self._limiter,
+            DocumentLocation={
+                "S3Object": {
+                    "Bucket": location.bucket,
+                    "Name": location.key
+                }
+            },
+            FeatureTypes=["LAYOUT"]
         )
 
-        logger.debug("Textract analysis successful.")
+        logger.debug(f"Textract job {response['JobId']} started.")
 
-        return TextractResult(**result)
+        return response["JobId"]
+
+    async def _get_document_analysis(self, job_id: str) -> List[TextractBlock]:
+        """
+        Wait for an asynchronous Textract job to complete and return the
+        blocks of all result pages.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._config.job_timeout
+
+        while True:
+            response = await self._call(
+                "get_document_analysis",
+                limiter=self._job_limiter,
+                JobId=job_id,
+                MaxResults=_JOB_MAX_RESULTS
+            )
+
+            if response["JobStatus"] != "IN_PROGRESS":
+                break
+
+            if loop.time() >= deadline:
+                raise Exception(f"Textract job {job_id} timed out.")
+
+            await asyncio.sleep(self._config.job_poll_interval)
+
+        if response["JobStatus"] == "FAILED":
+            raise Exception(
+                f"Textract job {job_id} failed: "
+                f"{response.get('StatusMessage')}")
+
+        if response["JobStatus"] == "PARTIAL_SUCCESS":
+            logger.warning(
+                f"Textract job {job_id} succeeded partially: "
+                f"{response.get('StatusMessage')}")
+
+        blocks: List[TextractBlock] = response["Blocks"]
+
+        while response.get("NextToken"):
+            response = await self._call(
+                "get_document_analysis",
+                limiter=self._job_limiter,
+                JobId=job_id,
+                MaxResults=_JOB_MAX_RESULTS,
+                NextToken=response["NextToken"]
+            )
+            blocks += response["Blocks"]
+
+        logger.debug(f"Textract job {job_id} completed ({len(blocks)} "
+                     f"blocks).")
+
+        return blocks
 
     def map_block_type(
         self,
@@ -175,16 +385,8 @@ class TextractOcrProvider(BaseOcrProvider):
         # 'TABLE_TITLE' | 'TABLE_FOOTER' | 'LAYOUT_TEXT' | 'LAYOUT_TITLE' |
         # 'LAYOUT_HEADER' | 'LAYOUT_FOOTER' | 'LAYOUT_SECTION_HEADER' |
         # 'LAYOUT_PAGE_NUMBER' | 'LAYOUT_LIST' | 'LAYOUT_FIGURE' |
-        # 'LAYOUT_TABLE' | 'LAYOUT_KEY_VALUE'
-        match textract_type:
-            case 'PAGE':
-                return schemas.OcrItemType.page
-            case 'LINE':
-                return schemas.OcrItemType.line
-            case 'WORD':
-                return schemas.OcrItemType.word
-            case _:
-                return schemas.OcrItemType.block
+        # 'LAYOUT_TABLE' | 'LAYOUT_KEY_VALUE' are mapped to blocks.
+        return _BLOCK_TYPES.get(textract_type, schemas.OcrItemType.block)
 
     def map_relationship_type(
         self,
@@ -193,79 +395,55 @@ class TextractOcrProvider(BaseOcrProvider):
         """
         Maps Textract relationship types to internal OcrRelationshipType.
         """
-        # 'VALUE'|'CHILD'|'COMPLEX_FEATURES'|'MERGED_CELL'| 'TITLE'|'ANSWER'|
-        # 'TABLE'|'TABLE_TITLE'|'TABLE_FOOTER'
-        match textract_type:
-            case 'CHILD':
-                return schemas.OcrRelationshipType.child
-            case _:
-                return None
-
-    async def _convert_result(
+        # 'VALUE'|'COMPLEX_FEATURES'|'MERGED_CELL'| 'TITLE'|'ANSWER'|
+        # 'TABLE'|'TABLE_TITLE'|'TABLE_FOOTER' are ignored.
+        return _RELATIONSHIP_TYPES.get(textract_type)
+
+    def _convert_result(
         self,
-        textract_result: TextractResult,
-        page: int
-    ) -> List[schemas.OcrItemSchema]:
+        blocks: List[TextractBlock],
+        page: int,
+        builder: OcrResultBuilder
+    ) -> None:
         """
-        Converts TextractResult to a list of OcrItemSchema.
+        Converts the blocks of a Textract response and adds them to the
+        builder. The blocks are indexed by id while they are added, and the
+        child relationships are resolved afterwards in a single pass (children
+        may appear after their parents).
         """
-        items = []
-        for block in textract_result.blocks:
-            block_type = self.map_block_type(block.block_type)
+        item_map: Dict[str, int] = {}
+        relationships: List[Tuple[int, List[str]]] = []
+
+        for block in blocks:
+            block_type = self.map_block_type(block["BlockType"])
             if not block_type:
                 continue
 
-            relationships = []
-            for relationship in block.relationships:
-                relationship_type = self.map_relationship_type(
-                    relationship.type)
-                if not relationship_type:
-                    continue
-                for id in relationship.ids:
-                    relationships.append(
-                        schemas.OcrRelationshipSchema(
-                            type=relationship_type,
-                            id=uuid.UUID(id)
-                        )
-                    )
-
-            content = block.text \
-                if block_type == schemas.OcrItemType.word else None
+            id = block["Id"]
+            bounding_box = block["Geometry"]["BoundingBox"]
 
-            items.append(schemas.OcrItemSchema(
-                id=uuid.UUID(block.id),
+            index = builder.add_item(
+                id=bytes.fromhex(id.replace("-", "")),
                 type=block_type,
-                left=block.geometry.bounding_box.left,
-                top=block.geometry.bounding_box.top,
-                width=block.geometry.bounding_box.width,
-                height=block.geometry.bounding_box.height,
+                left=bounding_box["Left"],
+                top=bounding_box["Top"],
+                width=bounding_box["Width"],
+                height=bounding_box["Height"],
                 page=page,
-                confidence=block.confidence,
-                content=content,
-                relationships=relationships
-            ))
+                confidence=block.get("Confidence"),
+                content=block.get("Text")
+                if block_type == schemas.OcrItemType.word else None
+            )
+            item_map[id] = index
 
-        return items
+            for relationship in block.get("Relationships", ()):
+                if self.map_relationship_type(relationship["Type"]):
+                    relationships.append((index, relationship["Ids"]))
 
-    async def _get_item_children(
-        self,
-        item: schemas.OcrItemSchema,
-        items: List[schemas.OcrItemSchema]
-    ) -> List[schemas.OcrItemSchema]:
-        """
-        Recursively finds the children of an item based on its relationships.
-        """
-        children = []
-        for relationship in item.relationships:
-            if relationship.type != schemas.OcrRelationshipType.child:
-                continue
-            child_item = next(
-                (i for i in items if i.id == relationship.id), None)
-            if child_item:
-                children.append(child_item)
-                children += await self._get_item_children(
-                    item=child_item, items=items)
-
-        return children
+        for parent, ids in relationships:
+            for id in ids:
+                child = item_map.get(id)
+                if child is not None:
+                    builder.add_child(parent=parent, child=child)
 
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,149 @@
+# ---------------------------------------------------------------------------- #
+
+import importlib
+import importlib.metadata
+import logging
+import threading
+from typing import Any, Callable, Dict, Generic, List, Tuple, Type, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.providers")
+
+# ---------------------------------------------------------------------------- #
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+def import_attribute(reference: str) -> Any:
+    """
+    Import a module and return one of its attributes. The reference has the
+    form "module:attribute".
+    """
+    module, _, attribute = reference.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+# ---------------------------------------------------------------------------- #
+
+
+def lazy_attributes(
+    module: str,
+    namespace: Dict[str, Any],
+    references: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Create the __getattr__ and __dir__ functions of a module (PEP 562) that
+    import the given attributes ("module:attribute") on first access and
+    store them in the namespace of the module.
+    """
+    def __getattr__(name: str) -> Any:
+        reference = references.get(name)
+        if reference is None:
+            raise AttributeError(
+                f"module {module!r} has no attribute {name!r}")
+
+        value = import_attribute(reference)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(references))
+
+    return __getattr__, __dir__
+
+# ---------------------------------------------------------------------------- #
+
+
+class ProviderRegistry(Generic[T]):
+    """
+    A registry of provider classes by provider type. Providers are registered
+    as references ("module:Class") and imported when they are used for the
+    first time, so that the dependencies of unused providers (e.g. boto3) are
+    never imported.
+
+    Third-party providers register themselves through an entry point group,
+    e.g. in their pyproject.toml:
+
+        [project.entry-points."mrkr.ocr_providers"]
+        my_ocr = "my_package.ocr:MyOcrProvider"
+
+    The entry points are only read if a type is not registered otherwise.
+    """
+    group: str
+    _references: Dict[str, str | Type[T]]
+    _classes: Dict[str, Type[T]]
+    _entry_points_loaded: bool
+    _lock: threading.Lock
+
+    def __init__(self, group: str, references: Dict[str, str]) -> None:
+        """
+        Initializes the registry with an entry point group and the references
+        of the built-in providers.
+        """
+        self.group = group
+        self._references = dict(references)
+        self._classes = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def types(self) -> List[str]:
+        """
+        Returns the registered provider types (including entry points).
+        """
+        with self._lock:
+            self._load_entry_points()
+            return sorted(self._references)
+
+    def register(self, type: str, provider: str | Type[T]) -> None:
+        """
+        Register a provider class (or a "module:Class" reference) for a
+        provider type. Replaces the provider that was registered before.
+        """
+        with self._lock:
+            self._references[type] = provider
+            self._classes.pop(type, None)
+
+    def get(self, type: str) -> Type[T]:
+        """
+        Returns the provider class for a provider type and imports it if
+        necessary.
+        """
+        with self._lock:
+            provider = self._classes.get(type)
+            if provider is not None:
+                return provider
+
+            if type not in self._references:
+                self._load_entry_points()
+
+            reference = self._references.get(type)
+            if reference is None:
+                raise ValueError(f"Unsupported provider type: {type}")
+
+            if isinstance(reference, str):
+                logger.debug(f"Importing provider '{type}' ({reference}).")
+                provider = import_attribute(reference)
+            else:
+                provider = reference
+
+            self._classes[type] = provider
+            return provider
+
+    def _load_entry_points(self) -> None:
+        """
+        Add the providers of the entry point group that are not registered
+        yet (once).
+        """
+        if self._entry_points_loaded:
+            return
+
+        for entry_point in importlib.metadata.entry_points(group=self.group):
+            if entry_point.name not in self._references:
+                self._references[entry_point.name] = entry_point.value
+
+        self._entry_points_loaded = True
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,127 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import collections
+import threading
+from typing import AsyncGenerator, Callable, Deque, Iterator, List, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+class _Done:
+    """
+    Marks the end of the items of a producer (with an optional exception).
+    """
+    exception: BaseException | None
+
+    def __init__(self, exception: BaseException | None = None) -> None:
+        self.exception = exception
+
+# ---------------------------------------------------------------------------- #
+
+
+async def iterate_in_thread(
+    func: Callable[[], Iterator[T]],
+    batch_size: int = 1000,
+    max_batches: int = 4,
+    max_delay: float = 0.5
+) -> AsyncGenerator[List[T], None]:
+    """
+    Run a blocking iterator (e.g. a directory walk) in a worker thread and
+    yield its items in batches, so that the event loop is never blocked. A
+    batch is yielded when it is full, or when no full batch arrived within
+    max_delay seconds (so that a slow iterator still streams its items). At
+    most max_batches batches are buffered: a slow consumer pauses the worker
+    instead of letting the items pile up in memory. The worker stops when the
+    generator is closed.
+    """
+    loop = asyncio.get_running_loop()
+    condition = threading.Condition()
+    ready = asyncio.Event()
+    stopped = threading.Event()
+
+    # The state shared with the worker (guarded by the condition): the full
+    # batches in order, the batch that is being filled and the end marker.
+    batches: Deque[List[T]] = collections.deque()
+    pending: List[T] = []
+    finished: _Done | None = None
+
+    def notify() -> None:
+        if stopped.is_set():
+            return
+        try:
+            loop.call_soon_threadsafe(ready.set)
+        except RuntimeError:
+            # The event loop is closed.
+            pass
+
+    def produce() -> None:
+        nonlocal pending, finished
+        done = _Done()
+        try:
+            for item in func():
+                with condition:
+                    if stopped.is_set():
+                        return
+                    pending.append(item)
+                    if len(pending) < batch_size:
+                        continue
+                    condition.wait_for(lambda: len(batches) < max_batches
+                                       or stopped.is_set())
+                    if stopped.is_set():
+                        return
+                    batches.append(pending)
+                    pending = []
+                notify()
+        except BaseException as exception:
+            done = _Done(exception=exception)
+
+        with condition:
+            if pending:
+                batches.append(pending)
+                pending = []
+            finished = done
+        notify()
+
+    loop.run_in_executor(None, produce)
+
+    timed_out = False
+    try:
+        while True:
+            ready.clear()
+            batch: List[T] | None = None
+            with condition:
+                if batches:
+                    batch = batches.popleft()
+                    condition.notify_all()
+                elif timed_out and pending:
+                    # Everything before the pending items was yielded, so
+                    # the partial batch can be taken without reordering.
+                    batch, pending = pending, []
+                done = finished
+
+            if batch is not None:
+                timed_out = False
+                yield batch
+                continue
+
+            if done is not None:
+                if done.exception is not None:
+                    raise done.exception
+                break
+
+            try:
+                await asyncio.wait_for(ready.wait(), timeout=max_delay)
+                timed_out = False
+            except TimeoutError:
+                timed_out = True
+    finally:
+        stopped.set()
+        with condition:
+            condition.notify_all()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,241 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.providers")
+
+# ---------------------------------------------------------------------------- #
+
+T = TypeVar("T")
+
+THROTTLING_ERROR_CODES = (
+    "ThrottlingException",
+    "ProvisionedThroughputExceededException",
+    "ProvisionedThroughputExceeded",
+    "LimitExceededException",
+)
+
+# ---------------------------------------------------------------------------- #
+
+
+class AdaptiveRateLimiter:
+    """
+    An asynchronous token bucket that limits the rate of requests to a
+    service. The rate adapts to the service (additive increase,
+    multiplicative decrease): it is halved whenever a request is throttled
+    and slowly increased again (up to the configured maximum) with every
+    successful request. The limiter is thread-safe and can be shared by
+    several event loops (see get_rate_limiter).
+    """
+    _max_rate: float
+    _min_rate: float
+    _rate: float
+    _increase: float
+    _decrease: float
+    _tokens: float
+    _capacity: float
+    _updated: float
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        min_rate: float | None = None,
+        increase: float | None = None,
+        decrease: float = 0.5
+    ) -> None:
+        """
+        Initialize the rate limiter with a maximum rate (requests per second)
+        and the capacity of the bucket (the maximum burst, defaults to a
+        single request so that no burst exceeds the quota).
+        """
+        if rate <= 0:
+            raise ValueError("The rate must be greater than zero.")
+
+        self._max_rate = rate
+        self._min_rate = min_rate if min_rate is not None else rate / 16
+        self._rate = rate
+        self._increase = increase if increase is not None else rate / 10
+        self._decrease = decrease
+        self._capacity = max(capacity, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """
+        The current rate in requests per second.
+        """
+        return self._rate
+
+    @property
+    def max_rate(self) -> float:
+        """
+        The maximum rate in requests per second.
+        """
+        return self._max_rate
+
+    def set_max_rate(self, rate: float) -> None:
+        """
+        Change the maximum rate (e.g. after a configuration change). The
+        minimum rate and the additive increase are scaled accordingly, the
+        current rate is limited to the new maximum and increases towards it
+        with the following successful requests.
+        """
+        if rate <= 0:
+            raise ValueError("The rate must be greater than zero.")
+
+        with self._lock:
+            if rate == self._max_rate:
+                return
+            self._refill()
+            factor = rate / self._max_rate
+            self._max_rate = rate
+            self._min_rate *= factor
+            self._increase *= factor
+            self._rate = min(self._rate, rate)
+
+        logger.debug(f"Maximum rate set to {rate:.2f} requests per second.")
+
+    def _refill(self) -> None:
+        """
+        Add the tokens that accumulated since the last refill.
+        """
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """
+        Take a token and wait until it is available. The token is reserved
+        immediately (the bucket may go into debt), so waiting callers are
+        served in order without holding the lock while they sleep.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            delay = max(0.0, -self._tokens / self._rate)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        """
+        Increase the rate after a successful request (additive increase).
+        """
+        with self._lock:
+            self._refill()
+            self._rate = min(self._max_rate, self._rate + self._increase)
+
+    def on_throttle(self) -> None:
+        """
+        Decrease the rate after a throttled request (multiplicative decrease)
+        and empty the bucket.
+        """
+        with self._lock:
+            self._refill()
+            self._rate = max(self._min_rate, self._rate * self._decrease)
+            self._tokens = min(self._tokens, 0)
+        logger.debug(f"Request throttled, reducing rate to "
+                     f"{self._rate:.2f} requests per second.")
+
+# ---------------------------------------------------------------------------- #
+
+
+_rate_limiters: Dict[Hashable, AdaptiveRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: Hashable, rate: float) -> AdaptiveRateLimiter:
+    """
+    Return the process-wide rate limiter for a key (e.g. the service,
+    account and region whose quota it enforces), so that all providers,
+    worker threads and event loops share the quota. The limiter is created
+    on first use, its maximum rate is updated to the given rate on every
+    lookup (the most recently configured rate applies to the whole quota).
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(rate=rate)
+            _rate_limiters[key] = limiter
+
+    limiter.set_max_rate(rate)
+
+    return limiter
+
+# ---------------------------------------------------------------------------- #
+
+
+def is_throttling_error(exception: Exception) -> bool:
+    """
+    Check if an exception (usually a botocore ClientError) was raised because
+    the request was throttled by the service.
+    """
+    response = getattr(exception, "response", None)
+    if not isinstance(response, dict):
+        return False
+
+    code = response.get("Error", {}).get("Code")
+    return code in THROTTLING_ERROR_CODES
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_backoff_delay(
+    attempt: int,
+    base: float = 0.5,
+    cap: float = 20.0
+) -> float:
+    """
+    Return the delay before a retry using exponential backoff with full
+    jitter (a random delay between zero and the exponential backoff).
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+# ---------------------------------------------------------------------------- #
+
+
+async def call_with_throttling(
+    func: Callable[[], Awaitable[T]],
+    limiter: AdaptiveRateLimiter,
+    max_retries: int,
+    base_delay: float = 0.5
+) -> T:
+    """
+    Call an asynchronous function once a token is available from the rate
+    limiter. Throttled calls are retried (with jitter) up to max_retries
+    times, any other exception is raised immediately.
+    """
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        try:
+            result = await func()
+        except Exception as exception:
+            if not is_throttling_error(exception) or attempt >= max_retries:
+                raise
+            limiter.on_throttle()
+            delay = get_backoff_delay(attempt=attempt, base=base_delay)
+            attempt += 1
+            logger.debug(f"Retrying throttled request in {delay:.2f}s "
+                         f"(attempt {attempt} of {max_retries}).")
+            await asyncio.sleep(delay)
+            continue
+
+        limiter.on_success()
+        return result
+
+# ---------------------------------------------------------------------------- #
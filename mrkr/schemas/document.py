@@ -155,6 +155,12 @@ class PageLabelDataSchema(pydantic.BaseModel):
         ...,
         description="List of labeled blocks on the page.",
     )
+    ocr_failed: bool = pydantic.Field(
+        default=False,
+        description="True if the OCR of the page failed (e.g. timed out), "
+                    "in which case the page has no blocks.",
+        examples=[False]
+    )
 
     @pydantic.field_serializer('id', when_used='always')
     def serialize_uuid(self, value: uuid.UUID, _info: Any) -> str:
@@ -323,6 +329,118 @@ class PageContentSchema(pydantic.BaseModel):
 # ---------------------------------------------------------------------------- #
 
 
+class PageProfile(str, enum.Enum):
+    """
+    Enum for the output profiles of page images.
+    """
+    preview = "preview"
+    full = "full"
+
+# ---------------------------------------------------------------------------- #
+
+
+class PageSizeSchema(pydantic.BaseModel):
+    """
+    API-Schema for the size of a rendered page.
+    """
+    page: int = pydantic.Field(
+        ...,
+        description="The page number in the document (starting from 1).",
+        examples=[1]
+    )
+    width: int = pydantic.Field(
+        ...,
+        description="The width of the rendered page in pixels.",
+        examples=[1654]
+    )
+    height: int = pydantic.Field(
+        ...,
+        description="The height of the rendered page in pixels.",
+        examples=[2339]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class FileInfoSchema(pydantic.BaseModel):
+    """
+    API-Schema for the pages of a file (without rendering them).
+    """
+    pages: int = pydantic.Field(
+        ...,
+        description="The number of pages of the file.",
+        examples=[3]
+    )
+    sizes: List[PageSizeSchema] = pydantic.Field(
+        default=[],
+        description="The sizes of the pages when they are rendered (if "
+                    "known)."
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class TilePyramidSchema(pydantic.BaseModel):
+    """
+    API-Schema for the zoom levels of a rendered page, which is split into
+    square tiles at each level. Level 0 is the full render resolution, each
+    further level halves the width and height, and the last level fits into
+    a single tile.
+    """
+    page: int = pydantic.Field(
+        ...,
+        description="The page number in the document (starting from 1).",
+        examples=[1]
+    )
+    width: int = pydantic.Field(
+        ...,
+        description="The width of the rendered page in pixels (level 0).",
+        examples=[9933]
+    )
+    height: int = pydantic.Field(
+        ...,
+        description="The height of the rendered page in pixels (level 0).",
+        examples=[14043]
+    )
+    tile_size: int = pydantic.Field(
+        ...,
+        description="The width and height of the tiles in pixels (tiles at "
+                    "the right and bottom edges are smaller).",
+        examples=[512]
+    )
+    levels: int = pydantic.Field(
+        ...,
+        description="The number of zoom levels.",
+        examples=[6]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class ThumbnailSchema(pydantic.BaseModel):
+    """
+    API-Schema for the thumbnail of the first page of a document as a base64
+    encoded image.
+    """
+    document_id: int = pydantic.Field(
+        ...,
+        description="The ID of the document.",
+        examples=[1]
+    )
+    content: str = pydantic.Field(
+        ...,
+        description="The thumbnail as a base64 encoded image.",
+        examples=["UklGRlYAAABXRUJQVlA4..."]
+    )
+    format: str = pydantic.Field(
+        ...,
+        description="The format of the image.",
+        examples=["WEBP"]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
 class UpdateDocumentLabelDataSchema(DocumentLabelDataSchema):
     """
     API-Schema for document data updates.
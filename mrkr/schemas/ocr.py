@@ -83,6 +83,10 @@ class OcrItemSchema(pydantic.BaseModel):
         None,
         description="The text content of the OCR item.",
     )
+    failed: bool = pydantic.Field(
+        False,
+        description="Whether the OCR of the item (a page) failed.",
+    )
     relationships: List[OcrRelationshipSchema] = pydantic.Field(
         [],
         description="A list of relationships to other OCR items.",
@@ -110,3 +114,20 @@ class OcrResultSchema(pydantic.BaseModel):
         return str(value)
 
 # ---------------------------------------------------------------------------- #
+
+
+class ObjectLocationSchema(pydantic.BaseModel):
+    """
+    The location of a file in an object storage (e.g. S3), for OCR providers
+    that read the file directly.
+    """
+    bucket: str = pydantic.Field(
+        ...,
+        description="The name of the bucket that contains the object.",
+    )
+    key: str = pydantic.Field(
+        ...,
+        description="The key of the object within the bucket.",
+    )
+
+# ---------------------------------------------------------------------------- #
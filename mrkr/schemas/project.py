@@ -76,8 +76,11 @@ class FileProviderType(str, enum.Enum):
 
 class FileProviderConfigSchema(pydantic.BaseModel):
     """
-    Base configuration for a file provider.
+    Base configuration for a file provider. Additional settings are kept for
+    third-party providers.
     """
+    model_config = pydantic.ConfigDict(extra="allow")
+
     path: str = pydantic.Field(
         ...,
         description="The path within ine file provider.",
@@ -93,6 +96,97 @@ class FileProviderConfigSchema(pydantic.BaseModel):
         description="The image format to use when converting PDF files.",
         examples=["JPEG"]
     )
+    image_quality: int = pydantic.Field(
+        default=80,
+        ge=1,
+        le=100,
+        description="The quality of the JPEG, WebP and AVIF images of the "
+                    "pages that are sent to the viewer.",
+        examples=[80]
+    )
+    image_formats: List[str] = pydantic.Field(
+        default=["WEBP", "AVIF"],
+        description="The image formats that are sent to browsers that "
+                    "accept them (instead of the image format), in order of "
+                    "preference.",
+        examples=[["WEBP", "AVIF"]]
+    )
+    preview_size: int = pydantic.Field(
+        default=1600,
+        ge=1,
+        description="The maximum width and height (in pixels) of the pages "
+                    "in the preview profile of the viewer.",
+        examples=[1600]
+    )
+    thumbnail_size: int = pydantic.Field(
+        default=160,
+        ge=1,
+        description="The maximum width and height (in pixels) of the "
+                    "thumbnails of the first pages, which are created when "
+                    "the documents are scanned.",
+        examples=[160]
+    )
+    render_processes: int = pydantic.Field(
+        default=4,
+        ge=1,
+        description="The maximum number of poppler processes that render "
+                    "the pages of a PDF file at a time (within the CPU "
+                    "budget of the server).",
+        examples=[4]
+    )
+    max_pixels: int = pydantic.Field(
+        default=50_000_000,
+        gt=0,
+        description="Pages with more pixels are downsampled when they are "
+                    "read, instead of being rejected as decompression bombs.",
+        examples=[50_000_000]
+    )
+    recursive: bool = pydantic.Field(
+        default=False,
+        description="List the files in all subfolders of the path instead "
+                    "of only the files directly in the path.",
+        examples=[True]
+    )
+    extensions: List[str] = pydantic.Field(
+        default=[".pdf", ".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif",
+                 ".tiff"],
+        description="Only files with one of these extensions are listed "
+                    "(case insensitive).",
+        examples=[[".pdf", ".png"]]
+    )
+    include: List[str] = pydantic.Field(
+        default=[],
+        description="Glob patterns (relative to the path). If set, only "
+                    "files that match one of them are listed.",
+        examples=[["letters/*", "*/2024-*.pdf"]]
+    )
+    exclude: List[str] = pydantic.Field(
+        default=[],
+        description="Glob patterns (relative to the path) of files and "
+                    "folders that are not listed. Matching folders are not "
+                    "scanned at all.",
+        examples=[["archive", "*/tmp", "*.draft.pdf"]]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class ListingCheckpointSchema(pydantic.BaseModel):
+    """
+    The position of an interrupted file listing. File providers that can
+    resume a listing (e.g. S3) update the checkpoint while they list.
+    """
+    prefix: Optional[str] = pydantic.Field(
+        default=None,
+        description="The prefix of the listing the token belongs to.",
+        examples=["documents/letters/"]
+    )
+    token: Optional[str] = pydantic.Field(
+        default=None,
+        description="The token to continue the listing with (all files "
+                    "before it have been processed).",
+        examples=["1ueGcxLPRx1Tr/XYExHnhbYLgveDs2J/wm36Hy4vbOwM="]
+    )
 
 # ---------------------------------------------------------------------------- #
 
@@ -114,7 +208,37 @@ class FileProviderS3ConfigSchema(FileProviderConfigSchema, AwsS3ConfigSchema):
     """
     Configuration for an AWS S3 file provider.
     """
-    pass
+    metadata_ttl: float = pydantic.Field(
+        default=30.0,
+        ge=0,
+        description="How long (in seconds) the metadata of objects (ETag, "
+                    "size and content type) is cached. 0 disables the cache.",
+        examples=[30.0]
+    )
+    part_size: int = pydantic.Field(
+        default=8 * 1024 * 1024,
+        gt=0,
+        description="Objects larger than this (in bytes) are downloaded in "
+                    "parts of this size with ranged requests.",
+        examples=[8 * 1024 * 1024]
+    )
+    download_concurrency: int = pydantic.Field(
+        default=4,
+        ge=1,
+        description="The maximum number of parts of an object that are "
+                    "downloaded at a time. A read buffers up to "
+                    "part_size * (download_concurrency + 1) bytes, twice "
+                    "the downloaded parts if hedge_after is set.",
+        examples=[4]
+    )
+    hedge_after: Optional[float] = pydantic.Field(
+        default=None,
+        gt=0,
+        description="If set, a second request is sent for a part that has "
+                    "not arrived after this many seconds, and the faster "
+                    "one is used.",
+        examples=[2.0]
+    )
 
 # ---------------------------------------------------------------------------- #
 
@@ -123,9 +247,12 @@ class ProjectFileProviderSchema(pydantic.BaseModel):
     """
     Schema for a project file provider.
     """
-    type: FileProviderType = pydantic.Field(
+    type: FileProviderType | str = pydantic.Field(
         ...,
-        description="The type of file provider for the project.",
+        description="The type of file provider for the project (or the name "
+                    "of a provider registered in the entry point group "
+                    "'mrkr.file_providers').",
+        union_mode="left_to_right",
         examples=["local"]
     )
     config: FileProviderLocalConfigSchema | \
@@ -147,11 +274,78 @@ class OcrProviderType(str, enum.Enum):
 # ---------------------------------------------------------------------------- #
 
 
+class OcrPreprocessingMode(str, enum.Enum):
+    """
+    Enum for the color modes of preprocessed images.
+    """
+    grayscale = "grayscale"
+    binary = "binary"
+
+# ---------------------------------------------------------------------------- #
+
+
+class OcrPreprocessingSchema(pydantic.BaseModel):
+    """
+    Configuration for the preprocessing of pages before OCR.
+    """
+    enabled: bool = pydantic.Field(
+        default=False,
+        description="Preprocess the pages before OCR.",
+        examples=[True]
+    )
+    mode: OcrPreprocessingMode = pydantic.Field(
+        default=OcrPreprocessingMode.grayscale,
+        description="Convert the pages to grayscale or to black and white "
+                    "(using Otsu's threshold).",
+        examples=["grayscale"]
+    )
+    deskew: bool = pydantic.Field(
+        default=True,
+        description="Detect and correct the rotation of scanned pages.",
+        examples=[True]
+    )
+    max_skew_angle: float = pydantic.Field(
+        default=5.0,
+        gt=0,
+        le=45,
+        description="The maximum rotation (in degrees) corrected by deskew.",
+        examples=[5.0]
+    )
+    crop_borders: bool = pydantic.Field(
+        default=True,
+        description="Crop empty margins and dark scanner borders.",
+        examples=[True]
+    )
+    target_x_height: Optional[int] = pydantic.Field(
+        default=None,
+        gt=0,
+        description="Downscale pages whose estimated x-height (in pixels) "
+                    "exceeds this value. Tesseract works best with an "
+                    "x-height of about 20 pixels.",
+        examples=[20]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
 class OcrProviderConfigSchema(pydantic.BaseModel):
     """
-    Base configuration for an OCR provider.
+    Base configuration for an OCR provider. Additional settings are kept for
+    third-party providers.
     """
-    pass
+    model_config = pydantic.ConfigDict(extra="allow")
+
+    preprocessing: OcrPreprocessingSchema = pydantic.Field(
+        default_factory=OcrPreprocessingSchema,
+        description="The preprocessing of pages before OCR.",
+    )
+    page_timeout: float = pydantic.Field(
+        default=120.0,
+        gt=0,
+        description="The maximum time (in seconds) for the OCR of a single "
+                    "page. Pages that take longer are recorded as failed.",
+        examples=[120.0]
+    )
 
 # ---------------------------------------------------------------------------- #
 
@@ -178,6 +372,45 @@ class OcrProviderTextractConfigSchema(OcrProviderConfigSchema, AwsConfigSchema):
         description="The image format to use when sending images to Textract.",
         examples=["JPEG"]
     )
+    requests_per_second: float = pydantic.Field(
+        default=1.0,
+        gt=0,
+        description="The maximum number of Textract requests per second "
+                    "(should match the TPS quota of the AWS account).",
+        examples=[1.0]
+    )
+    max_concurrency: int = pydantic.Field(
+        default=4,
+        ge=1,
+        description="The maximum number of pages analyzed concurrently.",
+        examples=[4]
+    )
+    max_retries: int = pydantic.Field(
+        default=5,
+        ge=0,
+        description="The maximum number of retries of a throttled request.",
+        examples=[5]
+    )
+    use_async_jobs: bool = pydantic.Field(
+        default=False,
+        description="Analyze documents stored in S3 with asynchronous "
+                    "Textract jobs instead of sending rendered pages.",
+        examples=[False]
+    )
+    job_poll_interval: float = pydantic.Field(
+        default=5.0,
+        gt=0,
+        description="The interval in seconds between status checks of an "
+                    "asynchronous Textract job.",
+        examples=[5.0]
+    )
+    job_timeout: float = pydantic.Field(
+        default=900.0,
+        gt=0,
+        description="The maximum time in seconds to wait for an asynchronous "
+                    "Textract job.",
+        examples=[900.0]
+    )
 # ---------------------------------------------------------------------------- #
 
 
@@ -185,9 +418,12 @@ class ProjectOcrProviderSchema(pydantic.BaseModel):
     """
     Schema for a project file provider.
     """
-    type: OcrProviderType = pydantic.Field(
+    type: OcrProviderType | str = pydantic.Field(
         ...,
-        description="The type of ocr provider for the project.",
+        description="The type of ocr provider for the project (or the name "
+                    "of a provider registered in the entry point group "
+                    "'mrkr.ocr_providers').",
+        union_mode="left_to_right",
         examples=["tesseract"]
     )
     config: OcrProviderTesseractConfigSchema | \
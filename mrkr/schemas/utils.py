@@ -2,6 +2,7 @@
 
 import pydantic
 import enum
+from typing import Optional
 
 # ---------------------------------------------------------------------------- #
 
@@ -24,3 +25,132 @@ class HealthSchema(pydantic.BaseModel):
     message: str
 
 # ---------------------------------------------------------------------------- #
+
+
+class PageCacheMetricsSchema(pydantic.BaseModel):
+    """
+    Schema for the metrics of the rendered page cache.
+    """
+    hits: int = pydantic.Field(
+        ...,
+        description="The number of requests for cached entries.",
+        examples=[120]
+    )
+    misses: int = pydantic.Field(
+        ...,
+        description="The number of requests for entries that were not "
+                    "cached.",
+        examples=[30]
+    )
+    writes: int = pydantic.Field(
+        ...,
+        description="The number of entries that were stored.",
+        examples=[40]
+    )
+    evictions: int = pydantic.Field(
+        ...,
+        description="The number of entries that were removed to make room "
+                    "for new ones.",
+        examples=[0]
+    )
+    entries: int = pydantic.Field(
+        ...,
+        description="The number of cached entries.",
+        examples=[40]
+    )
+    size: int = pydantic.Field(
+        ...,
+        description="The size of the cached entries in bytes.",
+        examples=[10485760]
+    )
+    max_size: int = pydantic.Field(
+        ...,
+        description="The maximum size of the cache in bytes.",
+        examples=[1073741824]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class SingleFlightMetricsSchema(pydantic.BaseModel):
+    """
+    Schema for the metrics of coalesced requests (e.g. for the same page).
+    """
+    started: int = pydantic.Field(
+        ...,
+        description="The number of reads and renders that were started.",
+        examples=[100]
+    )
+    shared: int = pydantic.Field(
+        ...,
+        description="The number of requests that shared a read or render "
+                    "that was already in flight.",
+        examples=[12]
+    )
+    cancelled: int = pydantic.Field(
+        ...,
+        description="The number of reads and renders that were cancelled "
+                    "because no request was waiting for them anymore.",
+        examples=[3]
+    )
+    in_flight: int = pydantic.Field(
+        ...,
+        description="The number of reads and renders in flight.",
+        examples=[2]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class WastedWorkMetricsSchema(pydantic.BaseModel):
+    """
+    Schema for the metrics of work that was done for cancelled requests.
+    """
+    cancelled_requests: int = pydantic.Field(
+        ...,
+        description="The number of requests whose clients disconnected "
+                    "before their pages were ready.",
+        examples=[4]
+    )
+    abandoned_jobs: int = pydantic.Field(
+        ...,
+        description="The number of rendering and encoding jobs whose "
+                    "results were no longer needed.",
+        examples=[20]
+    )
+    wasted_jobs: int = pydantic.Field(
+        ...,
+        description="The number of abandoned jobs that were already running "
+                    "and completed anyway (the others were skipped).",
+        examples=[2]
+    )
+    wasted_bytes: int = pydantic.Field(
+        ...,
+        description="The number of bytes of files that were downloaded for "
+                    "cancelled reads.",
+        examples=[8388608]
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class MetricsSchema(pydantic.BaseModel):
+    """
+    Schema for the metrics of the application.
+    """
+    page_cache: Optional[PageCacheMetricsSchema] = pydantic.Field(
+        default=None,
+        description="The metrics of the rendered page cache (if enabled)."
+    )
+    flights: Optional[SingleFlightMetricsSchema] = pydantic.Field(
+        default=None,
+        description="The metrics of the coalesced reads and renders of "
+                    "pages."
+    )
+    wasted_work: Optional[WastedWorkMetricsSchema] = pydantic.Field(
+        default=None,
+        description="The metrics of the work that was done for cancelled "
+                    "requests."
+    )
+
+# ---------------------------------------------------------------------------- #
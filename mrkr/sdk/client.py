@@ -217,6 +217,19 @@ class MrkrClient():
             endpoint=f"/project/{project_id}/scan"
         )
 
+    def rebuild_project(
+        self,
+        project_id: int
+    ) -> None:
+        """
+        Rebuild the label data of a project's documents from their stored OCR
+        results, i.e. without running the OCR again.
+        """
+        self._call_api(
+            method="POST",
+            endpoint=f"/project/{project_id}/rebuild"
+        )
+
     def update_project_name(
         self,
         project_id: int,
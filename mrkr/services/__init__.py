@@ -5,8 +5,10 @@ from .logging import setup_logger, ColonLevelFormatter
 from .templates import get_templates, TemplateHeaderMiddleware
 from .static import StaticFilesWithHeaders
 from .dependencies import ConfigDependency, TemplatesDependency, \
-    WorkerPoolDependency
+    WorkerPoolDependency, PageCacheDependency, SingleFlightDependency
 from .worker import get_worker_pool, WorkerPool
 from .security import hash_password, check_password
+from .cache import get_page_cache, PageCache
+from .flights import get_single_flight, SingleFlight
 
 # ---------------------------------------------------------------------------- #
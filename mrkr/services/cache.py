@@ -0,0 +1,182 @@
+# ---------------------------------------------------------------------------- #
+
+import collections
+import hashlib
+import logging
+import os
+import pathlib
+import threading
+import uuid
+from functools import lru_cache
+from typing import Any, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.schemas as schemas
+import mrkr.services as services
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.services")
+
+# ---------------------------------------------------------------------------- #
+
+
+class PageCache:
+    """
+    A size-bounded cache for rendered pages (or any other bytes) on the local
+    disk. Entries are files named after the hash of their key. When the cache
+    is full, the least recently used entries are removed. The cache is shared
+    by the threads of a process; the entries survive restarts.
+    """
+    _directory: pathlib.Path
+    _max_size: int
+    _entries: collections.OrderedDict[str, int]
+    _size: int
+    _lock: threading.Lock
+    _hits: int
+    _misses: int
+    _writes: int
+    _evictions: int
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        """
+        Initialize the cache with the entries that are already in the
+        directory (oldest first).
+        """
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._writes = self._evictions = 0
+
+        files = []
+        for path in self._directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+
+        self._entries = collections.OrderedDict(
+            (name, size) for _, name, size in sorted(files))
+        self._size = sum(self._entries.values())
+        self._evict()
+
+        logger.info(f"Page cache initialized with {len(self._entries)} "
+                    f"entries ({self._size} bytes).")
+
+    def get(self, key: Tuple[Any, ...]) -> bytes | None:
+        """
+        Returns the data of an entry, or None if it is not cached (blocking).
+        """
+        name = self._get_name(key)
+
+        with self._lock:
+            if name not in self._entries:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(name)
+
+        path = self._get_path(name)
+        try:
+            data = path.read_bytes()
+            # The modification time keeps the order across restarts.
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._entries.pop(name, 0)
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+
+        return data
+
+    def contains(self, key: Tuple[Any, ...]) -> bool:
+        """
+        Returns whether an entry is cached, without reading it or counting
+        a hit or miss.
+        """
+        with self._lock:
+            return self._get_name(key) in self._entries
+
+    def put(self, key: Tuple[Any, ...], data: bytes) -> None:
+        """
+        Store the data of an entry and remove the least recently used
+        entries if the cache is full (blocking).
+        """
+        name = self._get_name(key)
+        path = self._get_path(name)
+
+        # The file is written under a temporary name first, so that readers
+        # never see a partial entry.
+        path.parent.mkdir(exist_ok=True)
+        temporary = path.with_name(f"{name}.{uuid.uuid4().hex}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+
+        with self._lock:
+            self._size += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._writes += 1
+            self._evict()
+
+    def metrics(self) -> schemas.PageCacheMetricsSchema:
+        """
+        Returns the metrics of the cache.
+        """
+        with self._lock:
+            return schemas.PageCacheMetricsSchema(
+                hits=self._hits,
+                misses=self._misses,
+                writes=self._writes,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                max_size=self._max_size
+            )
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits into its
+        maximum size (the lock must be held).
+        """
+        while self._size > self._max_size and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+            self._get_path(name).unlink(missing_ok=True)
+
+    def _get_name(self, key: Tuple[Any, ...]) -> str:
+        """
+        Returns the file name of an entry.
+        """
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+    def _get_path(self, name: str) -> pathlib.Path:
+        """
+        Returns the path of an entry (in one of 256 subfolders).
+        """
+        return self._directory / name[:2] / name
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_page_cache() -> PageCache | None:
+    """
+    Returns the process-wide page cache, or None if it is disabled.
+    """
+    config = services.get_configuration()
+
+    if not config.page_cache.enabled:
+        return None
+
+    return PageCache(
+        directory=config.page_cache.directory,
+        max_size=config.page_cache.max_size
+    )
+
+# ---------------------------------------------------------------------------- #
@@ -5,6 +5,7 @@ import pydantic
 import pathlib
 import os
 import json
+import tempfile
 from typing import Any, Dict, List, Optional, Union
 from functools import lru_cache
 
@@ -37,6 +38,7 @@ class _BackendSchema(pydantic.BaseModel):
     port: int = 8000
     root_path: str = ""
     max_workers: int = 4
+    cpu_budget: Optional[int] = None
 
 
 class _CorsSchema(pydantic.BaseModel):
@@ -69,11 +71,19 @@ class _GzipSchema(pydantic.BaseModel):
     minimum_size: int = 1000
 
 
+class _PageCacheSchema(pydantic.BaseModel):
+    directory: str = str(pathlib.Path(tempfile.gettempdir()) / "mrkr-pages")
+    enabled: bool = True
+    max_age: int = 300
+    max_size: int = 1024 * 1024 * 1024
+
+
 class ConfigSchema(pydantic.BaseModel):
     backend: _BackendSchema = _BackendSchema()
     cors: _CorsSchema = _CorsSchema()
     database: _DatabaseSchema
     gzip: _GzipSchema = _GzipSchema()
+    page_cache: _PageCacheSchema = _PageCacheSchema()
     project: _ProjectSchema
     static_files: _StaticFilesSchema = _StaticFilesSchema()
     templates: _TemplatesSchema = _TemplatesSchema()
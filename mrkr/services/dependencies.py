@@ -2,13 +2,15 @@
 
 import fastapi
 from fastapi.templating import Jinja2Templates
-from typing import Annotated
+from typing import Annotated, Optional
 
 # ---------------------------------------------------------------------------- #
 
 from .templates import get_templates
 from .config import get_configuration, ConfigSchema
 from .worker import get_worker_pool, WorkerPool
+from .cache import get_page_cache, PageCache
+from .flights import get_single_flight, SingleFlight
 
 # ---------------------------------------------------------------------------- #
 
@@ -25,4 +27,12 @@ WorkerPoolDependency = Annotated[
     WorkerPool, fastapi.Depends(get_worker_pool)
 ]
 
+PageCacheDependency = Annotated[
+    Optional[PageCache], fastapi.Depends(get_page_cache)
+]
+
+SingleFlightDependency = Annotated[
+    SingleFlight, fastapi.Depends(get_single_flight)
+]
+
 # ---------------------------------------------------------------------------- #
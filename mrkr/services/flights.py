@@ -0,0 +1,119 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("mrkr.services")
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, so that identical work
+    (e.g. reading and rendering the same page for several requests) runs
+    only once and all callers share its result. The work is cancelled as
+    soon as every caller has been cancelled (e.g. because their clients
+    disconnected). The calls must be made from the same event loop.
+    """
+    _flights: Dict[Hashable, Tuple["asyncio.Future[Any]", int]]
+    _started: int
+    _shared: int
+    _cancelled: int
+
+    def __init__(self) -> None:
+        self._flights = {}
+        self._started = self._shared = self._cancelled = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Returns the result of func, or of the call with the same key that is
+        already in flight. Errors are raised to all callers.
+        """
+        if key in self._flights:
+            task, waiters = self._flights[key]
+            self._shared += 1
+            logger.debug(f"Joining flight {key} ({waiters} waiting).")
+        else:
+            task = asyncio.ensure_future(func())
+            task.add_done_callback(lambda task: self._remove(key, task))
+            waiters = 0
+            self._started += 1
+
+        self._flights[key] = (task, waiters + 1)
+
+        try:
+            # The task is shielded, so that it keeps running for the other
+            # callers when this one is cancelled.
+            return await asyncio.shield(task)
+        finally:
+            self._leave(key, task)
+
+    def metrics(self) -> schemas.SingleFlightMetricsSchema:
+        """
+        Returns the metrics of the coalesced calls.
+        """
+        return schemas.SingleFlightMetricsSchema(
+            started=self._started,
+            shared=self._shared,
+            cancelled=self._cancelled,
+            in_flight=len(self._flights)
+        )
+
+    def _leave(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        """
+        Remove a caller from a flight and cancel the work if it was the last
+        one.
+        """
+        if key not in self._flights or self._flights[key][0] is not task:
+            return
+
+        waiters = self._flights[key][1] - 1
+        if waiters > 0:
+            self._flights[key] = (task, waiters)
+            return
+
+        # New callers must not join a cancelled flight.
+        del self._flights[key]
+        if not task.done():
+            logger.debug(f"Cancelling flight {key} without waiters.")
+            task.cancel()
+            self._cancelled += 1
+
+    def _remove(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        """
+        Remove a finished flight, so that later calls start new work.
+        """
+        if key in self._flights and self._flights[key][0] is task:
+            del self._flights[key]
+
+        # Errors are raised to the callers, the result of cancelled flights
+        # is not retrieved.
+        if not task.cancelled():
+            task.exception()
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_single_flight() -> SingleFlight:
+    """
+    Returns the process-wide single flight for the requests of the server.
+    """
+    return SingleFlight()
+
+# ---------------------------------------------------------------------------- #
@@ -15,7 +15,8 @@ import mrkr.core as core
 import mrkr.database as database
 import mrkr.services as services
 from mrkr.services.config import _BackendSchema, _CorsSchema, _DatabaseSchema, \
-    _ProjectSchema, _StaticFilesSchema, _TemplatesSchema, _GzipSchema
+    _ProjectSchema, _StaticFilesSchema, _TemplatesSchema, _GzipSchema, \
+    _PageCacheSchema
 
 # ---------------------------------------------------------------------------- #
 
@@ -35,6 +36,9 @@ def create_test_configuration() -> services.ConfigSchema:
         gzip=_GzipSchema(
             enabled=True
         ),
+        page_cache=_PageCacheSchema(
+            enabled=False
+        ),
         project=_ProjectSchema(
             author="Test Author",
             description="Test Description",
@@ -0,0 +1,246 @@
+# ---------------------------------------------------------------------------- #
+
+import collections
+import threading
+import time
+import uuid
+from botocore.exceptions import ClientError
+from unittest import mock
+from typing import Any, Deque, Dict, List
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_textract_response(
+    lines: int = 2,
+    words: int = 2,
+    page: int | None = None
+) -> Dict:
+    """
+    Create a synthetic Textract analyze_document response with one page that
+    contains one layout block with the given number of lines and words. If a
+    page number is given, it is added to all blocks (like in the responses
+    of get_document_analysis).
+    """
+    def block(type: str, text: str | None = None) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "Id": str(uuid.uuid4()),
+            "BlockType": type,
+            "Geometry": {
+                "BoundingBox": {
+                    "Width": 0.1, "Height": 0.02, "Left": 0.1, "Top": 0.1
+                }
+            }
+        }
+        if text is not None:
+            result["Text"] = text
+            result["Confidence"] = 99.0
+        if page is not None:
+            result["Page"] = page
+        return result
+
+    def link(parent: Dict[str, Any], children: List[Dict[str, Any]]) -> None:
+        parent["Relationships"] = [{
+            "Type": "CHILD",
+            "Ids": [child["Id"] for child in children]
+        }]
+
+    page_block = block("PAGE")
+    layout = block("LAYOUT_TEXT")
+    blocks: List[Dict[str, Any]] = [page_block, layout]
+
+    line_blocks = []
+    for l in range(lines):
+        word_blocks = [block("WORD", f"word{w}") for w in range(words)]
+        line = block("LINE", " ".join(w["Text"] for w in word_blocks))
+        link(line, word_blocks)
+        line_blocks.append(line)
+        blocks += [line] + word_blocks
+
+    link(layout, line_blocks)
+    link(page_block, [layout] + line_blocks)
+
+    return {"Blocks": blocks}
+
+# ---------------------------------------------------------------------------- #
+
+
+class FakeTextractClient:
+    """
+    A local stand-in for the boto3 Textract client. Every call blocks for the
+    configured latency. If more than tps calls are made within one second,
+    the call fails with a ThrottlingException (like the real service).
+    Asynchronous jobs analyze the given number of pages and stay in progress
+    for the given number of status checks.
+    """
+    latency: float
+    tps: float | None
+    calls: int
+    throttled: int
+    max_in_flight: int
+
+    documents: List[bytes]
+    pages: int
+    job_polls: int
+    jobs: Dict[str, Dict[str, Any]]
+
+    _lines: int
+    _words: int
+    _in_flight: int
+    _history: Deque[float]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tps: float | None = None,
+        lines: int = 2,
+        words: int = 2,
+        pages: int = 1,
+        job_polls: int = 1
+    ) -> None:
+        """
+        Initialize the fake client.
+        """
+        self.latency = latency
+        self.tps = tps
+        self.documents = []
+        self.pages = pages
+        self.job_polls = job_polls
+        self.jobs = {}
+        self.calls = 0
+        self.throttled = 0
+        self.max_in_flight = 0
+        self._lines = lines
+        self._words = words
+        self._in_flight = 0
+        self._history = collections.deque()
+        self._lock = threading.Lock()
+
+    def _check_throttling(self) -> None:
+        """
+        Raise a ThrottlingException if the TPS quota is exceeded.
+        """
+        if self.tps is None:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            while self._history and self._history[0] <= now - 1:
+                self._history.popleft()
+
+            if len(self._history) >= self.tps:
+                self.throttled += 1
+                raise ClientError(
+                    error_response={
+                        "Error": {
+                            "Code": "ThrottlingException",
+                            "Message": "Rate exceeded"
+                        }
+                    },
+                    operation_name="AnalyzeDocument"
+                )
+
+            self._history.append(now)
+
+    def _simulate_call(self) -> None:
+        """
+        Count the call, check the quota and wait for the latency.
+        """
+        with self._lock:
+            self.calls += 1
+
+        self._check_throttling()
+
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def analyze_document(self, Document: Dict[str, Any], **kwargs: Any) -> Dict:
+        """
+        Simulate a call of analyze_document.
+        """
+        self._simulate_call()
+
+        with self._lock:
+            self.documents.append(Document["Bytes"])
+
+        return create_textract_response(lines=self._lines, words=self._words)
+
+    def start_document_analysis(
+        self,
+        DocumentLocation: Dict[str, Any],
+        **kwargs: Any
+    ) -> Dict:
+        """
+        Simulate a call of start_document_analysis.
+        """
+        self._simulate_call()
+
+        blocks: List[Dict[str, Any]] = []
+        for page in range(1, self.pages + 1):
+            blocks += create_textract_response(
+                lines=self._lines, words=self._words, page=page)["Blocks"]
+
+        job_id = str(uuid.uuid4())
+        self.jobs[job_id] = {
+            "location": DocumentLocation["S3Object"],
+            "polls": 0,
+            "blocks": blocks
+        }
+
+        return {"JobId": job_id}
+
+    def get_document_analysis(
+        self,
+        JobId: str,
+        MaxResults: int = 1000,
+        NextToken: str | None = None
+    ) -> Dict:
+        """
+        Simulate a call of get_document_analysis (with pagination).
+        """
+        self._simulate_call()
+
+        job = self.jobs.get(JobId)
+        if job is None:
+            raise ClientError(
+                error_response={
+                    "Error": {"Code": "InvalidJobIdException"}
+                },
+                operation_name="GetDocumentAnalysis"
+            )
+
+        if job["polls"] < self.job_polls:
+            job["polls"] += 1
+            return {"JobStatus": "IN_PROGRESS"}
+
+        start = int(NextToken) if NextToken else 0
+        end = start + MaxResults
+
+        response: Dict[str, Any] = {
+            "JobStatus": "SUCCEEDED",
+            "DocumentMetadata": {"Pages": self.pages},
+            "Blocks": job["blocks"][start:end]
+        }
+        if end < len(job["blocks"]):
+            response["NextToken"] = str(end)
+
+        return response
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_fake_session(client: Any) -> Any:
+    """
+    Create a stand-in for a shared AWS session that returns the given client.
+    """
+    return mock.Mock(get_client=mock.AsyncMock(return_value=client))
+
+# ---------------------------------------------------------------------------- #
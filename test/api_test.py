@@ -1,9 +1,23 @@
 # ---------------------------------------------------------------------------- #
 
+import asyncio
 import fastapi
+import io
+import json
+import pathlib
+import tempfile
+from PIL import Image
+from typing import Any, Dict
+from unittest.mock import patch
 
 # ---------------------------------------------------------------------------- #
 
+import mrkr.crud as crud
+import mrkr.models as models
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+import mrkr.services as services
+from mrkr.api.v1.endpoints import document
 from test._testcase import TestCase
 
 # ---------------------------------------------------------------------------- #
@@ -32,6 +46,18 @@ class TestV1API(TestCase):
         assert response.status_code == 200
         assert response.json()["health"] == "healthy"
 
+    def test_metrics(self) -> None:
+        """
+        Test the metrics endpoint (the page cache is disabled in the test
+        configuration).
+        """
+        response = self.client.get(
+            f"{self.api_version}/utils/metrics")
+
+        assert response.status_code == 200
+        assert response.json()["page_cache"] is None
+        assert response.json()["flights"]["in_flight"] == 0
+
     def test_user_login(self) -> None:
         """
         Test the user login endpoint to ensure it returns a 500 status code,
@@ -60,4 +86,274 @@ class TestV1API(TestCase):
         assert response.status_code == 200
         assert "message" in response.json()
 
+    def test_document_page_image(self) -> None:
+        """
+        Test that pages are sent as images with entity tags, that unchanged
+        pages are confirmed with 304 and that byte ranges are supported.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (20, 10)).save(
+                pathlib.Path(directory, "a.png"))
+            document = self.create_document(directory=directory, path="a.png")
+            url = f"{self.api_version}/document/{document.id}/page"
+
+            response = self.client.get(url)
+            assert response.status_code == 200
+            assert response.json()["pages"] == 1
+            assert response.json()["sizes"][0]["width"] == 20
+
+            response = self.client.get(f"{url}/1/image")
+            data = response.content
+            etag = response.headers["etag"]
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/png"
+            assert response.headers["cache-control"].startswith("private")
+            assert data.startswith(b"\x89PNG")
+
+            response = self.client.get(
+                f"{url}/1/image", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+
+            response = self.client.get(
+                f"{url}/1/image", headers={"Range": "bytes=4-9"})
+            assert response.status_code == 206
+            assert response.content == data[4:10]
+            assert response.headers["content-range"] == \
+                f"bytes 4-9/{len(data)}"
+
+            response = self.client.get(
+                f"{url}/1/image", headers={"Range": "bytes=-4"})
+            assert response.content == data[-4:]
+
+            response = self.client.get(
+                f"{url}/1/image",
+                headers={"Range": "bytes=0-3", "If-Range": '"outdated"'})
+            assert response.status_code == 200
+            assert response.content == data
+
+            response = self.client.get(
+                f"{url}/1/image", headers={"Range": f"bytes={len(data)}-"})
+            assert response.status_code == 416
+            assert response.headers["content-range"] == f"bytes */{len(data)}"
+
+            response = self.client.get(f"{url}/2/image")
+            assert response.status_code == 404
+
+    def test_document_page_image_profiles(self) -> None:
+        """
+        Test that pages are sent in a format that the browser accepts and
+        downscaled in the preview profile, with different entity tags.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (20, 10)).save(
+                pathlib.Path(directory, "a.png"))
+            document = self.create_document(
+                directory=directory, path="a.png", preview_size=8)
+            url = f"{self.api_version}/document/{document.id}/page/1/image"
+
+            response = self.client.get(
+                url, headers={"Accept": "image/webp,image/*,*/*;q=0.8"})
+            assert response.headers["content-type"] == "image/webp"
+            assert "Accept" in response.headers["vary"].split(", ")
+            etag = response.headers["etag"]
+
+            response = self.client.get(
+                url, headers={"Accept": "image/webp;q=0,*/*"})
+            assert response.headers["content-type"] == "image/png"
+            assert response.headers["etag"] != etag
+
+            response = self.client.get(
+                f"{url}?profile=preview", headers={"Accept": "image/*"})
+            image = Image.open(io.BytesIO(response.content))
+            assert (image.format, image.size) == ("PNG", (8, 4))
+
+    def test_document_page_tiles(self) -> None:
+        """
+        Test that the zoom levels of a page and its tiles are sent, and that
+        unchanged tiles are confirmed with 304.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (600, 300)).save(
+                pathlib.Path(directory, "a.png"))
+            document = self.create_document(directory=directory, path="a.png")
+            url = f"{self.api_version}/document/{document.id}/page/1"
+
+            response = self.client.get(f"{url}/tiles")
+            assert response.status_code == 200
+            assert response.json()["levels"] == 2
+
+            response = self.client.get(f"{url}/tile/0/1/0")
+            assert response.headers["content-type"] == "image/jpeg"
+            assert Image.open(io.BytesIO(response.content)).size == (88, 300)
+
+            response = self.client.get(
+                f"{url}/tile/0/1/0",
+                headers={"If-None-Match": response.headers["etag"]})
+            assert response.status_code == 304
+
+            response = self.client.get(f"{url}/tile/0/2/0")
+            assert response.status_code == 404
+
+    async def test_document_page_tiles_coalesced(self) -> None:
+        """
+        Test that concurrent requests for different tiles of a zoom level
+        share a single creation of the level.
+        """
+        async def receive() -> Dict[str, Any]:
+            await asyncio.sleep(10)
+            return {"type": "http.disconnect"}
+
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (600, 300)).save(
+                pathlib.Path(directory, "a.png"))
+            created = self.create_document(directory=directory, path="a.png")
+            single_flight = services.SingleFlight()
+
+            async def get_tile(x: int) -> fastapi.Response:
+                return await document.get_document_page_tile(
+                    session=self.session,
+                    page_cache=None,
+                    single_flight=single_flight,
+                    request=fastapi.Request(
+                        scope={"type": "http"}, receive=receive),
+                    document_id=created.id,
+                    page=1,
+                    level=0,
+                    x=x,
+                    y=0,
+                    accept=None,
+                    if_none_match=None
+                )
+
+            with patch("mrkr.providers.create_tiles",
+                       wraps=providers.create_tiles) as create_tiles:
+                responses = await asyncio.gather(get_tile(0), get_tile(1))
+
+            assert create_tiles.call_count == 1
+            assert [Image.open(io.BytesIO(response.body)).size
+                    for response in responses] == [(512, 300), (88, 300)]
+            assert single_flight.metrics().shared == 1
+
+    def test_document_content_stream(self) -> None:
+        """
+        Test that the pages of a document are streamed as newline-delimited
+        JSON.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (20, 10)).save(
+                pathlib.Path(directory, "a.png"))
+            document = self.create_document(directory=directory, path="a.png")
+
+            response = self.client.get(
+                f"{self.api_version}/document/{document.id}/content/stream")
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+
+            pages = [json.loads(line) for line in response.iter_lines()]
+            assert [(page["page"], page["width"]) for page in pages] == [
+                (1, 20)]
+
+            response = self.client.get(
+                f"{self.api_version}/document/0/content/stream")
+            assert response.status_code == 404
+
+    async def test_coalesce_disconnect(self) -> None:
+        """
+        Test that the rendering of a page is cancelled when the client
+        disconnects, and that the request is counted as wasted work.
+        """
+        cancelled = asyncio.Event()
+
+        async def receive() -> Dict[str, Any]:
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def render(provider: providers.BaseFileProvider) -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        metrics = providers.wasted_work.metrics()
+
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(path=directory))
+            with self.assertRaises(fastapi.HTTPException) as context:
+                await document._coalesce(
+                    request=fastapi.Request(
+                        scope={"type": "http"}, receive=receive),
+                    single_flight=services.SingleFlight(),
+                    key=("image", 1, 1),
+                    file_provider=provider,
+                    path="a.png",
+                    func=render
+                )
+
+        assert context.exception.status_code == 499
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert providers.wasted_work.metrics().cancelled_requests == \
+            metrics.cancelled_requests + 1
+
+    def test_document_thumbnails(self) -> None:
+        """
+        Test that the thumbnails of several documents are sent in one
+        response, leaving out documents without a thumbnail.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            first = self.create_document(directory=directory, path="a.png")
+            second = crud.create_document(
+                session=self.session, project_id=first.project_id,
+                path="b.png")
+            crud.update_document_thumbnail(
+                session=self.session, document=first, data=b"thumbnail",
+                format="WEBP")
+
+            response = self.client.get(
+                f"{self.api_version}/document/thumbnails"
+                f"?document_id={first.id}&document_id={second.id}")
+            assert response.status_code == 200
+            assert response.json() == [{
+                "document_id": first.id,
+                "content": "dGh1bWJuYWls",
+                "format": "WEBP"
+            }]
+
+            response = self.client.get(
+                f"{self.api_version}/document/thumbnails?"
+                + "&".join(["document_id=1"] * 101))
+            assert response.status_code == 422
+
+    def create_document(
+        self,
+        directory: str,
+        path: str,
+        **kwargs: Any
+    ) -> models.Document:
+        """
+        Create a project that reads its files from a local directory (with
+        further file provider settings) and a document of that project.
+        """
+        config = schemas.ProjectConfigSchema(
+            label_definitions=[],
+            file_provider=schemas.ProjectFileProviderSchema(
+                type=schemas.FileProviderType.local,
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, **kwargs)
+            ),
+            ocr_provider=schemas.ProjectOcrProviderSchema(
+                type=schemas.OcrProviderType.tesseract,
+                config=schemas.OcrProviderTesseractConfigSchema()
+            )
+        )
+        project = models.Project(name="test", config=config.model_dump())
+        self.session.add(project)
+        self.session.commit()
+        self.session.refresh(project)
+
+        return crud.create_document(
+            session=self.session, project_id=project.id, path=path)
+
 # ---------------------------------------------------------------------------- #
@@ -1,6 +1,12 @@
 # ---------------------------------------------------------------------------- #
 
 import fastapi
+import io
+import pathlib
+import tempfile
+import uuid
+from PIL import Image
+from typing import Any, List, Optional
 from fastapi.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from unittest.mock import patch
@@ -9,9 +15,15 @@ from contextlib import ExitStack
 # ---------------------------------------------------------------------------- #
 
 import mrkr.core as core
+import mrkr.providers as providers
 import mrkr.services as services
+import mrkr.schemas as schemas
+import mrkr.models as models
+import mrkr.crud as crud
+from mrkr.core import scan
 from mrkr.core.exceptions import exception_handler, http_exception_handler
 from test._testcase import TestCase
+from test.providers_test import create_ocr_result
 
 # ---------------------------------------------------------------------------- #
 
@@ -136,3 +148,346 @@ class TestExceptions(TestCase):
         assert "detail" in response.json()
 
 # ---------------------------------------------------------------------------- #
+
+
+class TestScan(TestCase):
+    """
+    Test cases for the creation of label data from OCR results.
+    """
+
+    def test_initialize_label_pages(self) -> None:
+        """
+        Test if pages and blocks are created from an OCR result.
+        """
+        result = create_ocr_result()
+
+        pages = scan._initialize_label_pages(ocr_result=result)
+
+        assert len(pages) == 1
+        assert pages[0].page == 1
+        assert pages[0].id == result.get_id(0)
+        assert len(pages[0].blocks) == 1
+        assert pages[0].blocks[0].content == "Hello World"
+        assert pages[0].blocks[0].position.width == 0.5
+        assert pages[0].blocks[0].label_status == schemas.LabelStatus.open
+        assert not pages[0].ocr_failed
+
+    def test_initialize_failed_pages(self) -> None:
+        """
+        Test that pages whose OCR failed are marked in the label data.
+        """
+        builder = providers.OcrResultBuilder()
+        builder.add_result(create_ocr_result())
+        builder.add_failed_page(page=2)
+        builder.add_item(
+            id=uuid.uuid4().bytes, type=schemas.OcrItemType.page, page=3,
+            left=0, top=0, width=1, height=1, confidence=0.0)
+
+        pages = scan._initialize_label_pages(ocr_result=builder.build())
+
+        assert [page.ocr_failed for page in pages] == [False, True, False]
+        assert pages[1].blocks == []
+
+# ---------------------------------------------------------------------------- #
+
+
+class TestRebuild(TestCase):
+    """
+    Test cases for rebuilding label data from stored OCR results.
+    """
+
+    def test_rebuild_document_data(self) -> None:
+        """
+        Test if the label data is rebuilt and existing labels are kept.
+        """
+        project = models.Project(name="test", config={})
+        self.session.add(project)
+        self.session.commit()
+        self.session.refresh(project)
+
+        document = crud.create_document(
+            session=self.session, project_id=project.id, path="test.pdf")
+
+        assert core.rebuild_document_data(
+            session=self.session, document=document) is False
+
+        result = create_ocr_result()
+        scan._store_document_ocr(
+            session=self.session, document=document, ocr_result=result)
+
+        data = schemas.DocumentLabelDataSchema(
+            pages=scan._initialize_label_pages(ocr_result=result),
+            label_status=schemas.LabelStatus.done,
+            labels=[schemas.LabelSchema(name="Letter")]
+        )
+        data.pages[0].blocks[0].labels = [
+            schemas.TextLabelSchema(name="Name", start=0, end=5),
+            schemas.TextLabelSchema(name="Invalid", start=0, end=50)
+        ]
+        crud.update_document_data_and_status(
+            session=self.session,
+            document=document,
+            status=models.DocumentStatus.review,
+            data=data
+        )
+
+        assert core.rebuild_document_data(
+            session=self.session, document=document) is True
+
+        assert document.data is not None
+        rebuilt = schemas.DocumentLabelDataSchema(**document.data)
+
+        assert document.status == models.DocumentStatus.review
+        assert rebuilt.label_status == schemas.LabelStatus.done
+        assert rebuilt.labels[0].name == "Letter"
+        assert rebuilt.pages[0].blocks[0].content == "Hello World"
+        assert [label.name for label in rebuilt.pages[0].blocks[0].labels] \
+            == ["Name"]
+
+# ---------------------------------------------------------------------------- #
+
+
+class TestPages(TestCase):
+    """
+    Test cases for the delivery of rendered pages.
+    """
+
+    async def test_get_page_contents(self) -> None:
+        """
+        Test that pages are rendered once and read from the page cache
+        afterwards.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (20, 10)).save(
+                pathlib.Path(directory, "a.png"))
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(path=directory))
+            cache = services.PageCache(
+                directory=str(pathlib.Path(directory, "cache")),
+                max_size=1024 * 1024)
+
+            async with provider("a.png") as file:
+                rendered = await core.get_page_contents(
+                    provider=file, cache=cache)
+                with patch.object(file, "read_as_images") as read_as_images:
+                    cached = await core.get_page_contents(
+                        provider=file, cache=cache)
+
+            read_as_images.assert_not_called()
+            assert cached == rendered
+            assert (cached[0].format, cached[0].width) == ("PNG", 20)
+            assert cache.metrics().hits == 2
+
+    async def test_get_page_content(self) -> None:
+        """
+        Test that a single page is rendered on its own and that only the
+        missing pages of a document are rendered once its page count is
+        known.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            pathlib.Path(directory, "a.pdf").write_bytes(b"%PDF-1.4")
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(path=directory))
+            cache = services.PageCache(
+                directory=str(pathlib.Path(directory, "cache")),
+                max_size=1024 * 1024)
+
+            def convert_from_path(
+                path: str,
+                first_page: int = 1,
+                last_page: int = 3,
+                **kwargs: Any
+            ) -> List[Image.Image]:
+                return [Image.new("RGB", (10 * page, 10))
+                        for page in range(first_page, min(last_page, 3) + 1)]
+
+            with patch("pdf2image.convert_from_path",
+                       side_effect=convert_from_path) as convert, \
+                    patch("pdf2image.pdfinfo_from_path",
+                          return_value={"Pages": 3}):
+                async with provider("a.pdf") as file:
+                    page = await core.get_page_content(
+                        provider=file, cache=cache, page=2)
+                    assert page is not None and page.width == 20
+                    assert convert.call_args.kwargs["first_page"] == 2
+                    assert convert.call_args.kwargs["last_page"] == 2
+
+                    assert await core.get_page_count(
+                        provider=file, cache=cache) == 3
+
+                    contents = await core.get_page_contents(
+                        provider=file, cache=cache)
+
+            assert [content.width for content in contents] == [10, 20, 30]
+            assert [(call.kwargs["first_page"], call.kwargs["last_page"])
+                    for call in convert.call_args_list] == [
+                (2, 2), (1, 1), (3, 3)]
+
+    async def test_get_page_contents_missing(self) -> None:
+        """
+        Test that the following pages keep their numbers if poppler leaves
+        out a page in the middle of a run of missing pages.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            pathlib.Path(directory, "a.pdf").write_bytes(b"%PDF-1.4")
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, render_processes=1))
+            cache = services.PageCache(
+                directory=str(pathlib.Path(directory, "cache")),
+                max_size=1024 * 1024)
+
+            def convert_from_path(
+                path: str,
+                first_page: int = 1,
+                last_page: int = 3,
+                **kwargs: Any
+            ) -> List[Image.Image]:
+                # Page 2 can not be rendered.
+                return [Image.new("RGB", (10 * page, 10))
+                        for page in range(first_page, min(last_page, 3) + 1)
+                        if page != 2]
+
+            with patch("pdf2image.convert_from_path",
+                       side_effect=convert_from_path) as convert, \
+                    patch("pdf2image.pdfinfo_from_path",
+                          return_value={"Pages": 3}):
+                async with provider("a.pdf") as file:
+                    await core.get_page_count(provider=file, cache=cache)
+
+                    contents = await core.get_page_contents(
+                        provider=file, cache=cache)
+
+            assert [(content.page, content.width) for content in contents] \
+                == [(1, 10), (3, 30)]
+            assert [(call.kwargs["first_page"], call.kwargs["last_page"])
+                    for call in convert.call_args_list] == [
+                (1, 3), (1, 1), (2, 2), (3, 3)]
+
+    async def test_iterate_page_contents(self) -> None:
+        """
+        Test that pages are yielded one at a time and that only the runs of
+        missing pages are rendered once the page count is known.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            pathlib.Path(directory, "a.pdf").write_bytes(b"%PDF-1.4")
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, render_processes=1))
+            cache = services.PageCache(
+                directory=str(pathlib.Path(directory, "cache")),
+                max_size=1024 * 1024)
+
+            def convert_from_path(
+                path: str,
+                first_page: int = 1,
+                last_page: Optional[int] = None,
+                **kwargs: Any
+            ) -> List[Image.Image]:
+                return [Image.new("RGB", (10 * page, 10))
+                        for page in range(first_page, min(last_page or 4, 4)
+                                          + 1)]
+
+            with patch("pdf2image.convert_from_path",
+                       side_effect=convert_from_path) as convert, \
+                    patch("pdf2image.pdfinfo_from_path",
+                          return_value={"Pages": 4}):
+                async with provider("a.pdf") as file:
+                    for page in (1, 4):
+                        await core.get_page_content(
+                            provider=file, cache=cache, page=page)
+                    await core.get_page_count(provider=file, cache=cache)
+
+                    contents = [
+                        content async for content in
+                        core.iterate_page_contents(provider=file, cache=cache)
+                    ]
+
+                    streamed = [
+                        content async for content in
+                        core.iterate_page_contents(provider=file, cache=None)
+                    ]
+
+            assert [content.page for content in contents] == [1, 2, 3, 4]
+            assert [content.width for content in contents] == [10, 20, 30, 40]
+            assert streamed == contents
+            assert [(call.kwargs["first_page"], call.kwargs["last_page"])
+                    for call in convert.call_args_list] == [
+                (1, 1), (4, 4), (2, 3), (1, None)]
+
+    async def test_get_page_tile(self) -> None:
+        """
+        Test that the tiles of a zoom level are created at once and read
+        from the page cache afterwards, and that tiles outside of the page
+        do not exist.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (1200, 700)).save(
+                pathlib.Path(directory, "a.png"))
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(path=directory))
+            cache = services.PageCache(
+                directory=str(pathlib.Path(directory, "cache")),
+                max_size=16 * 1024 * 1024)
+
+            async with provider("a.png") as file:
+                pyramid = await core.get_tile_pyramid(
+                    provider=file, cache=cache, page=1)
+                assert pyramid is not None
+                assert (pyramid.width, pyramid.height) == (1200, 700)
+                assert (pyramid.tile_size, pyramid.levels) == (512, 3)
+
+                tile = await core.get_page_tile(
+                    provider=file, cache=cache, page=1, level=0, x=2, y=1)
+                assert tile is not None
+                assert Image.open(io.BytesIO(tile[0])).size == (176, 188)
+
+                with patch("mrkr.providers.create_tiles") as create_tiles:
+                    tile = await core.get_page_tile(
+                        provider=file, cache=cache, page=1, level=0, x=0,
+                        y=1)
+                    assert tile is not None and tile[1] == "JPEG"
+                    create_tiles.assert_not_called()
+
+                tile = await core.get_page_tile(
+                    provider=file, cache=cache, page=1, level=2, x=0, y=0)
+                assert tile is not None
+                assert Image.open(io.BytesIO(tile[0])).size == (300, 175)
+
+                assert await core.get_page_tile(
+                    provider=file, cache=cache, page=1, level=3, x=0,
+                    y=0) is None
+                assert await core.get_page_tile(
+                    provider=file, cache=cache, page=1, level=1, x=2,
+                    y=0) is None
+
+    async def test_create_thumbnail(self) -> None:
+        """
+        Test that thumbnails are read at a reduced size from the file, and
+        scaled down from the cached first page if there is one.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            Image.new("RGB", (800, 400)).save(
+                pathlib.Path(directory, "a.jpg"))
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, thumbnail_size=100))
+            cache = services.PageCache(
+                directory=str(pathlib.Path(directory, "cache")),
+                max_size=1024 * 1024)
+
+            async with provider("a.jpg") as file:
+                data, format = await core.create_thumbnail(
+                    provider=file, cache=None)
+                assert format == "WEBP"
+                assert Image.open(io.BytesIO(data)).size == (100, 50)
+
+                await core.get_page_content(provider=file, cache=cache, page=1)
+                with patch.object(file, "read_thumbnail") as read_thumbnail:
+                    data, format = await core.create_thumbnail(
+                        provider=file, cache=cache)
+
+            read_thumbnail.assert_not_called()
+            assert Image.open(io.BytesIO(data)).size == (100, 50)
+
+# ---------------------------------------------------------------------------- #
@@ -42,3 +42,98 @@ class UserCrudTest(TestCase):
 
 
 # ---------------------------------------------------------------------------- #
+
+
+class DocumentCrudTest(TestCase):
+    """
+    Test cases for document CRUD operations.
+    """
+
+    def _create_document(self) -> models.Document:
+        """
+        Create a project with a single document.
+        """
+        project = models.Project(name="test", config={})
+        self.session.add(project)
+        self.session.commit()
+        self.session.refresh(project)
+
+        return crud.create_document(
+            session=self.session,
+            project_id=project.id,
+            path="test.pdf"
+        )
+
+    def test_update_document_ocr(self) -> None:
+        """
+        Test case for storing and replacing the raw OCR results of a document.
+        """
+        document = self._create_document()
+
+        crud.update_document_ocr(
+            session=self.session,
+            document=document,
+            pages={2: b"second", 1: b"first"}
+        )
+
+        result = crud.get_document_ocr(
+            session=self.session, document_id=document.id)
+
+        assert [page.page for page in result] == [1, 2]
+        assert result[0].data == b"first"
+
+        crud.update_document_ocr(
+            session=self.session,
+            document=document,
+            pages={1: b"replaced"}
+        )
+
+        result = crud.get_document_ocr(
+            session=self.session, document_id=document.id)
+
+        assert len(result) == 1
+        assert result[0].data == b"replaced"
+
+# ---------------------------------------------------------------------------- #
+
+
+class ProjectCrudTest(TestCase):
+    """
+    Test cases for project CRUD operations.
+    """
+
+    def test_update_listing_checkpoint(self) -> None:
+        """
+        Test case for storing, updating and removing the checkpoint of a file
+        listing.
+        """
+        project = models.Project(name="test", config={})
+        self.session.add(project)
+        self.session.commit()
+        self.session.refresh(project)
+
+        for token in ("first", "second"):
+            crud.update_listing_checkpoint(
+                session=self.session,
+                project_id=project.id,
+                checkpoint=schemas.ListingCheckpointSchema(
+                    prefix="documents/", token=token)
+            )
+
+        checkpoint = crud.get_listing_checkpoint(
+            session=self.session, project_id=project.id)
+
+        assert checkpoint is not None
+        assert checkpoint.prefix == "documents/"
+        assert checkpoint.token == "second"
+
+        crud.update_listing_checkpoint(
+            session=self.session,
+            project_id=project.id,
+            checkpoint=schemas.ListingCheckpointSchema()
+        )
+
+        assert crud.get_listing_checkpoint(
+            session=self.session, project_id=project.id) is None
+
+# ---------------------------------------------------------------------------- #
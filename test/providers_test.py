@@ -0,0 +1,1623 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import base64
+import datetime
+import io
+import importlib.metadata
+import pathlib
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any
+import numpy
+import pytesseract
+from botocore.exceptions import ClientError
+from PIL import Image, ImageDraw
+from unittest import mock
+
+# ---------------------------------------------------------------------------- #
+
+import mrkr.providers as providers
+import mrkr.schemas as schemas
+from mrkr.providers.ocr.tesseract import TesseractResult
+from mrkr.providers.aws import AwsSession, get_aws_session
+from mrkr.providers.cpu import CpuBudget
+from mrkr.providers.file.rendering import render_pdf
+from mrkr.providers.images import attach_source, convert_image, get_source, \
+    limit_pixels, open_image
+from mrkr.providers.ocr.preprocessing import estimate_skew, preprocess_image
+from mrkr.providers.ocr.textract import TextractOcrProvider
+from mrkr.providers.registry import ProviderRegistry
+from mrkr.providers.streams import iterate_in_thread
+from mrkr.providers.throttle import AdaptiveRateLimiter, \
+    call_with_throttling, get_rate_limiter
+from test._testcase import TestCase
+from test._textract import FakeTextractClient, create_fake_session, \
+    create_textract_response
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_ocr_result() -> providers.OcrResult:
+    """
+    Create a small OCR result with one page, one block, one line and two
+    words.
+    """
+    builder = providers.OcrResultBuilder()
+
+    page = builder.add_item(
+        id=uuid.uuid4().bytes, type=schemas.OcrItemType.page, page=1,
+        left=0, top=0, width=1, height=1)
+    block = builder.add_item(
+        id=uuid.uuid4().bytes, type=schemas.OcrItemType.block, page=1,
+        left=0.1, top=0.1, width=0.5, height=0.2)
+    line = builder.add_item(
+        id=uuid.uuid4().bytes, type=schemas.OcrItemType.line, page=1,
+        left=0.1, top=0.1, width=0.5, height=0.1)
+    first = builder.add_item(
+        id=uuid.uuid4().bytes, type=schemas.OcrItemType.word, page=1,
+        left=0.1, top=0.1, width=0.2, height=0.1, confidence=90.5,
+        content="Hello")
+    second = builder.add_item(
+        id=uuid.uuid4().bytes, type=schemas.OcrItemType.word, page=1,
+        left=0.4, top=0.1, width=0.2, height=0.1, confidence=80.0,
+        content="World")
+
+    builder.add_child(parent=line, child=first)
+    builder.add_child(parent=page, child=block)
+    builder.add_child(parent=block, child=line)
+    builder.add_child(parent=line, child=second)
+
+    return builder.build()
+
+# ---------------------------------------------------------------------------- #
+
+
+class OcrResultTest(TestCase):
+    """
+    Test cases for the compact OCR result.
+    """
+
+    def test_build(self) -> None:
+        """
+        Test that the builder creates the CSR child index in insertion order.
+        """
+        result = create_ocr_result()
+
+        assert len(result) == 5
+        assert list(result.get_children(0)) == [1]
+        assert list(result.get_children(1)) == [2]
+        assert list(result.get_children(2)) == [3, 4]
+        assert list(result.get_children(3)) == []
+        assert result.get_type(3) == schemas.OcrItemType.word
+        assert result.get_content(3) == "Hello"
+        assert result.get_content(0) is None
+        assert result.get_confidence(3) == 90.5
+        assert result.get_confidence(0) is None
+
+    def test_build_copy(self) -> None:
+        """
+        Test that adding items after building does not change the result.
+        """
+        builder = providers.OcrResultBuilder()
+        builder.add_item(
+            id=uuid.uuid4().bytes, type=schemas.OcrItemType.word, page=1,
+            left=0, top=0, width=0, height=0, content="first")
+        result = builder.build()
+
+        builder.add_item(
+            id=uuid.uuid4().bytes, type=schemas.OcrItemType.word, page=2,
+            left=0, top=0, width=0, height=0, content="second")
+
+        assert len(result) == 1
+        assert list(result.pages) == [1]
+        assert result.strings == ["first"]
+        assert len(builder.build()) == 2
+
+    def test_interned_strings(self) -> None:
+        """
+        Test that identical texts are stored only once.
+        """
+        builder = providers.OcrResultBuilder()
+        for _ in range(3):
+            builder.add_item(
+                id=uuid.uuid4().bytes, type=schemas.OcrItemType.word, page=1,
+                left=0, top=0, width=0, height=0, content="same")
+        result = builder.build()
+
+        assert result.strings == ["same"]
+        assert list(result.contents) == [0, 0, 0]
+
+    def test_schema_roundtrip(self) -> None:
+        """
+        Test the export to and the import from an OcrResultSchema.
+        """
+        result = create_ocr_result()
+        schema = result.to_schema()
+
+        assert isinstance(schema, schemas.OcrResultSchema)
+        assert schema.id == result.id
+        assert len(schema.items) == 5
+        assert schema.items[2].relationships[1].id == schema.items[4].id
+
+        assert providers.OcrResult.from_schema(schema).to_schema() == schema
+
+    def test_failed_pages(self) -> None:
+        """
+        Test that failed pages are flagged (unlike blank pages with a
+        confidence of 0) and that the flag is kept by the serialization.
+        """
+        builder = providers.OcrResultBuilder()
+        builder.add_item(
+            id=uuid.uuid4().bytes, type=schemas.OcrItemType.page, page=1,
+            left=0, top=0, width=1, height=1, confidence=0.0)
+        builder.add_failed_page(page=2)
+        result = builder.build()
+
+        assert not result.is_failed(0)
+        assert result.get_failed_pages() == [2]
+        assert providers.OcrResult.from_bytes(
+            result.to_bytes()).get_failed_pages() == [2]
+        assert providers.OcrResult.from_schema(
+            result.to_schema()).get_failed_pages() == [2]
+        assert [page.get_failed_pages()
+                for page in result.split_pages().values()] == [[], [2]]
+
+    def test_invalid_id(self) -> None:
+        """
+        Test that item ids must be 16 bytes long.
+        """
+        builder = providers.OcrResultBuilder()
+        with self.assertRaises(ValueError):
+            builder.add_item(
+                id=b"short", type=schemas.OcrItemType.page, page=1,
+                left=0, top=0, width=1, height=1)
+
+# ---------------------------------------------------------------------------- #
+
+
+class TesseractOcrProviderTest(TestCase):
+    """
+    Test cases for the Tesseract OCR provider.
+    """
+
+    def test_convert_result(self) -> None:
+        """
+        Test the conversion of a Tesseract result into the compact result.
+        """
+        provider = providers.TesseractOcrProvider(
+            config=schemas.OcrProviderTesseractConfigSchema())
+
+        result = TesseractResult(
+            level=[1, 2, 3, 4, 5, 5],
+            page_num=[1, 1, 1, 1, 1, 1],
+            block_num=[0, 1, 1, 1, 1, 1],
+            par_num=[0, 0, 1, 1, 1, 1],
+            line_num=[0, 0, 0, 1, 1, 1],
+            word_num=[0, 0, 0, 0, 1, 2],
+            left=[0, 10, 10, 10, 10, 50],
+            top=[0, 10, 10, 10, 10, 10],
+            width=[100, 80, 80, 80, 30, 30],
+            height=[200, 20, 20, 20, 20, 20],
+            conf=[-1, -1, -1, -1, 96, 91],
+            text=["", "", "", "", "Hello", "World"]
+        )
+
+        builder = providers.OcrResultBuilder()
+        provider._convert_result(
+            result=result,
+            dimensions=(100, 200),
+            page=1,
+            builder=builder
+        )
+        ocr_result = builder.build()
+
+        assert len(ocr_result) == 6
+        assert [list(ocr_result.get_children(i)) for i in range(6)] == \
+            [[1], [2], [3], [4, 5], [], []]
+        assert ocr_result.left[5] == 0.5
+        assert ocr_result.get_confidence(0) is None
+        assert ocr_result.get_content(4) == "Hello"
+
+    async def test_ocr_page_timeout(self) -> None:
+        """
+        Test that a page on which Tesseract times out is recorded as failed
+        while the other pages are still processed.
+        """
+        provider = providers.TesseractOcrProvider(
+            config=schemas.OcrProviderTesseractConfigSchema(page_timeout=5))
+
+        output = {
+            "level": [1], "page_num": [1], "block_num": [0], "par_num": [0],
+            "line_num": [0], "word_num": [0], "left": [0], "top": [0],
+            "width": [10], "height": [10], "conf": [-1], "text": [""]
+        }
+
+        images = [Image.new("L", (10, 10)), Image.new("L", (20, 10)),
+                  Image.new("L", (10, 10))]
+
+        def image_to_data(image: Image.Image, **kwargs: Any) -> dict:
+            assert kwargs["timeout"] == 5
+            if image.width == 20:
+                raise RuntimeError("Tesseract process timeout")
+            return output
+
+        with mock.patch("pytesseract.image_to_data", image_to_data):
+            async with provider(images=images) as ocr_provider:
+                result = await ocr_provider.ocr()
+
+        assert list(result.pages) == [1, 2, 3]
+        assert result.get_failed_pages() == [2]
+        assert result.get_position(1) == schemas.PositionSchema(
+            left=0, top=0, width=1, height=1)
+
+    async def test_ocr_page_timeout_budget(self) -> None:
+        """
+        Test that the time a page waits for the CPU budget does not count
+        towards its page timeout.
+        """
+        provider = providers.TesseractOcrProvider(
+            config=schemas.OcrProviderTesseractConfigSchema(page_timeout=0.1))
+        budget = CpuBudget(size=1)
+        release = threading.Event()
+
+        output = {
+            "level": [1], "page_num": [1], "block_num": [0], "par_num": [0],
+            "line_num": [0], "word_num": [0], "left": [0], "top": [0],
+            "width": [10], "height": [10], "conf": [-1], "text": [""]
+        }
+
+        def image_to_data(image: Image.Image, **kwargs: Any) -> dict:
+            return output
+
+        blocker = asyncio.ensure_future(
+            budget.run_in_executor(release.wait, timeout=5))
+        await asyncio.sleep(0.05)
+        asyncio.get_running_loop().call_later(0.3, release.set)
+
+        images = [Image.new("L", (10, 10)) for _ in range(2)]
+        with mock.patch("pytesseract.image_to_data", image_to_data), \
+                mock.patch("mrkr.providers.ocr.tesseract.cpu_budget", budget):
+            async with provider(images=images) as ocr_provider:
+                result = await ocr_provider.ocr()
+
+        await blocker
+        assert result.get_failed_pages() == []
+        assert list(result.pages) == [1, 2]
+
+    async def test_ocr_missing_binary(self) -> None:
+        """
+        Test that a missing Tesseract binary fails the OCR instead of
+        failing every page.
+        """
+        provider = providers.TesseractOcrProvider(
+            config=schemas.OcrProviderTesseractConfigSchema())
+
+        def image_to_data(image: Image.Image, **kwargs: Any) -> dict:
+            raise pytesseract.TesseractNotFoundError()
+
+        with mock.patch("pytesseract.image_to_data", image_to_data):
+            async with provider(images=[Image.new("L", (10, 10))]) as \
+                    ocr_provider:
+                with self.assertRaises(pytesseract.TesseractNotFoundError):
+                    await ocr_provider.ocr()
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_image_file(format: str, size: tuple = (40, 20)) -> bytes:
+    """
+    Create the content of an image file in the given format.
+    """
+    image = Image.new("RGB", size, (200, 100, 50))
+    stream = io.BytesIO()
+    image.save(stream, format=format)
+    return stream.getvalue()
+
+# ---------------------------------------------------------------------------- #
+
+
+class ImagePassthroughTest(TestCase):
+    """
+    Test cases for passing source images through without re-encoding.
+    """
+
+    def test_get_source(self) -> None:
+        """
+        Test that the source is only returned for unchanged images.
+        """
+        data = create_image_file(format="PNG")
+        image = Image.open(io.BytesIO(data))
+        attach_source(image=image, data=data)
+
+        assert get_source(image=image, formats=("PNG",)) == data
+        assert get_source(image=image, formats=("JPEG",)) is None
+        assert get_source(
+            image=image, formats=("PNG",), modes=("L",)) is None
+        assert get_source(
+            image=image, formats=("PNG",), max_bytes=len(data) - 1) is None
+        assert get_source(image=image.convert("L"), formats=("PNG",)) is None
+        assert get_source(image=image.resize((4, 2)), formats=("PNG",)) \
+            is None
+        assert get_source(image=Image.new("RGB", (4, 2)),
+                          formats=("PNG",)) is None
+
+    async def test_read_as_base64_images(self) -> None:
+        """
+        Test that the viewer receives JPEG and PNG files as they are, and
+        other formats in the configured image format.
+        """
+        # The local file provider resolves paths relative to the working
+        # directory.
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            jpeg = create_image_file(format="JPEG")
+            bmp = create_image_file(format="BMP")
+            pathlib.Path(directory, "image.jpg").write_bytes(jpeg)
+            pathlib.Path(directory, "image.bmp").write_bytes(bmp)
+
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, image_format="PNG"))
+
+            async with provider("image.jpg") as file:
+                pages = await file.read_as_base64_images()
+
+            assert base64.b64decode(pages[0].content) == jpeg
+            assert pages[0].format == "JPEG"
+            assert pages[0].width == 40
+
+            async with provider("image.bmp") as file:
+                pages = await file.read_as_base64_images()
+
+            assert pages[0].format == "PNG"
+            assert base64.b64decode(pages[0].content).startswith(b"\x89PNG")
+
+    def test_limit_pixels(self) -> None:
+        """
+        Test that oversized images are downsampled, JPEG files before they
+        are decoded, and that huge images that can not be decoded at a
+        reduced size are rejected.
+        """
+        data = create_image_file(format="JPEG", size=(4000, 3000))
+        image = Image.open(io.BytesIO(data))
+        attach_source(image=image, data=data)
+
+        assert limit_pixels(image=image, max_pixels=12_000_000) is image
+
+        limited = limit_pixels(image=image, max_pixels=1_000_000)
+        assert limited.width * limited.height <= 1_000_000
+        assert abs(limited.width / limited.height - 4 / 3) < 0.01
+        assert get_source(image=limited, formats=("JPEG",)) is None
+
+        data = create_image_file(format="PNG", size=(4000, 3000))
+        with self.assertRaises(Exception):
+            limit_pixels(image=Image.open(io.BytesIO(data)),
+                         max_pixels=1_000_000)
+
+    def test_open_image(self) -> None:
+        """
+        Test that PIL's decompression bomb limit only is raised while an
+        image is opened for limit_pixels.
+        """
+        assert Image.MAX_IMAGE_PIXELS is not None
+
+        data = create_image_file(format="PNG", size=(100, 100))
+
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            with self.assertRaises(Image.DecompressionBombError):
+                Image.open(io.BytesIO(data))
+
+            assert open_image(data=data, max_pixels=1000).size == (100, 100)
+            assert Image.MAX_IMAGE_PIXELS == 1000
+
+    def test_convert_image(self) -> None:
+        """
+        Test that pages are converted and downscaled for the viewer, that
+        JPEG files are progressive and that pages which already have the
+        format and size are left as they are.
+        """
+        data = create_image_file(format="PNG", size=(400, 300))
+
+        assert convert_image(data=data, format="PNG", quality=80) is None
+        assert convert_image(
+            data=data, format="PNG", quality=80, max_size=400) is None
+
+        image = Image.open(io.BytesIO(convert_image(
+            data=data, format="WEBP", quality=80, max_size=200) or b""))
+        assert (image.format, image.size) == ("WEBP", (200, 150))
+
+        image = Image.open(io.BytesIO(convert_image(
+            data=data, format="JPEG", quality=80) or b""))
+        assert (image.format, image.size) == ("JPEG", (400, 300))
+        assert image.info.get("progressive")
+
+# ---------------------------------------------------------------------------- #
+
+
+class LocalFileProviderTest(TestCase):
+    """
+    Test cases for the local file provider.
+    """
+
+    async def test_list(self) -> None:
+        """
+        Test the recursive listing with extension, include and exclude
+        filters.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            for path in ("a.pdf", "b.txt", "C.PNG", "letters/d.pdf",
+                         "letters/2024/e.jpg", "archive/f.pdf",
+                         "letters/tmp/g.pdf", "letters/h.draft.pdf"):
+                pathlib.Path(directory, path).parent.mkdir(
+                    parents=True, exist_ok=True)
+                pathlib.Path(directory, path).write_bytes(b"")
+
+            async def list_files(**kwargs: Any) -> list:
+                provider = providers.LocalFileProvider(
+                    config=schemas.FileProviderLocalConfigSchema(
+                        path=directory, **kwargs))
+                async with provider("/") as folder:
+                    return sorted([path async for path in folder.list()])
+
+            assert await list_files(recursive=True) == [
+                "C.PNG", "a.pdf", "archive/f.pdf", "letters/2024/e.jpg",
+                "letters/d.pdf", "letters/h.draft.pdf", "letters/tmp/g.pdf"]
+            assert await list_files() == ["C.PNG", "a.pdf"]
+            assert await list_files(
+                recursive=True,
+                exclude=["archive", "*/tmp", "*.draft.pdf"]) == [
+                "C.PNG", "a.pdf", "letters/2024/e.jpg", "letters/d.pdf"]
+            assert await list_files(
+                recursive=True, include=["letters/*"],
+                extensions=[".pdf"]) == [
+                "letters/d.pdf", "letters/h.draft.pdf", "letters/tmp/g.pdf"]
+
+    async def test_read_pdf_from_path(self) -> None:
+        """
+        Test that local PDF files are passed to poppler by their path instead
+        of being read into memory.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            pathlib.Path(directory, "a.pdf").write_bytes(b"%PDF-1.4")
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(path=directory))
+            image = Image.new("RGB", (10, 10))
+
+            with mock.patch("pdf2image.convert_from_path",
+                            return_value=[image]) as convert_from_path, \
+                    mock.patch.object(provider, "read") as read:
+                async with provider("a.pdf") as file:
+                    assert await file.read_as_images(page=2) == [image]
+                    assert await file.local_path() == \
+                        pathlib.Path(directory.strip("/"), "a.pdf")
+
+            assert convert_from_path.call_args.args == (
+                str(pathlib.Path(directory.strip("/"), "a.pdf")),)
+            assert convert_from_path.call_args.kwargs["first_page"] == 2
+            read.assert_not_called()
+
+            async with provider("missing.pdf") as file:
+                assert await file.local_path() is None
+
+    async def test_read_thumbnail_oversized(self) -> None:
+        """
+        Test that thumbnails of JPEG files with more than max_pixels pixels
+        are decoded at a reduced size, while other images that are too large
+        to be decoded are rejected.
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            for format in ("JPEG", "PNG"):
+                pathlib.Path(directory, f"a.{format.lower()}").write_bytes(
+                    create_image_file(format=format, size=(4000, 3000)))
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, max_pixels=1_000_000))
+
+            async with provider("a.jpeg") as file:
+                thumbnail = await file.read_thumbnail(max_size=200)
+                assert thumbnail.size == (200, 150)
+
+            async with provider("a.png") as file:
+                with self.assertRaisesRegex(Exception, "too large"):
+                    await file.read_thumbnail(max_size=200)
+
+    async def test_read_info(self) -> None:
+        """
+        Test that the page count and page sizes of a PDF file are read with
+        pdfinfo (in pixels at the rendering DPI, rotated pages swapped).
+        """
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            pathlib.Path(directory, "a.pdf").write_bytes(b"%PDF-1.4")
+            provider = providers.LocalFileProvider(
+                config=schemas.FileProviderLocalConfigSchema(
+                    path=directory, pdf_dpi=144))
+            info = {
+                "Pages": 2,
+                "Page    1 size": "612 x 792 pts (letter)",
+                "Page    1 rot": "0",
+                "Page    2 size": "595.276 x 841.89 pts (A4)",
+                "Page    2 rot": "90",
+            }
+
+            with mock.patch("pdf2image.pdfinfo_from_path",
+                            return_value=info) as pdfinfo_from_path:
+                async with provider("a.pdf") as file:
+                    result = await file.read_info()
+
+        assert pdfinfo_from_path.call_args.kwargs["first_page"] == 1
+        assert result.pages == 2
+        assert [(size.width, size.height) for size in result.sizes] == [
+            (1224, 1584), (1684, 1191)]
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_s3_file_provider(client: Any, **kwargs: Any) -> Any:
+    """
+    Create an S3 file provider for the folder "documents" that uses a fake
+    S3 client.
+    """
+    provider = providers.S3FileProvider(
+        config=schemas.FileProviderS3ConfigSchema(
+            aws_access_key_id="key",
+            aws_account_id="123456789012",
+            aws_region_name="eu-central-1",
+            aws_role_name="role",
+            aws_secret_access_key="secret",
+            aws_bucket_name="bucket",
+            path="documents",
+            **kwargs
+        )
+    )
+    provider._session = create_fake_session(client)
+    return provider
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_s3_client(keys: list, page_size: int = 2) -> mock.Mock:
+    """
+    Create a fake S3 client that lists the keys in pages (the continuation
+    token is the index of the first key of the page).
+    """
+    def list_objects_v2(
+        Prefix: str,
+        ContinuationToken: str = "0",
+        **kwargs: Any
+    ) -> dict:
+        matches = [key for key in keys if key.startswith(Prefix)]
+        start = int(ContinuationToken)
+        end = start + page_size
+        page: dict = {
+            "Contents": [{"Key": key} for key in matches[start:end]],
+            "IsTruncated": end < len(matches),
+        }
+        if end < len(matches):
+            page["NextContinuationToken"] = str(end)
+        return page
+
+    return mock.Mock(
+        head_object=mock.Mock(return_value={
+            "ContentType": "application/x-directory", "ETag": "etag",
+            "ContentLength": 0}),
+        list_objects_v2=mock.Mock(side_effect=list_objects_v2)
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class S3FileProviderTest(TestCase):
+    """
+    Test cases for the S3 file provider.
+    """
+
+    async def test_list(self) -> None:
+        """
+        Test the paginated listing with the include prefix and the delimiter
+        passed to S3.
+        """
+        client = create_s3_client(keys=[
+            "documents/", "documents/a.pdf", "documents/b.txt",
+            "documents/letters/", "documents/letters/c.pdf",
+            "documents/letters/2024/d.pdf", "documents/other/e.pdf"])
+
+        async with create_s3_file_provider(
+                client, recursive=True)("/") as folder:
+            assert [path async for path in folder.list()] == [
+                "a.pdf", "letters/c.pdf", "letters/2024/d.pdf", "other/e.pdf"]
+        assert client.list_objects_v2.call_count == 4
+        assert client.list_objects_v2.call_args_list[1].kwargs[
+            "ContinuationToken"] == "2"
+
+        client.list_objects_v2.reset_mock()
+        async with create_s3_file_provider(
+                client, recursive=True, include=["letters/*"])("/") as folder:
+            assert [path async for path in folder.list()] == [
+                "letters/c.pdf", "letters/2024/d.pdf"]
+        assert client.list_objects_v2.call_args.kwargs[
+            "Prefix"] == "documents/letters/"
+
+        client.list_objects_v2.reset_mock()
+        async with create_s3_file_provider(client)("/") as folder:
+            assert [path async for path in folder.list()] == ["a.pdf"]
+        assert client.list_objects_v2.call_args.kwargs["Delimiter"] == "/"
+
+    async def test_read(self) -> None:
+        """
+        Test that a read sends a single GET request and caches the metadata
+        of the object for the following checks.
+        """
+        client = mock.Mock(
+            get_object=mock.Mock(return_value={
+                "Body": io.BytesIO(b"content"),
+                "ContentType": "application/pdf", "ETag": "etag",
+                "ContentLength": 7}),
+            head_object=mock.Mock(side_effect=ClientError(
+                {"Error": {"Code": "404"}}, "HeadObject"))
+        )
+
+        async with create_s3_file_provider(client)("read.pdf") as file:
+            assert [chunk async for chunk in file.read(chunk_size=3)] == [
+                b"con", b"ten", b"t"]
+            assert await file.is_file
+            assert not await file.is_folder
+
+        client.get_object.assert_called_once_with(
+            Bucket="bucket", Key="documents/read.pdf",
+            Range=f"bytes=0-{8 * 1024 * 1024 - 1}")
+        assert client.head_object.call_count == 1
+
+        client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        async with create_s3_file_provider(client)("missing.pdf") as file:
+            with self.assertRaises(Exception):
+                async for _ in file.read():
+                    pass
+
+    async def test_read_changed(self) -> None:
+        """
+        Test that a read after the fingerprint only returns the version of
+        the object the fingerprint was created from, and that the outdated
+        metadata is removed when the object was changed.
+        """
+        object = {"ETag": "old"}
+
+        def head_object(**kwargs: Any) -> dict:
+            return {"ContentType": "application/pdf", "ETag": object["ETag"],
+                    "ContentLength": 7}
+
+        def get_object(**kwargs: Any) -> dict:
+            if kwargs.get("IfMatch", object["ETag"]) != object["ETag"]:
+                raise ClientError(
+                    {"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+            return {"Body": io.BytesIO(b"content"),
+                    "ContentType": "application/pdf", "ETag": object["ETag"],
+                    "ContentLength": 7}
+
+        client = mock.Mock(
+            head_object=mock.Mock(side_effect=head_object),
+            get_object=mock.Mock(side_effect=get_object)
+        )
+
+        async with create_s3_file_provider(client)("changed.pdf") as file:
+            fingerprint = await file.fingerprint()
+            object["ETag"] = "new"
+
+            with self.assertRaisesRegex(Exception, "was changed"):
+                async for _ in file.read():
+                    pass
+            assert client.get_object.call_args.kwargs["IfMatch"] == "old"
+
+            assert await file.fingerprint() != fingerprint
+            assert [chunk async for chunk in file.read()] == [b"content"]
+
+        assert client.head_object.call_count == 2
+
+    async def test_read_parts(self) -> None:
+        """
+        Test that large objects are downloaded in ranged parts, that the
+        content arrives in order and in chunks of at most chunk_size bytes,
+        and that slow parts are hedged.
+        """
+        content = bytes(range(256)) * 40
+        requests = []
+
+        def get_object(Range: str, **kwargs: Any) -> dict:
+            start, end = map(int, Range.removeprefix("bytes=").split("-"))
+            requests.append(start)
+            # The first request for the second part is slow.
+            if start == 1000 and requests.count(start) == 1:
+                time.sleep(0.5)
+            data = content[start:end + 1]
+            return {
+                "Body": io.BytesIO(data), "ContentType": "application/pdf",
+                "ETag": "etag", "ContentLength": len(data),
+                "ContentRange": f"bytes {start}-{end}/{len(content)}"
+            }
+
+        client = mock.Mock(get_object=mock.Mock(side_effect=get_object))
+
+        provider = create_s3_file_provider(
+            client, part_size=1000, download_concurrency=2, hedge_after=0.1)
+        async with provider("large.pdf") as file:
+            chunks = [chunk async for chunk in file.read(chunk_size=300)]
+
+        assert b"".join(chunks) == content
+        assert max(len(chunk) for chunk in chunks) == 300
+        assert sorted(requests) == sorted(
+            list(range(0, len(content), 1000)) + [1000])
+        assert all(call.kwargs.get("IfMatch") == "etag"
+                   for call in client.get_object.call_args_list[1:])
+
+    async def test_read_pdf(self) -> None:
+        """
+        Test that PDF files are written to a temporary file for poppler,
+        which is removed afterwards.
+        """
+        client = mock.Mock(get_object=mock.Mock(return_value={
+            "Body": io.BytesIO(b"%PDF-1.4"), "ContentType": "application/pdf",
+            "ETag": "etag", "ContentLength": 8}))
+        paths = []
+
+        def convert_from_path(path: str, **kwargs: Any) -> list:
+            paths.append(path)
+            assert pathlib.Path(path).read_bytes() == b"%PDF-1.4"
+            return [Image.new("RGB", (10, 10))]
+
+        with mock.patch("pdf2image.convert_from_path",
+                        side_effect=convert_from_path):
+            async with create_s3_file_provider(client)("a.pdf") as file:
+                assert len(await file.read_as_images(page=1)) == 1
+
+        assert len(paths) == 1
+        assert not pathlib.Path(paths[0]).exists()
+
+    async def test_list_checkpoint(self) -> None:
+        """
+        Test that the next page is fetched before the current one is consumed
+        and that an interrupted listing continues at the checkpoint.
+        """
+        keys = [f"documents/{index}.pdf" for index in range(10)]
+        client = create_s3_client(keys=keys, page_size=4)
+        checkpoint = schemas.ListingCheckpointSchema()
+
+        async with create_s3_file_provider(client)("/") as folder:
+            listing = folder.list(checkpoint=checkpoint)
+            paths = [await anext(listing) for _ in range(5)]
+            await asyncio.sleep(0.1)
+            await listing.aclose()
+
+        assert client.list_objects_v2.call_count == 3
+        assert checkpoint.prefix == "documents/"
+        assert checkpoint.token == "4"
+
+        client.list_objects_v2.reset_mock()
+        async with create_s3_file_provider(client)("/") as folder:
+            paths += [path async for path in folder.list(
+                checkpoint=checkpoint)]
+
+        assert paths[:4] + paths[5:] == [f"{index}.pdf" for index in range(10)]
+        assert client.list_objects_v2.call_args_list[0].kwargs[
+            "ContinuationToken"] == "4"
+        assert checkpoint.token is None
+
+# ---------------------------------------------------------------------------- #
+
+
+class RenderingTest(TestCase):
+    """
+    Test cases for the parallel rendering of PDF files.
+    """
+
+    async def test_render_pdf(self) -> None:
+        """
+        Test that the pages are split into runs that are rendered in
+        parallel and yielded in page order.
+        """
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def convert_from_path(
+            path: str,
+            first_page: int,
+            last_page: int,
+            **kwargs: Any
+        ) -> list:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            # Later runs finish first.
+            time.sleep(0.2 / first_page)
+            with lock:
+                running -= 1
+            return [Image.new("L", (page, 1))
+                    for page in range(first_page, last_page + 1)]
+
+        with mock.patch("pdf2image.convert_from_path",
+                        side_effect=convert_from_path) as convert, \
+                mock.patch("mrkr.providers.file.rendering.cpu_budget",
+                           CpuBudget(size=4)):
+            images = [image async for image in render_pdf(
+                path="a.pdf", dpi=100, first_page=1, last_page=20,
+                processes=3)]
+
+        assert [image.width for image in images] == list(range(1, 21))
+        assert [(call.kwargs["first_page"], call.kwargs["last_page"])
+                for call in convert.call_args_list] == [
+            (1, 7), (8, 14), (15, 20)]
+        assert max_running == 3
+
+    def test_cpu_budget(self) -> None:
+        """
+        Test that no more jobs than the budget allows run at a time.
+        """
+        budget = CpuBudget(size=2)
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def job() -> None:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+        threads = [threading.Thread(target=budget.run, args=(job,))
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max_running == 2
+
+    async def test_cpu_budget_abandoned(self) -> None:
+        """
+        Test that jobs of cancelled callers are skipped if they have not
+        started yet, and counted as wasted if they were already running.
+        """
+        budget = CpuBudget(size=1)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def job(name: str) -> str:
+            calls.append(name)
+            started.set()
+            release.wait(timeout=1)
+            return name
+
+        metrics = providers.wasted_work.metrics()
+
+        running = asyncio.ensure_future(budget.run_in_executor(job, "a"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        waiting = asyncio.ensure_future(budget.run_in_executor(job, "b"))
+        await asyncio.sleep(0.05)
+
+        running.cancel()
+        waiting.cancel()
+        await asyncio.gather(running, waiting, return_exceptions=True)
+        release.set()
+
+        # The next job only starts after the abandoned ones left the budget.
+        assert await budget.run_in_executor(job, "c") == "c"
+        assert calls == ["a", "c"]
+
+        wasted = providers.wasted_work.metrics()
+        assert wasted.abandoned_jobs - metrics.abandoned_jobs == 2
+        assert wasted.wasted_jobs - metrics.wasted_jobs == 1
+
+    async def test_cpu_budget_executor(self) -> None:
+        """
+        Test that jobs that wait for the budget do not hold the threads of
+        the default executor.
+        """
+        budget = CpuBudget(size=1)
+        release = threading.Event()
+
+        def job() -> str:
+            release.wait(timeout=5)
+            return threading.current_thread().name
+
+        loop = asyncio.get_running_loop()
+        jobs = [asyncio.ensure_future(budget.run_in_executor(job))
+                for _ in range(40)]
+        await asyncio.sleep(0.05)
+
+        assert await asyncio.wait_for(
+            loop.run_in_executor(None, lambda: "free"), timeout=1) == "free"
+
+        release.set()
+        names = await asyncio.gather(*jobs)
+        assert all(name.startswith("mrkr-cpu") for name in names)
+
+# ---------------------------------------------------------------------------- #
+
+
+class StreamsTest(TestCase):
+    """
+    Test cases for iterating blocking iterators in a worker thread.
+    """
+
+    async def test_iterate_in_thread(self) -> None:
+        """
+        Test that the items are returned in batches and that exceptions of
+        the iterator are raised.
+        """
+        batches = [batch async for batch in iterate_in_thread(
+            lambda: iter(range(25)), batch_size=10)]
+
+        assert batches == [list(range(10)), list(range(10, 20)),
+                           list(range(20, 25))]
+
+        def fail() -> Any:
+            yield 1
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            async for _ in iterate_in_thread(fail):
+                pass
+
+    async def test_iterate_in_thread_delay(self) -> None:
+        """
+        Test that a partial batch of a slow iterator is yielded after the
+        maximum delay instead of waiting for a full batch.
+        """
+        release = threading.Event()
+
+        def produce() -> Any:
+            yield from range(3)
+            release.wait(timeout=5)
+            yield 3
+
+        stream = iterate_in_thread(produce, batch_size=10, max_delay=0.05)
+        start = time.monotonic()
+        assert await anext(stream) == [0, 1, 2]
+        assert time.monotonic() - start < 1
+        release.set()
+        assert [batch async for batch in stream] == [[3]]
+
+    async def test_iterate_in_thread_closed(self) -> None:
+        """
+        Test that the worker stops when the consumer stops early, while only
+        a limited number of batches is buffered.
+        """
+        produced = []
+
+        def produce() -> Any:
+            for item in range(1_000_000):
+                produced.append(item)
+                yield item
+
+        stream = iterate_in_thread(produce, batch_size=10, max_batches=2)
+        assert await anext(stream) == list(range(10))
+        await asyncio.sleep(0.1)
+        await stream.aclose()
+
+        count = len(produced)
+        await asyncio.sleep(0.3)
+
+        assert count < 100
+        assert len(produced) == count
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_textract_provider(
+    client: FakeTextractClient,
+    **kwargs: Any
+) -> TextractOcrProvider:
+    """
+    Create a Textract OCR provider that uses a fake Textract client. Every
+    provider uses its own account, so that the tests do not share the rate
+    limiters of an account.
+    """
+    provider = TextractOcrProvider(
+        config=schemas.OcrProviderTextractConfigSchema(
+            aws_access_key_id="key",
+            aws_account_id=f"{uuid.uuid4().int % 10 ** 12:012d}",
+            aws_region_name="eu-central-1",
+            aws_role_name="role",
+            aws_secret_access_key="secret",
+            **kwargs
+        )
+    )
+    provider._session = create_fake_session(client)
+    return provider
+
+# ---------------------------------------------------------------------------- #
+
+
+class TextractOcrProviderTest(TestCase):
+    """
+    Test cases for the Textract OCR provider.
+    """
+
+    def test_convert_result(self) -> None:
+        """
+        Test the conversion of Textract blocks, including children that
+        appear after their parents and relationships to unknown blocks.
+        """
+        provider = create_textract_provider(client=FakeTextractClient())
+
+        blocks = create_textract_response(lines=2, words=3)["Blocks"]
+        blocks[0]["Relationships"][0]["Ids"].append(str(uuid.uuid4()))
+        blocks[1]["Relationships"].append(
+            {"Type": "VALUE", "Ids": [blocks[2]["Id"]]})
+
+        builder = providers.OcrResultBuilder()
+        provider._convert_result(blocks=blocks, page=2, builder=builder)
+        result = builder.build()
+
+        assert len(result) == 2 + 2 * 4
+        assert [result.get_type(index) for index in range(3)] == [
+            schemas.OcrItemType.page,
+            schemas.OcrItemType.block,
+            schemas.OcrItemType.line
+        ]
+        assert str(result.get_id(0)) == blocks[0]["Id"]
+        assert list(result.get_children(0)) == [1, 2, 6]
+        assert list(result.get_children(1)) == [2, 6]
+        assert list(result.get_children(2)) == [3, 4, 5]
+        assert result.get_content(3) == "word0"
+        assert result.get_content(2) is None
+        assert set(result.pages) == {2}
+
+    async def test_analyze_page_passthrough(self) -> None:
+        """
+        Test that JPEG files are sent as they are, while converted images
+        are encoded again.
+        """
+        client = FakeTextractClient()
+        provider = create_textract_provider(client=client)
+
+        data = create_image_file(format="JPEG")
+        image = Image.open(io.BytesIO(data))
+        attach_source(image=image, data=data)
+
+        await provider._analyze_page(image=image)
+        await provider._analyze_page(image=image.convert("L"))
+
+        assert client.documents[0] == data
+        assert client.documents[1] != data
+
+    async def test_ocr_concurrent(self) -> None:
+        """
+        Test that pages are analyzed concurrently and returned in order.
+        """
+        client = FakeTextractClient(latency=0.05)
+        provider = create_textract_provider(
+            client=client, requests_per_second=100, max_concurrency=3)
+
+        images = [Image.new("RGB", (10, 10)) for _ in range(6)]
+        async with provider(images=images) as ocr_provider:
+            result = await ocr_provider.ocr()
+
+        pages = [result.pages[index] for index in range(len(result))
+                 if result.get_type(index) == schemas.OcrItemType.page]
+
+        assert pages == [1, 2, 3, 4, 5, 6]
+        assert client.calls == 6
+        assert 1 < client.max_in_flight <= 3
+
+    async def test_ocr_throttled(self) -> None:
+        """
+        Test that throttled requests are retried and the rate is reduced.
+        """
+        client = FakeTextractClient(tps=3)
+        provider = create_textract_provider(
+            client=client, requests_per_second=20, max_retries=10)
+
+        images = [Image.new("RGB", (10, 10)) for _ in range(6)]
+        async with provider(images=images) as ocr_provider:
+            result = await ocr_provider.ocr()
+
+        assert client.throttled > 0
+        assert client.calls == 6 + client.throttled
+        assert provider._limiter.rate < 20
+        assert len([index for index in range(len(result))
+                    if result.get_type(index) == schemas.OcrItemType.page]) \
+            == 6
+
+    async def test_ocr_page_timeout(self) -> None:
+        """
+        Test that pages that exceed the page timeout are recorded as failed
+        without delaying the other pages.
+        """
+        client = FakeTextractClient(latency=0.5)
+        provider = create_textract_provider(
+            client=client, requests_per_second=100, page_timeout=0.1)
+
+        images = [Image.new("RGB", (10, 10)) for _ in range(2)]
+        start = time.perf_counter()
+        async with provider(images=images) as ocr_provider:
+            result = await ocr_provider.ocr()
+
+        assert time.perf_counter() - start < 0.4
+        assert result.get_failed_pages() == [1, 2]
+        assert len(result) == 2
+
+    async def test_ocr_page_timeout_limiter(self) -> None:
+        """
+        Test that the time a page waits for the rate limiter does not count
+        towards its page timeout.
+        """
+        client = FakeTextractClient()
+        provider = create_textract_provider(
+            client=client, requests_per_second=5, page_timeout=0.1)
+
+        images = [Image.new("RGB", (10, 10)) for _ in range(3)]
+        async with provider(images=images) as ocr_provider:
+            result = await ocr_provider.ocr()
+
+        assert result.get_failed_pages() == []
+        assert set(result.pages) == {1, 2, 3}
+
+    async def test_ocr_page_errors(self) -> None:
+        """
+        Test that pages rejected by Textract are recorded as failed, while
+        other errors (e.g. missing permissions) fail the OCR.
+        """
+        client = FakeTextractClient()
+        provider = create_textract_provider(
+            client=client, requests_per_second=100)
+        analyze_document = client.analyze_document
+
+        def create_error(code: str) -> ClientError:
+            return ClientError(
+                error_response={"Error": {"Code": code}},
+                operation_name="AnalyzeDocument"
+            )
+
+        def reject_wide(**kwargs: Any) -> dict:
+            image = Image.open(io.BytesIO(kwargs["Document"]["Bytes"]))
+            if image.width == 20:
+                raise create_error("UnsupportedDocumentException")
+            return analyze_document(**kwargs)
+
+        images = [Image.new("RGB", (10, 10)), Image.new("RGB", (20, 10)),
+                  Image.new("RGB", (10, 10))]
+        with mock.patch.object(client, "analyze_document", reject_wide):
+            async with provider(images=images) as ocr_provider:
+                result = await ocr_provider.ocr()
+
+        assert result.get_failed_pages() == [2]
+
+        def deny(**kwargs: Any) -> dict:
+            raise create_error("AccessDeniedException")
+
+        with mock.patch.object(client, "analyze_document", deny):
+            async with provider(images=images) as ocr_provider:
+                with self.assertRaises(ClientError):
+                    await ocr_provider.ocr()
+
+    async def test_ocr_object(self) -> None:
+        """
+        Test the analysis of an S3 object with an asynchronous job, including
+        the status checks and the pagination of the results.
+        """
+        client = FakeTextractClient(pages=3, lines=20, words=20, job_polls=2)
+        provider = create_textract_provider(
+            client=client, use_async_jobs=True, job_poll_interval=0.01)
+
+        location = schemas.ObjectLocationSchema(
+            bucket="bucket", key="folder/document.pdf")
+
+        assert provider.supports_object(location)
+        assert not provider.supports_object(
+            schemas.ObjectLocationSchema(bucket="bucket", key="image.gif"))
+
+        async with provider(images=[]) as ocr_provider:
+            result = await ocr_provider.ocr_object(location=location)
+
+        job = next(iter(client.jobs.values()))
+        assert job["location"] == \
+            {"Bucket": "bucket", "Name": "folder/document.pdf"}
+
+        # 3 pages with 2 + 20 * 21 blocks each (two result pages), one call
+        # to start the job and two status checks
+        assert len(result) == 3 * 422
+        assert client.calls == 1 + 2 + 2
+        pages = [result.pages[index] for index in range(len(result))
+                 if result.get_type(index) == schemas.OcrItemType.page]
+        assert pages == [1, 2, 3]
+        assert set(result.pages) == {1, 2, 3}
+
+    async def test_ocr_object_timeout(self) -> None:
+        """
+        Test that an asynchronous job that does not complete times out.
+        """
+        client = FakeTextractClient(job_polls=1000)
+        provider = create_textract_provider(
+            client=client, use_async_jobs=True, job_poll_interval=0.01,
+            job_timeout=0.05)
+
+        with self.assertRaises(Exception):
+            await provider.ocr_object(location=schemas.ObjectLocationSchema(
+                bucket="bucket", key="document.pdf"))
+
+# ---------------------------------------------------------------------------- #
+
+
+class ThrottleTest(TestCase):
+    """
+    Test cases for the adaptive rate limiter.
+    """
+
+    async def test_rate_limiter(self) -> None:
+        """
+        Test that the limiter spaces requests according to its rate.
+        """
+        limiter = AdaptiveRateLimiter(rate=20)
+
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+
+        assert time.monotonic() - start >= 0.18
+
+    def test_shared_rate_limiter(self) -> None:
+        """
+        Test that the limiter of a key is shared by event loops in several
+        threads, so that they stay within a single rate together.
+        """
+        key = ("test", uuid.uuid4())
+        limiter = get_rate_limiter(key=key, rate=100)
+        assert get_rate_limiter(key=key, rate=20) is limiter
+        assert (limiter.max_rate, limiter.rate) == (20, 20)
+        assert get_rate_limiter(key=("test", uuid.uuid4()), rate=20) \
+            is not limiter
+
+        def run() -> None:
+            async def acquire() -> None:
+                for _ in range(3):
+                    await get_rate_limiter(key=key, rate=20).acquire()
+            asyncio.run(acquire())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 9 requests at 20 per second (the first one is not delayed)
+        assert time.monotonic() - start >= 0.38
+
+    def test_aimd(self) -> None:
+        """
+        Test the additive increase and multiplicative decrease of the rate.
+        """
+        limiter = AdaptiveRateLimiter(rate=10, increase=1)
+
+        limiter.on_throttle()
+        assert limiter.rate == 5
+        limiter.on_throttle()
+        assert limiter.rate == 2.5
+
+        limiter.on_success()
+        assert limiter.rate == 3.5
+
+        for _ in range(20):
+            limiter.on_success()
+        assert limiter.rate == 10
+
+    async def test_retries(self) -> None:
+        """
+        Test that throttled calls are retried up to max_retries times and
+        that other errors are raised immediately.
+        """
+        limiter = AdaptiveRateLimiter(rate=1000)
+        calls = []
+
+        async def throttled() -> None:
+            calls.append(1)
+            raise ClientError(
+                error_response={"Error": {"Code": "ThrottlingException"}},
+                operation_name="AnalyzeDocument"
+            )
+
+        with self.assertRaises(ClientError):
+            await call_with_throttling(
+                func=throttled, limiter=limiter, max_retries=2,
+                base_delay=0.001)
+        assert len(calls) == 3
+
+        async def failing() -> None:
+            calls.append(1)
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            await call_with_throttling(
+                func=failing, limiter=limiter, max_retries=2,
+                base_delay=0.001)
+        assert len(calls) == 4
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_aws_config(**kwargs: Any) -> schemas.AwsConfigSchema:
+    """
+    Create an AWS configuration with test values.
+    """
+    values = {
+        "aws_access_key_id": "key",
+        "aws_account_id": "123456789012",
+        "aws_region_name": "eu-central-1",
+        "aws_role_name": "role",
+        "aws_secret_access_key": "secret",
+    }
+    values.update(kwargs)
+    return schemas.AwsConfigSchema(**values)
+
+# ---------------------------------------------------------------------------- #
+
+
+class ProviderRegistryTest(TestCase):
+    """
+    Test cases for the lazy provider registry.
+    """
+
+    def test_lazy_import(self) -> None:
+        """
+        Test that importing the providers does not import the dependencies
+        of the individual providers.
+        """
+        output = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, mrkr.providers; print(sorted(name for name in "
+             "('boto3', 'pytesseract', 'numpy') if name in sys.modules))"],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+
+        assert output.strip() == "[]"
+
+    def test_get(self) -> None:
+        """
+        Test that providers are imported on first use and that unknown types
+        are looked up in the entry points.
+        """
+        registry: ProviderRegistry[providers.BaseOcrProvider] = \
+            ProviderRegistry(
+                group="mrkr.test_providers",
+                references={
+                    "tesseract":
+                        "mrkr.providers.ocr.tesseract:TesseractOcrProvider"
+                }
+            )
+
+        entry_point = importlib.metadata.EntryPoint(
+            name="custom",
+            value="mrkr.providers.ocr.textract:TextractOcrProvider",
+            group="mrkr.test_providers"
+        )
+
+        with mock.patch(
+            "importlib.metadata.entry_points", return_value=[entry_point]
+        ) as entry_points:
+            assert registry.get("tesseract") is \
+                providers.TesseractOcrProvider
+            entry_points.assert_not_called()
+
+            assert registry.get("custom") is TextractOcrProvider
+            assert registry.types == ["custom", "tesseract"]
+            with self.assertRaises(ValueError):
+                registry.get("unknown")
+            entry_points.assert_called_once_with(group="mrkr.test_providers")
+
+        registry.register("tesseract", TextractOcrProvider)
+        assert registry.get("tesseract") is TextractOcrProvider
+
+    def test_third_party_provider(self) -> None:
+        """
+        Test that a registered third-party provider receives its additional
+        configuration settings.
+        """
+        class CustomOcrProvider(providers.BaseOcrProvider):
+            pass
+
+        config = schemas.ProjectConfigSchema.model_validate({
+            "label_definitions": [],
+            "file_provider": {"type": "local", "config": {"path": "."}},
+            "ocr_provider": {
+                "type": "custom",
+                "config": {"endpoint": "http://localhost"}
+            }
+        })
+
+        with mock.patch.dict(providers.ocr_providers._references), \
+                mock.patch.dict(providers.ocr_providers._classes):
+            providers.ocr_providers.register("custom", CustomOcrProvider)
+            provider = providers.get_ocr_provider(project_config=config)
+
+        assert isinstance(provider, CustomOcrProvider)
+        assert provider._config.model_extra == \
+            {"endpoint": "http://localhost"}
+        assert isinstance(providers.get_file_provider(project_config=config),
+                          providers.LocalFileProvider)
+
+# ---------------------------------------------------------------------------- #
+
+
+class AwsSessionTest(TestCase):
+    """
+    Test cases for the shared AWS sessions.
+    """
+
+    def test_get_aws_session(self) -> None:
+        """
+        Test that sessions are shared per account, role and region.
+        """
+        session = get_aws_session(config=create_aws_config())
+
+        assert get_aws_session(config=create_aws_config()) is session
+        assert get_aws_session(
+            config=create_aws_config(aws_role_name="other")) is not session
+        assert get_aws_session(
+            config=create_aws_config(aws_region_name="us-east-1")) \
+            is not session
+
+    async def test_get_client(self) -> None:
+        """
+        Test that credentials and clients are reused until shortly before
+        the credentials expire, and that only one refresh is in flight.
+        """
+        expiration = [datetime.datetime.now(tz=datetime.timezone.utc) +
+                      datetime.timedelta(hours=1)]
+        sts = mock.Mock()
+        sts.assume_role.side_effect = lambda **kwargs: {
+            "Credentials": {
+                "AccessKeyId": f"key{sts.assume_role.call_count}",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": expiration[0]
+            }
+        }
+
+        def create_client(service_name: str, credentials: Any = None) -> Any:
+            time.sleep(0.01)
+            return sts if service_name == "sts" else mock.Mock()
+
+        session = AwsSession(config=create_aws_config())
+        with mock.patch.object(
+                session, "_create_client", side_effect=create_client):
+            clients = await asyncio.gather(
+                *(session.get_client(service_name="s3") for _ in range(8)))
+
+            assert sts.assume_role.call_count == 1
+            assert all(client is clients[0] for client in clients)
+            assert await session.get_client(service_name="s3") is clients[0]
+            assert await session.get_client(service_name="textract") \
+                is not clients[0]
+
+            expiration[0] = datetime.datetime.now(tz=datetime.timezone.utc) + \
+                datetime.timedelta(minutes=1)
+            await session.refresh_temp_credentials(force=True)
+            assert sts.assume_role.call_count == 2
+
+            client = await session.get_client(service_name="s3")
+            assert sts.assume_role.call_count == 3
+            assert client is not clients[0]
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_page_image() -> Image.Image:
+    """
+    Create a synthetic page with 30 lines of "words" (black boxes) and a
+    marker box at the bottom.
+    """
+    image = Image.new("RGB", (1000, 1400), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(30):
+        top = 100 + line * 36
+        left = 80
+        while left < 880:
+            width = 20 + (left * 7 + line * 13) % 60
+            draw.rectangle((left, top, left + width, top + 16), fill="black")
+            left += width + 12
+    draw.rectangle((400, 1250, 600, 1290), fill="black")
+    return image
+
+# ---------------------------------------------------------------------------- #
+
+
+class PreprocessingTest(TestCase):
+    """
+    Test cases for the preprocessing of pages before OCR.
+    """
+
+    def test_estimate_skew(self) -> None:
+        """
+        Test that the rotation of a page is detected.
+        """
+        image = create_page_image().convert("L").rotate(
+            2.5, fillcolor=255)
+
+        angle = estimate_skew(pixels=numpy.asarray(image), max_angle=5)
+
+        assert abs(angle + 2.5) <= 0.1
+
+    def test_preprocess_image(self) -> None:
+        """
+        Test that a preprocessed page is smaller and that positions on the
+        preprocessed page are mapped back to the original page.
+        """
+        original = create_page_image().rotate(
+            -2, fillcolor="white")
+
+        image, transform = preprocess_image(
+            image=original,
+            config=schemas.OcrPreprocessingSchema(
+                enabled=True,
+                mode=schemas.OcrPreprocessingMode.binary,
+                target_x_height=5
+            )
+        )
+
+        assert image.mode == "1"
+        assert abs(transform.angle - 2) <= 0.1
+        assert transform.crop != (0, 0)
+        assert transform.scale < 1
+        assert set(transform.timings) == \
+            {"grayscale", "deskew", "crop", "downscale", "binary"}
+
+        # the marker is the last block of ink on the preprocessed page
+        ink = ~numpy.asarray(image)
+        rows = numpy.nonzero(ink.any(axis=1))[0]
+        bottom = int(rows[-1])
+        top = bottom
+        while ink[top - 1].any():
+            top -= 1
+        columns = numpy.nonzero(ink[top:bottom + 1].any(axis=0))[0]
+
+        x, y, width, height = transform.to_original(
+            left=columns[0] / image.width,
+            top=top / image.height,
+            width=(columns[-1] - columns[0] + 1) / image.width,
+            height=(bottom - top + 1) / image.height
+        )
+
+        # the bounding box of the rotated marker on the original page
+        ink = numpy.asarray(original.convert("L"))[1200:, 300:700] < 128
+        rows = numpy.nonzero(ink.any(axis=1))[0]
+        columns = numpy.nonzero(ink.any(axis=0))[0]
+
+        assert abs(x * 1000 - (300 + columns[0])) < 4
+        assert abs(y * 1400 - (1200 + rows[0])) < 4
+        assert abs(width * 1000 - (columns[-1] - columns[0] + 1)) < 6
+        assert abs(height * 1400 - (rows[-1] - rows[0] + 1)) < 6
+
+    def test_restore_positions(self) -> None:
+        """
+        Test that the positions of an OCR result are restored in place.
+        """
+        result = create_ocr_result()
+        transform = providers.PageTransform(
+            original_size=(100, 200),
+            crop=(10, 20),
+            scale=0.5,
+            size=(40, 80)
+        )
+
+        providers.restore_positions(ocr_result=result, transforms=[transform])
+
+        # (0.1, 0.1) on the 40x80 page is (4, 8), i.e. (8, 16) before
+        # scaling and (18, 36) before cropping
+        assert result.left[1] == 0.18
+        assert result.top[1] == 0.18
+        assert result.width[1] == 0.4
+        assert result.height[1] == 0.16
+
+# ---------------------------------------------------------------------------- #
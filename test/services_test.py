@@ -1,5 +1,6 @@
 # ---------------------------------------------------------------------------- #
 
+import asyncio
 import unittest
 import os
 import pathlib
@@ -9,6 +10,7 @@ from fastapi import Request, Response
 from fastapi.templating import Jinja2Templates
 from unittest.mock import patch
 from contextlib import ExitStack
+from typing import List
 
 # ---------------------------------------------------------------------------- #
 
@@ -206,3 +208,124 @@ class StaticTest(TestCase):
         assert response.headers.get("Cache-Control") == "no-cache"
 
 # ---------------------------------------------------------------------------- #
+
+
+class PageCacheTest(TestCase):
+    """
+    Test cases for the rendered page cache.
+    """
+
+    def test_get_put(self) -> None:
+        """
+        Test that entries are stored, that the least recently used entries
+        are evicted and that the entries are loaded again after a restart.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            cache = services.PageCache(directory=directory, max_size=25)
+
+            assert cache.get(("page", "a", 1)) is None
+
+            cache.put(("page", "a", 1), b"1" * 10)
+            cache.put(("page", "a", 2), b"2" * 10)
+            assert cache.get(("page", "a", 1)) == b"1" * 10
+
+            # The second page is the least recently used one.
+            cache.put(("page", "a", 3), b"3" * 10)
+            assert cache.get(("page", "a", 2)) is None
+            assert cache.get(("page", "a", 3)) == b"3" * 10
+
+            metrics = cache.metrics()
+            assert (metrics.hits, metrics.misses, metrics.writes,
+                    metrics.evictions) == (2, 2, 3, 1)
+            assert (metrics.entries, metrics.size) == (2, 20)
+
+            cache = services.PageCache(directory=directory, max_size=25)
+            assert cache.metrics().entries == 2
+            assert cache.get(("page", "a", 1)) == b"1" * 10
+
+# ---------------------------------------------------------------------------- #
+
+
+class SingleFlightTest(TestCase):
+    """
+    Test cases for coalescing concurrent calls.
+    """
+
+    async def test_run(self) -> None:
+        """
+        Test that concurrent calls with the same key share one call, and
+        that later calls start a new one.
+        """
+        single_flight = services.SingleFlight()
+        calls: List[int] = []
+
+        async def render() -> str:
+            calls.append(len(calls) + 1)
+            await asyncio.sleep(0.01)
+            return f"page {len(calls)}"
+
+        results = await asyncio.gather(
+            single_flight.run(("image", 1, 1), render),
+            single_flight.run(("image", 1, 1), render),
+            single_flight.run(("image", 1, 2), render)
+        )
+        assert results[0] == results[1]
+        assert len(calls) == 2
+
+        assert await single_flight.run(("image", 1, 1), render) == "page 3"
+
+        metrics = single_flight.metrics()
+        assert (metrics.started, metrics.shared, metrics.cancelled,
+                metrics.in_flight) == (3, 1, 0, 0)
+
+    async def test_run_cancelled(self) -> None:
+        """
+        Test that a call keeps running while a caller waits for it and is
+        cancelled when all callers are cancelled.
+        """
+        single_flight = services.SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def render() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "page"
+
+        first = asyncio.ensure_future(single_flight.run("key", render))
+        second = asyncio.ensure_future(single_flight.run("key", render))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        second.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        metrics = single_flight.metrics()
+        assert (metrics.cancelled, metrics.in_flight) == (1, 0)
+
+    async def test_run_error(self) -> None:
+        """
+        Test that errors are raised to all callers.
+        """
+        single_flight = services.SingleFlight()
+
+        async def render() -> str:
+            await asyncio.sleep(0)
+            raise Exception("Rendering failed")
+
+        results = await asyncio.gather(
+            single_flight.run("key", render),
+            single_flight.run("key", render),
+            return_exceptions=True
+        )
+        assert [str(result) for result in results] == [
+            "Rendering failed", "Rendering failed"]
+
+# ---------------------------------------------------------------------------- #